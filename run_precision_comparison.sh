@@ -0,0 +1,56 @@
+#!/bin/bash
+
+# Reference case: the damped oscillator with every algorithm, and a short
+# coupled chain, integrated with both precisions
+seed=1743645648280
+output_directory=./output/precision
+amplitude=1.0
+deltaT=0.0001
+simulation_time=5
+
+coupled_amplitude=0.01
+coupled_deltaT=0.001
+coupled_simulation_time=2
+number_of_particles=100
+mass=0.00021
+spring_constant=102.3
+gamma=0.0003
+angular_frequency=2.053
+
+# Clear the terminal
+clear
+
+# Build the project
+gradle clean build
+
+for precision in bigdecimal double; do
+  mkdir -p $output_directory/$precision
+
+  gradle run --no-build-cache --rerun-tasks --args="\
+    damped-oscillator \
+    -A $amplitude \
+    -t $simulation_time \
+    -dt $deltaT \
+    --precision $precision \
+    --output-directory $output_directory/$precision \
+    -s $seed"
+
+  gradle run --no-build-cache --rerun-tasks --args="\
+    coupled-oscillator \
+    -m $mass \
+    -k $spring_constant \
+    -y $gamma \
+    -A $coupled_amplitude \
+    -N $number_of_particles \
+    -t $coupled_simulation_time \
+    -dt $coupled_deltaT \
+    -w $angular_frequency \
+    --precision $precision \
+    --output-directory $output_directory/$precision \
+    -s $seed"
+done
+
+# Non-zero exit status when the double outputs drift from the BigDecimal ones
+python src/main/python/precision_comparison.py \
+  --reference-dir $output_directory/bigdecimal \
+  --candidate-dir $output_directory/double
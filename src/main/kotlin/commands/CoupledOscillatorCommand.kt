@@ -3,7 +3,9 @@ package ar.edu.itba.ss.commands
 import ar.edu.itba.ss.integrables.*
 import ar.edu.itba.ss.simulation.*
 import ar.edu.itba.ss.utils.AlgorithmType
+import ar.edu.itba.ss.utils.OutputBlock
 import ar.edu.itba.ss.utils.OutputWriter
+import ar.edu.itba.ss.utils.Precision
 import com.github.ajalt.clikt.parameters.options.*
 import com.github.ajalt.clikt.parameters.types.double
 import com.github.ajalt.clikt.parameters.types.enum
@@ -43,6 +45,17 @@ class CoupledOscillatorCommand : OscillatorCommand() {
         .flag(default = false)
         .help("If set, vary spring constant k in log-scale from 1e2 to 1e4")
 
+    private val steadyStateTolerance: Double? by option("--steady-state-tolerance")
+        .double()
+        .help("If set, stop once successive periods' amplitudes agree within this relative tolerance")
+        .check("Must be greater than zero") { it > 0.0 }
+
+    private val steadyStatePeriods: Int by option("--steady-state-periods")
+        .int()
+        .default(3)
+        .help("Successive agreeing periods required by --steady-state-tolerance")
+        .check("Must be greater than zero") { it > 0 }
+
     override fun run() {
         logger.info { "Starting simulation with the following parameters:" }
         logger.info { "Particle mass: $mass [kg]" }
@@ -53,7 +66,10 @@ class CoupledOscillatorCommand : OscillatorCommand() {
         logger.info { "Angular frequency: ${angularFrequencies.joinToString() } [rad/s]" }
         logger.info { "Spring length: $springLength [m]" }
         logger.info { "Sweep K: $sweepK" }
+        logger.info { "Steady state tolerance: ${steadyStateTolerance ?: "disabled"}" }
         logger.info { "Seed: $seed" }
+        logger.info { "Output format: $outputFormat" }
+        logger.info { "Precision: $precision" }
 
         val kValues = if (sweepK) generateKValues() else listOf(springConstant)
 
@@ -74,7 +90,7 @@ class CoupledOscillatorCommand : OscillatorCommand() {
                         job.jobParams.simulationJob.join()
                         job.jobParams.writer.requestStop()
                         job.jobParams.writerJob.join()
-                        job.jobParams.output.close()
+                        job.jobParams.simulation.writeSteadyState(job.settings.basicSettings.outputFile)
 
                         logger.info { "Simulation with k=$k, w=$omega completed. Output: ${job.settings.basicSettings.outputFile}" }
                     }
@@ -91,7 +107,20 @@ class CoupledOscillatorCommand : OscillatorCommand() {
         return listOf(1e2, 1e3, 1.8e3, 3.2e3, 1e4)
     }
 
-    private fun algorithmFactory(settings: CoupledSettings): AlgorithmN {
+    private fun algorithmFactory(settings: CoupledSettings): Integrator {
+        if (precision == Precision.DOUBLE) {
+            return when (algorithmType) {
+                AlgorithmType.BEEMAN -> DoubleBeeman(settings, Simulation.Companion::calculateAcceleration)
+                AlgorithmType.VERLET -> DoubleVerlet(settings, Simulation.Companion::calculateAcceleration)
+                AlgorithmType.EULER -> DoubleEuler(
+                    settings = settings,
+                    acceleration = Simulation.Companion::calculateAcceleration,
+                    deltaT = settings.deltaT.toDouble()
+                )
+                AlgorithmType.GEAR -> DoubleGearPredictorCorrector(settings, Simulation.Companion::calculateAcceleration)
+            }
+        }
+
         return when (algorithmType) {
             AlgorithmType.BEEMAN -> Beeman(settings, Simulation.Companion::calculateAcceleration)
             AlgorithmType.VERLET -> Verlet(settings, Simulation.Companion::calculateAcceleration)
@@ -109,7 +138,7 @@ class CoupledOscillatorCommand : OscillatorCommand() {
         omega: Double,
         springConstant: Double,
         algorithmName: String,
-        algorithmFactory: (CoupledSettings) -> AlgorithmN
+        algorithmFactory: (CoupledSettings) -> Integrator
     ): CoupledSimulationJob {
         val settings = buildCoupledSettings(algorithmName, omega, springConstant)
         return initializeCoupledAlgorithm(
@@ -135,7 +164,7 @@ class CoupledOscillatorCommand : OscillatorCommand() {
         }.replace(".", "_")
             .replace("=", "-")
             .replace(" ", "-")
-            .plus(".csv")
+            .plus(outputFormat.extension)
 
     private fun buildCoupledSettings(algorithmName: String, omega: Double, springConstant: Double): CoupledSettings {
         val basicSettings = buildBasicSettings(algorithmName, omega, springConstant)
@@ -143,7 +172,9 @@ class CoupledOscillatorCommand : OscillatorCommand() {
             basicSettings = basicSettings,
             numberOfParticles = numberOfParticles - 1,
             angularFrequency = omega,
-            springLength = springLength
+            springLength = springLength,
+            steadyStateTolerance = steadyStateTolerance,
+            steadyStatePeriods = steadyStatePeriods
         )
     }
 
@@ -161,17 +192,18 @@ class CoupledOscillatorCommand : OscillatorCommand() {
             initialPositions = List(numberOfParticles) { BigDecimal.ZERO },
             initialVelocities = List(numberOfParticles) { BigDecimal.ZERO },
             amplitude = amplitude,
-            seed = seed
+            seed = seed,
+            outputFormat = outputFormat,
         )
     }
 
     private fun initializeCoupledAlgorithm(
         settings: CoupledSettings,
-        algorithm: AlgorithmN,
+        algorithm: Integrator,
         scope: CoroutineScope
     ): CoupledSimulationJob {
-        val output = Channel<String>(capacity = Channel.UNLIMITED)
-        val writer = OutputWriter(settings = settings.basicSettings, channel = output)
+        val output = Channel<OutputBlock>(capacity = OutputWriter.CHANNEL_CAPACITY)
+        val writer = OutputWriter(settings = settings.basicSettings, channel = output, bufferSize = writeBufferSize)
         val simulation = Simulation(settings, output = output, algorithm = algorithm)
 
         val writerJob = scope.launch { writer.start() }
@@ -2,7 +2,9 @@ package ar.edu.itba.ss.commands
 
 import ar.edu.itba.ss.integrables.*
 import ar.edu.itba.ss.simulation.DampedSimulationJob
+import ar.edu.itba.ss.utils.OutputBlock
 import ar.edu.itba.ss.utils.OutputWriter
+import ar.edu.itba.ss.utils.Precision
 import ar.edu.itba.ss.simulation.Settings
 import ar.edu.itba.ss.simulation.Simulation
 import ar.edu.itba.ss.simulation.SimulationJob
@@ -48,6 +50,8 @@ class DampedOscillatorCommand : OscillatorCommand() {
         logger.info { "Initial position: $initialPosition [m]" }
         logger.info { "Initial velocity: $calculatedInitialVelocity [m/s]" }
         logger.info { "Seed: $seed" }
+        logger.info { "Output format: $outputFormat" }
+        logger.info { "Precision: $precision" }
 
         val coroutineScope = CoroutineScope(Dispatchers.Default)
 
@@ -71,7 +75,6 @@ class DampedOscillatorCommand : OscillatorCommand() {
 
             simulationJobs.forEach { it.jobParams.writer.requestStop() }
             simulationJobs.forEach { it.jobParams.writerJob.join() }
-            simulationJobs.forEach { it.jobParams.output.close() }
 
             logger.info { "Simulations completed." }
             logger.info { "Outputs saved to:" }
@@ -83,7 +86,11 @@ class DampedOscillatorCommand : OscillatorCommand() {
         val settings = buildSettings(GearPredictorCorrector.PRETTY_NAME)
         return initializeAlgorithm(
             settings = settings,
-            algorithm = GearPredictorCorrector(settings, Simulation.Companion::calculateAcceleration),
+            algorithm = if (precision == Precision.DOUBLE) {
+                DoubleGearPredictorCorrector(settings, Simulation.Companion::calculateAcceleration)
+            } else {
+                GearPredictorCorrector(settings, Simulation.Companion::calculateAcceleration)
+            },
             scope = scope,
         )
     }
@@ -92,7 +99,11 @@ class DampedOscillatorCommand : OscillatorCommand() {
         val settings = buildSettings(Beeman.PRETTY_NAME)
         return initializeAlgorithm(
             settings = settings,
-            algorithm = Beeman(settings, Simulation.Companion::calculateAcceleration),
+            algorithm = if (precision == Precision.DOUBLE) {
+                DoubleBeeman(settings, Simulation.Companion::calculateAcceleration)
+            } else {
+                Beeman(settings, Simulation.Companion::calculateAcceleration)
+            },
             scope = scope,
         )
     }
@@ -101,9 +112,11 @@ class DampedOscillatorCommand : OscillatorCommand() {
         val settings = buildSettings(Verlet.PRETTY_NAME)
         return initializeAlgorithm(
             settings = settings,
-            algorithm = Verlet(
-                settings, Simulation.Companion::calculateAcceleration
-            ),
+            algorithm = if (precision == Precision.DOUBLE) {
+                DoubleVerlet(settings, Simulation.Companion::calculateAcceleration)
+            } else {
+                Verlet(settings, Simulation.Companion::calculateAcceleration)
+            },
             scope = scope,
         )
     }
@@ -113,11 +126,19 @@ class DampedOscillatorCommand : OscillatorCommand() {
         val settings = buildSettings(Euler.PRETTY_NAME)
         return initializeAlgorithm(
             settings = settings,
-            algorithm = Euler(
-                settings = settings,
-                acceleration = Simulation.Companion::calculateAcceleration,
-                deltaT = settings.deltaT,
-            ),
+            algorithm = if (precision == Precision.DOUBLE) {
+                DoubleEuler(
+                    settings = settings,
+                    acceleration = Simulation.Companion::calculateAcceleration,
+                    deltaT = settings.deltaT.toDouble(),
+                )
+            } else {
+                Euler(
+                    settings = settings,
+                    acceleration = Simulation.Companion::calculateAcceleration,
+                    deltaT = settings.deltaT,
+                )
+            },
             scope = scope,
         )
     }
@@ -137,7 +158,7 @@ class DampedOscillatorCommand : OscillatorCommand() {
         }.replace(".", "_")
             .replace("=", "-")
             .replace(" ", "-")
-            .plus(".csv")
+            .plus(outputFormat.extension)
 
     private fun buildSettings(algorithmName: String): Settings {
         val fileName = buildFileName(algorithmName)
@@ -154,16 +175,17 @@ class DampedOscillatorCommand : OscillatorCommand() {
             initialVelocities = listOf(calculatedInitialVelocity),
             amplitude = amplitude,
             seed = seed,
+            outputFormat = outputFormat,
         )
     }
 
     private fun initializeAlgorithm(
         settings: Settings,
-        algorithm: AlgorithmN,
+        algorithm: Integrator,
         scope: CoroutineScope
     ): DampedSimulationJob {
-        val output = Channel<String>(capacity = Channel.UNLIMITED)
-        val writer = OutputWriter(settings = settings, channel = output)
+        val output = Channel<OutputBlock>(capacity = OutputWriter.CHANNEL_CAPACITY)
+        val writer = OutputWriter(settings = settings, channel = output, bufferSize = writeBufferSize)
         val simulation = Simulation(settings, output = output, algorithm = algorithm)
 
         val writerJob = scope.launch { writer.start() }
@@ -1,8 +1,13 @@
 package ar.edu.itba.ss.commands
 
+import ar.edu.itba.ss.utils.OutputFormat
+import ar.edu.itba.ss.utils.OutputWriter
+import ar.edu.itba.ss.utils.Precision
 import com.github.ajalt.clikt.core.CliktCommand
 import com.github.ajalt.clikt.parameters.options.*
 import com.github.ajalt.clikt.parameters.types.double
+import com.github.ajalt.clikt.parameters.types.enum
+import com.github.ajalt.clikt.parameters.types.int
 import com.github.ajalt.clikt.parameters.types.long
 import com.github.ajalt.clikt.parameters.types.path
 import java.nio.file.Path
@@ -48,4 +53,20 @@ abstract class OscillatorCommand : CliktCommand() {
     protected val outputDirectory: Path by option().path(
         canBeFile = false, canBeDir = true, mustExist = true, mustBeReadable = true, mustBeWritable = true
     ).required().help("Path to the output directory.")
+
+    protected val outputFormat: OutputFormat by option("--output-format")
+        .enum<OutputFormat> { it.toString() }
+        .default(OutputFormat.CSV)
+        .help("csv text, or binary records of float64 or double-double (hi, lo) values")
+
+    protected val precision: Precision by option("--precision")
+        .enum<Precision> { it.toString() }
+        .default(Precision.BIG_DECIMAL)
+        .help("bigdecimal integrates with 34 significant digits, double is faster but only has ~16")
+
+    protected val writeBufferSize: Int by option("--write-buffer-size")
+        .int()
+        .default(OutputWriter.DEFAULT_BUFFER_SIZE)
+        .help("Bytes buffered before each write to an output file")
+        .check("Must be greater than 0") { it > 0 }
 }
\ No newline at end of file
@@ -2,10 +2,8 @@ package ar.edu.itba.ss.integrables
 
 import java.math.BigDecimal
 
-interface AlgorithmN {
+interface AlgorithmN : Integrator {
     val currentVelocities: List<BigDecimal>
     val currentPositions: List<BigDecimal>
     val currentAccelerations: List<BigDecimal>
-
-    fun advanceDeltaT()
-}
\ No newline at end of file
+}
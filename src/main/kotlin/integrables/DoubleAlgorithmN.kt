@@ -0,0 +1,16 @@
+package ar.edu.itba.ss.integrables
+
+import java.math.BigDecimal
+
+// Same integrators as AlgorithmN in double precision: the state is preallocated
+// and updated in place, the arrays may be swapped between steps
+interface DoubleAlgorithmN : Integrator {
+    val positions: DoubleArray
+    val velocities: DoubleArray
+    val accelerations: DoubleArray
+}
+
+// Writes the accelerations of every particle into its last argument
+typealias DoubleAcceleration<T> = (settings: T, positions: DoubleArray, velocities: DoubleArray, accelerations: DoubleArray) -> Unit
+
+fun List<BigDecimal>.toDoubles(): DoubleArray = DoubleArray(size) { this[it].toDouble() }
@@ -0,0 +1,67 @@
+package ar.edu.itba.ss.integrables
+
+import ar.edu.itba.ss.simulation.SimulationSettings
+
+class DoubleBeeman<T : SimulationSettings>(
+    val settings: T,
+    val acceleration: DoubleAcceleration<T>
+) : DoubleAlgorithmN {
+    val dT = settings.deltaT.toDouble()
+    val dT2 = dT * dT
+
+    override var positions: DoubleArray = settings.initialPositions.toDoubles()
+        private set
+    override val velocities: DoubleArray = settings.initialVelocities.toDoubles()
+    override var accelerations: DoubleArray = DoubleArray(positions.size).also {
+        acceleration(settings, positions, velocities, it)
+    }
+        private set
+
+    private var previousAccelerations: DoubleArray = run {
+        val euler = DoubleEuler(settings, acceleration, -dT)
+        euler.advanceDeltaT()
+        DoubleArray(positions.size).also { acceleration(settings, euler.positions, euler.velocities, it) }
+    }
+
+    // x(t + dT), v(t + dT) predicted and a(t + dT)
+    private var nextPositions = DoubleArray(positions.size)
+    private val predictedVelocities = DoubleArray(positions.size)
+    private var nextAccelerations = DoubleArray(positions.size)
+
+    override fun advanceDeltaT() {
+        val x = positions
+        val v = velocities
+        val a = accelerations
+        val aMinusDt = previousAccelerations
+
+        // Predict
+        for (i in x.indices) {
+            nextPositions[i] = x[i] + v[i] * dT + TWO_OVER_THREE * a[i] * dT2 - ONE_OVER_SIX * aMinusDt[i] * dT2
+            predictedVelocities[i] = v[i] + THREE_OVER_TWO * a[i] * dT - ONE_OVER_TWO * aMinusDt[i] * dT
+        }
+        // Real acceleration
+        acceleration(settings, nextPositions, predictedVelocities, nextAccelerations)
+        // Correct
+        for (i in v.indices) {
+            v[i] = v[i] + ONE_OVER_THREE * nextAccelerations[i] * dT +
+                    FIVE_OVER_SIX * a[i] * dT -
+                    ONE_OVER_SIX * aMinusDt[i] * dT
+        }
+
+        // Shift to current values
+        positions = nextPositions
+        nextPositions = x
+        previousAccelerations = a
+        accelerations = nextAccelerations
+        nextAccelerations = aMinusDt
+    }
+
+    companion object {
+        const val TWO_OVER_THREE = 2.0 / 3
+        const val ONE_OVER_SIX = 1.0 / 6
+        const val THREE_OVER_TWO = 3.0 / 2
+        const val ONE_OVER_TWO = 1.0 / 2
+        const val ONE_OVER_THREE = 1.0 / 3
+        const val FIVE_OVER_SIX = 5.0 / 6
+    }
+}
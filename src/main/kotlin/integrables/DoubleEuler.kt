@@ -0,0 +1,25 @@
+package ar.edu.itba.ss.integrables
+
+import ar.edu.itba.ss.simulation.SimulationSettings
+
+class DoubleEuler<T : SimulationSettings>(
+    val settings: T,
+    val acceleration: DoubleAcceleration<T>,
+    deltaT: Double
+) : DoubleAlgorithmN {
+    private val dT = deltaT
+
+    override val velocities: DoubleArray = settings.initialVelocities.toDoubles()
+    override val positions: DoubleArray = settings.initialPositions.toDoubles()
+    override val accelerations: DoubleArray = DoubleArray(positions.size).also {
+        acceleration(settings, positions, velocities, it)
+    }
+
+    override fun advanceDeltaT() {
+        for (i in positions.indices) {
+            velocities[i] += dT * accelerations[i]
+            positions[i] += dT * velocities[i]
+        }
+        acceleration(settings, positions, velocities, accelerations)
+    }
+}
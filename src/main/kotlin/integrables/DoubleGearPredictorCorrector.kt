@@ -0,0 +1,84 @@
+package ar.edu.itba.ss.integrables
+
+import ar.edu.itba.ss.simulation.CoupledSettings
+import ar.edu.itba.ss.simulation.SimulationSettings
+import kotlin.math.pow
+
+class DoubleGearPredictorCorrector<T : SimulationSettings>(
+    val settings: T,
+    val acceleration: DoubleAcceleration<T>
+) : DoubleAlgorithmN {
+    val dT = settings.deltaT.toDouble()
+
+    val kOverM = settings.k / settings.mass.toDouble()
+    val gOverM = settings.gamma / settings.mass.toDouble()
+
+    // dT^n / n! for every order, and the matching corrector scales alpha_n n! / dT^n
+    private val taylor = DoubleArray(ORDERS) { n -> dT.pow(n) / FACTORIAL[n] }
+    private val corrections = DoubleArray(ORDERS) { n -> ALPHAS[n] * FACTORIAL[n] / dT.pow(n) }
+
+    // r[n] is the n-th derivative of the positions
+    private val r: Array<DoubleArray> = Array(ORDERS) { order ->
+        when (order) {
+            0 -> settings.initialPositions.toDoubles()
+            1 -> settings.initialVelocities.toDoubles()
+            else -> DoubleArray(settings.initialPositions.size)
+        }
+    }
+    private val correctedAccelerations = DoubleArray(r[0].size)
+
+    override val positions: DoubleArray
+        get() = r[0]
+    override val velocities: DoubleArray
+        get() = r[1]
+    override val accelerations: DoubleArray
+        get() = r[2]
+
+    init {
+        for (order in 2 until ORDERS) {
+            val x = r[order - 2]
+            val v = r[order - 1]
+            for (i in x.indices) {
+                val springForce = if (settings is CoupledSettings) {
+                    val left = if (i == 0) settings.doubleDrivenDerivatives[order] else x[i - 1]
+                    val right = if (i == x.lastIndex) 0.0 else x[i + 1]
+                    -kOverM * (x[i] * 2 - left - right)
+                } else {
+                    -kOverM * x[i]
+                }
+                r[order][i] = springForce - gOverM * v[i]
+            }
+        }
+    }
+
+    override fun advanceDeltaT() {
+        // Step 1: lowest order first, each prediction only reads the higher orders
+        for (i in r[0].indices) {
+            for (order in 0 until ORDERS) {
+                var predicted = r[order][i]
+                for (j in 1 until ORDERS - order) {
+                    predicted += r[order + j][i] * taylor[j]
+                }
+                r[order][i] = predicted
+            }
+        }
+
+        // Step 2
+        acceleration(settings, r[0], r[1], correctedAccelerations)
+
+        // Step 3
+        for (i in r[0].indices) {
+            val deltaR2 = (correctedAccelerations[i] - r[2][i]) * taylor[2]
+            for (order in 0 until ORDERS) {
+                r[order][i] += corrections[order] * deltaR2
+            }
+        }
+    }
+
+    companion object {
+        const val ORDERS = 6
+
+        val ALPHAS = doubleArrayOf(3.0 / 16, 251.0 / 360, 1.0, 11.0 / 18, 1.0 / 6, 1.0 / 60)
+        val FACTORIAL = doubleArrayOf(1.0, 1.0, 2.0, 6.0, 24.0, 120.0)
+    }
+}
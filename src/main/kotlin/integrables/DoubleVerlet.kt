@@ -0,0 +1,39 @@
+package ar.edu.itba.ss.integrables
+
+import ar.edu.itba.ss.simulation.SimulationSettings
+
+class DoubleVerlet<T : SimulationSettings>(
+    val settings: T,
+    val acceleration: DoubleAcceleration<T>
+) : DoubleAlgorithmN {
+    val dT = settings.deltaT.toDouble()
+    val dT2 = dT * dT
+    val twiceDeltaT = 2 * dT
+
+    override var positions: DoubleArray = settings.initialPositions.toDoubles()
+        private set
+    override val velocities: DoubleArray = settings.initialVelocities.toDoubles()
+    override val accelerations: DoubleArray = DoubleArray(positions.size).also {
+        acceleration(settings, positions, velocities, it)
+    }
+
+    // r(t - dT), and the buffer r(t + dT) is written to
+    private var previousPositions: DoubleArray =
+        DoubleEuler(settings, acceleration, -dT).apply { advanceDeltaT() }.positions
+    private var nextPositions = DoubleArray(positions.size)
+
+    override fun advanceDeltaT() {
+        acceleration(settings, positions, velocities, accelerations)
+
+        for (i in positions.indices) {
+            // r(t + dT), then v(t)
+            nextPositions[i] = 2 * positions[i] - previousPositions[i] + dT2 * accelerations[i]
+            velocities[i] = (nextPositions[i] - previousPositions[i]) / twiceDeltaT
+        }
+
+        val buffer = previousPositions
+        previousPositions = positions
+        positions = nextPositions
+        nextPositions = buffer
+    }
+}
@@ -0,0 +1,6 @@
+package ar.edu.itba.ss.integrables
+
+// Either precision of the integrators: AlgorithmN on BigDecimal lists, DoubleAlgorithmN on DoubleArrays
+sealed interface Integrator {
+    fun advanceDeltaT()
+}
@@ -1,9 +1,11 @@
 package ar.edu.itba.ss.simulation
 
+import ar.edu.itba.ss.utils.OutputFormat
 import ch.obermuhlner.math.big.DefaultBigDecimalMath.cos
 import ch.obermuhlner.math.big.DefaultBigDecimalMath.sin
 import java.io.File
 import java.math.BigDecimal
+import kotlin.math.pow
 import kotlin.random.Random
 
 interface SimulationSettings {
@@ -18,6 +20,7 @@ interface SimulationSettings {
     val initialVelocities: List<BigDecimal>
     val amplitude: Double
     val seed: Long
+    val outputFormat: OutputFormat
 }
 
 data class Settings(
@@ -31,14 +34,18 @@ data class Settings(
     override val initialPositions: List<BigDecimal>,
     override val initialVelocities: List<BigDecimal>,
     override val amplitude: Double,
-    override val seed: Long
+    override val seed: Long,
+    override val outputFormat: OutputFormat = OutputFormat.CSV
 ) : SimulationSettings
 
 data class CoupledSettings(
     val basicSettings: Settings,
     val numberOfParticles: Int,
     val angularFrequency: Double,
-    val springLength: Double
+    val springLength: Double,
+    // Stop once the amplitude envelope is steady; null runs until simulationTime
+    val steadyStateTolerance: Double? = null,
+    val steadyStatePeriods: Int = 3
 ) : SimulationSettings by basicSettings {
     // We delegate most properties to basicSettings
     // but can add coupled-specific behavior here
@@ -66,4 +73,23 @@ data class CoupledSettings(
         drivenDerivatives[4] = A * w.pow(4) * sinWt          // snap
         drivenDerivatives[5] = A * w.pow(5) * cosWt          // crackle
     }
+
+    // Same state for the double precision integrators
+    val doubleDrivenDerivatives = DoubleArray(6)
+
+    fun updateDrivenParticle(time: Double) {
+        val A = basicSettings.amplitude
+        val w = angularFrequency
+        val wt = w * time
+
+        val sinWt = kotlin.math.sin(wt)
+        val cosWt = kotlin.math.cos(wt)
+
+        doubleDrivenDerivatives[0] = A * sinWt               // position
+        doubleDrivenDerivatives[1] = A * w * cosWt           // velocity
+        doubleDrivenDerivatives[2] = -A * w.pow(2) * sinWt   // acceleration
+        doubleDrivenDerivatives[3] = -A * w.pow(3) * cosWt   // jerk
+        doubleDrivenDerivatives[4] = A * w.pow(4) * sinWt    // snap
+        doubleDrivenDerivatives[5] = A * w.pow(5) * cosWt    // crackle
+    }
 }
\ No newline at end of file
@@ -1,6 +1,10 @@
 package ar.edu.itba.ss.simulation
 
 import ar.edu.itba.ss.integrables.AlgorithmN
+import ar.edu.itba.ss.integrables.DoubleAlgorithmN
+import ar.edu.itba.ss.integrables.Integrator
+import ar.edu.itba.ss.utils.OutputBlock
+import ar.edu.itba.ss.utils.OutputFormat
 import ch.obermuhlner.math.big.DefaultBigDecimalMath.createLocalMathContext
 import ch.obermuhlner.math.big.kotlin.bigdecimal.div
 import ch.obermuhlner.math.big.kotlin.bigdecimal.plus
@@ -10,36 +14,86 @@ import kotlinx.coroutines.CoroutineDispatcher
 import kotlinx.coroutines.Dispatchers
 import kotlinx.coroutines.channels.Channel
 import kotlinx.coroutines.withContext
+import java.io.File
+import java.io.RandomAccessFile
 import java.math.BigDecimal
+import java.nio.ByteBuffer
+import java.nio.ByteOrder
 
 class Simulation<T : SimulationSettings>(
     private val settings: T,
-    private val output: Channel<String>,
-    private val algorithm: AlgorithmN,
+    private val output: Channel<OutputBlock>,
+    private val algorithm: Integrator,
     val dispatcher: CoroutineDispatcher = Dispatchers.Default
 ) {
     private val logger = KotlinLogging.logger {}
     private var currentTime = BigDecimal.ZERO
 
+    val steadyState: SteadyStateDetector? = when {
+        settings is CoupledSettings && settings.steadyStateTolerance != null -> SteadyStateDetector(
+            angularFrequency = settings.angularFrequency,
+            tolerance = settings.steadyStateTolerance,
+            periods = settings.steadyStatePeriods
+        )
+        else -> null
+    }
+
+    // Byte offset of the steady state placeholders, filled in by writeSteadyState
+    private var steadyStateOffset = 0L
+
     suspend fun simulate() = withContext(dispatcher) {
-        output.send(buildOutputHeader())
-        output.send(buildParametersLine())
+        val parameters = buildOutputHeader() + buildParametersLine()
+        val preamble = if (settings.outputFormat.isBinary) BINARY_MAGIC + parameters else parameters
+        steadyStateOffset = (preamble.length - STEADY_STATE_PLACEHOLDER.length - 1).toLong()
 
         // Header
-        output.send("time,id,r,v\n")
+        val header = if (settings.outputFormat.isBinary) buildRecordHeader(preamble.length) else "step,id,r,v\n"
+        output.send(OutputBlock((preamble + header).toByteArray(Charsets.US_ASCII), records = 0))
+
+        steadyState?.let {
+            val samplesPerPeriod = it.period / settings.deltaT.toDouble()
+            if (samplesPerPeriod < SteadyStateDetector.MIN_SAMPLES_PER_PERIOD) {
+                logger.warn {
+                    "Only ${samplesPerPeriod.toInt()} iterations per driving period, the steady state " +
+                        "amplitude may be underestimated (at least ${SteadyStateDetector.MIN_SAMPLES_PER_PERIOD} recommended)"
+                }
+            }
+        }
 
         createLocalMathContext(34).use {
             var iterationCount = 0
+            var steady = false
 
-            while (currentTime <= settings.simulationTime) {
+            while (currentTime <= settings.simulationTime && !steady) {
                 if (settings is CoupledSettings) {
-                    settings.updateDrivenParticle(currentTime)
+                    when (algorithm) {
+                        is AlgorithmN -> settings.updateDrivenParticle(currentTime)
+                        is DoubleAlgorithmN -> settings.updateDrivenParticle(currentTime.toDouble())
+                    }
                 }
                 algorithm.advanceDeltaT()
                 currentTime += settings.deltaT
 
-                if (iterationCount % 30 == 0) {
-                    saveState()
+                // currentTime == step * dT, the time column is derived from it when reading.
+                // Saving multiples of SAVE_STRIDE makes the grids of runs whose dT differ
+                // by an integer factor nest, so their analytic references can be shared
+                val step = iterationCount + 1L
+                if (step % SAVE_STRIDE == 0L) {
+                    saveState(step = step)
+                }
+
+                // Every iteration and not only the saved ones, so the peaks are not aliased
+                if (steadyState != null) {
+                    steady = when (algorithm) {
+                        is AlgorithmN -> steadyState.update(
+                            time = currentTime.toDouble(),
+                            positions = algorithm.currentPositions
+                        )
+                        is DoubleAlgorithmN -> steadyState.update(
+                            time = currentTime.toDouble(),
+                            positions = algorithm.positions
+                        )
+                    }
                 }
 
                 iterationCount++
@@ -47,20 +101,41 @@ class Simulation<T : SimulationSettings>(
         }
 
 
+        val detector = steadyState
+        if (detector?.detectedTime != null) {
+            logger.info { "Steady state reached at t=${detector.detectedTime}, amplitude ${detector.detectedAmplitude}" }
+        }
         logger.info { "Finished simulation" }
     }
 
+    // Fill the steady_t,steady_A placeholders of an output once it is fully written:
+    // NaN when the simulation reached simulationTime without a steady state
+    fun writeSteadyState(file: File) {
+        val detector = steadyState ?: return
+        val fields = listOf(detector.detectedTime, detector.detectedAmplitude)
+            .joinToString(separator = ",") { (it ?: Double.NaN).toString().padEnd(STEADY_STATE_FIELD_WIDTH) }
+
+        RandomAccessFile(file, "rw").use {
+            it.seek(steadyStateOffset)
+            it.write(fields.toByteArray(Charsets.US_ASCII))
+        }
+    }
+
     private fun buildOutputHeader(): String {
         return when (settings) {
-            is CoupledSettings -> "dT,m,k,y,A,N,w,l,seed\n"
-            else -> "dT,m,k,y,r0,v0,A,seed\n"
+            is CoupledSettings -> if (steadyState != null) {
+                "dT,m,k,y,A,N,w,l,seed,stride,steady_t,steady_A\n"
+            } else {
+                "dT,m,k,y,A,N,w,l,seed,stride\n"
+            }
+            else -> "dT,m,k,y,r0,v0,A,seed,stride\n"
         }
     }
 
     private fun buildParametersLine(): String {
         return when (settings) {
             is CoupledSettings -> listOf(
-                "%.6f".format(settings.basicSettings.deltaT),
+                settings.basicSettings.deltaT.toPlainString(),
                 "%.8f".format(settings.basicSettings.mass),
                 settings.basicSettings.k,
                 settings.basicSettings.gamma,
@@ -68,48 +143,128 @@ class Simulation<T : SimulationSettings>(
                 settings.numberOfParticles,
                 settings.angularFrequency,
                 settings.springLength,
-                settings.basicSettings.seed
-            )
+                settings.basicSettings.seed,
+                SAVE_STRIDE
+            ) + listOfNotNull(steadyState?.let { STEADY_STATE_PLACEHOLDER })
             else -> listOf(
-                "%.6f".format(settings.deltaT),
+                settings.deltaT.toPlainString(),
                 "%.8f".format(settings.mass),
                 settings.k,
                 settings.gamma,
                 "%.8f".format(settings.initialPositions[0]),
                 "%.8f".format(settings.initialVelocities[0]),
                 settings.amplitude,
-                settings.seed
+                settings.seed,
+                SAVE_STRIDE
             )
         }.joinToString(separator = ",", postfix = "\n")
     }
 
-    private suspend fun saveState() {
-
-        // Save driven particle state if coupled system
-        if (settings is CoupledSettings) {
-            output.send(
-                listOf(
-                    currentTime.toPlainString(),
-                    "0", // Particle ID
-                    "%.36f".format(settings.drivenDerivatives[0]),
-                    "%.36f".format(settings.drivenDerivatives[1])
-                ).joinToString(separator = ",", postfix = "\n")
-            )
+    // dtype and particles per record, padded so that records start at a multiple of BINARY_ALIGNMENT
+    private fun buildRecordHeader(offset: Int): String {
+        val line = "dtype,particles\n${settings.outputFormat.dtype},${particleCount()}"
+        val padding = Math.floorMod(-(offset + line.length + 1), BINARY_ALIGNMENT)
+        return line + " ".repeat(padding) + "\n"
+    }
+
+    // Particles per snapshot, driven particle included
+    private fun particleCount(): Int {
+        val integrated = when (algorithm) {
+            is AlgorithmN -> algorithm.currentPositions.size
+            is DoubleAlgorithmN -> algorithm.positions.size
         }
+        return integrated + if (settings is CoupledSettings) 1 else 0
+    }
 
-        algorithm.currentPositions.forEachIndexed { index, position ->
-            output.send(
-                listOf(
-                    currentTime.toPlainString(),
-                    index.inc().toString(), // Particle ID
-                    "%.36f".format(position),
-                    "%.36f".format(algorithm.currentVelocities[index])
-                ).joinToString(separator = ",", postfix = "\n")
-            )
+    // Position and velocity of every saved particle, driven particle first: BigDecimal
+    // or Double depending on the precision. slot counts from 0, the driven particle
+    // has id 0 and the integrated ones ids 1..N
+    private inline fun forEachState(action: (slot: Int, id: Int, position: Number, velocity: Number) -> Unit) {
+        val driven = settings as? CoupledSettings
+        val first = if (driven != null) 1 else 0
+        when (algorithm) {
+            is AlgorithmN -> {
+                driven?.let { action(0, 0, it.drivenDerivatives[0], it.drivenDerivatives[1]) }
+                algorithm.currentPositions.forEachIndexed { index, position ->
+                    action(first + index, index + 1, position, algorithm.currentVelocities[index])
+                }
+            }
+            is DoubleAlgorithmN -> {
+                driven?.let { action(0, 0, it.doubleDrivenDerivatives[0], it.doubleDrivenDerivatives[1]) }
+                for (index in algorithm.positions.indices) {
+                    action(first + index, index + 1, algorithm.positions[index], algorithm.velocities[index])
+                }
+            }
+        }
+    }
+
+    private suspend fun saveState(step: Long) {
+        if (settings.outputFormat.isBinary) {
+            saveRecord(step)
+            return
+        }
+
+        val stepString = step.toString()
+
+        // The whole snapshot is sent as one block
+        val rows = buildString {
+            forEachState { _, id, position, velocity ->
+                append(
+                    listOf(
+                        stepString,
+                        id.toString(), // Particle ID
+                        "%.36f".format(position),
+                        "%.36f".format(velocity)
+                    ).joinToString(separator = ",", postfix = "\n")
+                )
+            }
+        }
+
+        output.send(OutputBlock(rows.toByteArray(Charsets.US_ASCII), records = 1))
+    }
+
+    // Little-endian step, then r and v of every particle in id order
+    private suspend fun saveRecord(step: Long) {
+        val particles = particleCount()
+        val record = ByteBuffer
+            .allocate(Long.SIZE_BYTES + 2 * particles * settings.outputFormat.bytesPerValue)
+            .order(ByteOrder.LITTLE_ENDIAN)
+        record.putLong(0, step)
+
+        forEachState { slot, _, position, velocity ->
+            record.putValue(slot, position)
+            record.putValue(particles + slot, velocity)
+        }
+
+        output.send(OutputBlock(record.array(), records = 1))
+    }
+
+    // index-th value of the record, after the step
+    private fun ByteBuffer.putValue(index: Int, value: Number) {
+        val offset = Long.SIZE_BYTES + index * settings.outputFormat.bytesPerValue
+        val hi = value.toDouble()
+        putDouble(offset, hi)
+        if (settings.outputFormat == OutputFormat.DOUBLE_DOUBLE) {
+            // What hi lost of the exact value: hi + lo keeps ~32 significant digits
+            val lo = if (value is BigDecimal && hi.isFinite()) value.subtract(BigDecimal(hi)).toDouble() else 0.0
+            putDouble(offset + Double.SIZE_BYTES, lo)
         }
     }
 
     companion object {
+        // Only every SAVE_STRIDE-th iteration is written to the output
+        const val SAVE_STRIDE = 30
+
+        // First line of binary outputs, followed by the same parameter lines as a CSV
+        const val BINARY_MAGIC = "TP4BIN,1\n"
+        const val BINARY_ALIGNMENT = 16
+
+        // steady_t and steady_A are written after the run, in place: reserve room for any Double
+        const val STEADY_STATE_FIELD_WIDTH = 24
+        val STEADY_STATE_PLACEHOLDER = listOf("", "").joinToString(separator = ",") {
+            it.padEnd(STEADY_STATE_FIELD_WIDTH)
+        }
+
         fun calculateAcceleration(
             settings: SimulationSettings,
             currentPositions: List<BigDecimal>,
@@ -164,5 +319,58 @@ class Simulation<T : SimulationSettings>(
                 force / mass
             }
         }
+
+        // Double precision version, written into accelerations without allocating
+        fun calculateAcceleration(
+            settings: SimulationSettings,
+            currentPositions: DoubleArray,
+            currentVelocities: DoubleArray,
+            accelerations: DoubleArray
+        ) {
+            require(currentPositions.size == currentVelocities.size && currentPositions.size == accelerations.size) {
+                "Positions, velocities and accelerations must have the same size"
+            }
+
+            when (settings) {
+                is CoupledSettings -> calculateCoupledAcceleration(settings, currentPositions, currentVelocities, accelerations)
+                else -> calculateDampedAcceleration(settings, currentPositions, currentVelocities, accelerations)
+            }
+        }
+
+        private fun calculateDampedAcceleration(
+            settings: SimulationSettings,
+            currentPositions: DoubleArray,
+            currentVelocities: DoubleArray,
+            accelerations: DoubleArray
+        ) {
+            val mass = settings.mass.toDouble()
+            for (i in currentPositions.indices) {
+                accelerations[i] = -(settings.k * currentPositions[i] + settings.gamma * currentVelocities[i]) / mass
+            }
+        }
+
+        private fun calculateCoupledAcceleration(
+            settings: CoupledSettings,
+            currentPositions: DoubleArray,
+            currentVelocities: DoubleArray,
+            accelerations: DoubleArray
+        ) {
+            val k = settings.basicSettings.k
+            val gamma = settings.basicSettings.gamma
+            val mass = settings.basicSettings.mass.toDouble()
+
+            for (i in currentPositions.indices) {
+                // Same neighbors as the BigDecimal version: driven particle on the left of the
+                // first one, a fixed particle at zero on the right of the last one
+                val leftNeighbor = if (i == 0) settings.doubleDrivenDerivatives[0] else currentPositions[i - 1]
+                val rightNeighbor = if (i == currentPositions.lastIndex) 0.0 else currentPositions[i + 1]
+
+                val force = -k * (currentPositions[i] - leftNeighbor) -
+                        k * (currentPositions[i] - rightNeighbor) -
+                        gamma * currentVelocities[i]
+
+                accelerations[i] = force / mass
+            }
+        }
     }
 }
@@ -1,13 +1,14 @@
 package ar.edu.itba.ss.simulation
 
-import ar.edu.itba.ss.integrables.AlgorithmN
+import ar.edu.itba.ss.integrables.Integrator
+import ar.edu.itba.ss.utils.OutputBlock
 import ar.edu.itba.ss.utils.OutputWriter
 import kotlinx.coroutines.Job
 import kotlinx.coroutines.channels.Channel
 
 data class SimulationJob<T : SimulationSettings>(
-    val algorithm: AlgorithmN,
-    val output: Channel<String>,
+    val algorithm: Integrator,
+    val output: Channel<OutputBlock>,
     val writer: OutputWriter,
     val writerJob: Job,
     val simulation: Simulation<T>,
@@ -0,0 +1,83 @@
+package ar.edu.itba.ss.simulation
+
+import java.math.BigDecimal
+import kotlin.math.PI
+import kotlin.math.abs
+
+// Tracks the amplitude envelope of every integrated particle one driving period at a
+// time, as half its max - min, and reports steady state once `periods` successive
+// periods agree within `tolerance` (relative) for all of them.
+// The driven particle is left out, it always spans +-A and would pin the envelope.
+// Particles are compared one by one because the ones next to the driver settle
+// first and would hide the transient still travelling down the chain
+class SteadyStateDetector(
+    angularFrequency: Double,
+    private val tolerance: Double,
+    private val periods: Int,
+) {
+    val period = 2 * PI / angularFrequency
+    private var periodEnd = period
+
+    private var min = DoubleArray(0)
+    private var max = DoubleArray(0)
+    private var previousAmplitudes: DoubleArray? = null
+    private var agreeing = 0
+
+    var detectedTime: Double? = null
+        private set
+    // Largest amplitude along the chain
+    var detectedAmplitude: Double? = null
+        private set
+
+    // Meant to be called every iteration, sparser samples miss the peaks
+    fun update(time: Double, positions: List<BigDecimal>): Boolean {
+        resize(positions.size)
+        positions.forEachIndexed { i, x -> track(i, x.toDouble()) }
+        return completePeriod(time)
+    }
+
+    fun update(time: Double, positions: DoubleArray): Boolean {
+        resize(positions.size)
+        positions.forEachIndexed { i, x -> track(i, x) }
+        return completePeriod(time)
+    }
+
+    private fun completePeriod(time: Double): Boolean {
+        if (time < periodEnd) return false
+
+        val amplitudes = DoubleArray(min.size) { (max[it] - min[it]) / 2 }
+        val previous = previousAmplitudes
+        val agree = previous != null &&
+            amplitudes.indices.all { abs(amplitudes[it] - previous[it]) <= tolerance * abs(amplitudes[it]) }
+        agreeing = if (agree) agreeing + 1 else 0
+
+        previousAmplitudes = amplitudes
+        min.fill(Double.POSITIVE_INFINITY)
+        max.fill(Double.NEGATIVE_INFINITY)
+        while (periodEnd <= time) periodEnd += period
+
+        if (agreeing >= periods) {
+            detectedTime = time
+            detectedAmplitude = amplitudes.max()
+            return true
+        }
+        return false
+    }
+
+    private fun resize(size: Int) {
+        if (min.size == size) return
+        min = DoubleArray(size) { Double.POSITIVE_INFINITY }
+        max = DoubleArray(size) { Double.NEGATIVE_INFINITY }
+    }
+
+    private fun track(i: Int, x: Double) {
+        if (x < min[i]) min[i] = x
+        if (x > max[i]) max[i] = x
+    }
+
+    companion object {
+        // Below this the sampled max - min underestimates the envelope by more
+        // than 1 - cos(PI / 20), about 1.2%
+        const val MIN_SAMPLES_PER_PERIOD = 20
+    }
+}
@@ -0,0 +1,14 @@
+package ar.edu.itba.ss.utils
+
+// Binary formats store every snapshot as one fixed-size record after a text header,
+// with each value as a float64 or as a double-double (hi, lo) pair of float64
+enum class OutputFormat(val extension: String, val dtype: String?, val bytesPerValue: Int) {
+    CSV(".csv", null, 0),
+    FLOAT64(".bin", "float64", 8),
+    DOUBLE_DOUBLE(".bin", "double-double", 16);
+
+    val isBinary: Boolean
+        get() = dtype != null
+
+    override fun toString() = name.lowercase().replace("_", "-")
+}
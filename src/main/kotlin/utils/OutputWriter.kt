@@ -1,31 +1,48 @@
 package ar.edu.itba.ss.utils
 
 import ar.edu.itba.ss.simulation.Settings
+import io.github.oshai.kotlinlogging.KotlinLogging
 import kotlinx.coroutines.*
 import kotlinx.coroutines.channels.Channel
-import java.util.concurrent.atomic.AtomicBoolean
+
+// Bytes to append to an output, holding `records` whole snapshots (0 for the header)
+class OutputBlock(val bytes: ByteArray, val records: Int)
 
 class OutputWriter(
     private val settings: Settings,
-    private val channel: Channel<String>,
+    private val channel: Channel<OutputBlock>,
+    private val bufferSize: Int = DEFAULT_BUFFER_SIZE,
     private val dispatcher: CoroutineDispatcher = Dispatchers.IO
 ) {
-    private var running = AtomicBoolean(false)
+    private val logger = KotlinLogging.logger {}
+
+    var bytesWritten = 0L
+        private set
+    var recordsWritten = 0L
+        private set
 
-    @OptIn(ExperimentalCoroutinesApi::class)
+    // Suspends while the channel is empty and returns once it is closed and drained
     suspend fun start() = withContext(dispatcher) {
-        running.set(true)
-        val writer = settings.outputFile.bufferedWriter()
-        while (running.get() || !channel.isEmpty) {
-            val toWrite = channel.tryReceive().getOrNull() ?: continue
-            writer.write(toWrite)
-            yield()
+        settings.outputFile.outputStream().buffered(bufferSize).use { stream ->
+            for (block in channel) {
+                stream.write(block.bytes)
+                bytesWritten += block.bytes.size
+                recordsWritten += block.records
+            }
         }
 
-        writer.close()
+        logger.info { "Wrote $recordsWritten records, $bytesWritten bytes to ${settings.outputFile}" }
     }
 
+    // Nothing can be sent afterwards: start returns once what was sent is written
     fun requestStop() {
-        running.set(false)
+        channel.close()
+    }
+
+    companion object {
+        const val DEFAULT_BUFFER_SIZE = 1 shl 20
+
+        // Blocks queued before the simulation waits for the writer
+        const val CHANNEL_CAPACITY = 64
     }
-}
\ No newline at end of file
+}
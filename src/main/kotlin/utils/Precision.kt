@@ -0,0 +1,9 @@
+package ar.edu.itba.ss.utils
+
+// BIG_DECIMAL integrates with 34 significant digits, DOUBLE on preallocated DoubleArrays
+enum class Precision {
+    BIG_DECIMAL,
+    DOUBLE;
+
+    override fun toString() = name.lowercase().replace("_", "")
+}
@@ -4,6 +4,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 import argparse
 
+from reductions import downsample_for_plot, peak_to_peak_per_time, stream_snapshot_extrema
+from profiling import add_profile_arguments, enable_from_args, profiled
+from theme import figure_pixels
+
 PARTICLE_RADIUS = 0.0005
 BOARD_LEN = 1
 NUMBER_OF_PARTICLES = 1000
@@ -14,26 +18,16 @@ This function should plot the amplitude of the system over time
 
 """
 def plot_amplitudes(df: pd.DataFrame):
-    df.set_index("time", inplace=True)
-
-    times = df.index.unique()
-
-    amplitudes = []
-    max_amplitude = -np.inf
-
-    for t in times:
-        time_data = df.loc[t]
+    plot_peak_to_peak(peak_to_peak_per_time(df, 'r'))
 
-        r_max = time_data['r'].max()
-        r_min = time_data['r'].min()
-        amplitude = r_max - r_min
-        amplitudes.append(amplitude)
+@profiled("plot")
+def plot_peak_to_peak(peak_to_peak: pd.Series):
+    times = peak_to_peak.index
+    amplitudes = peak_to_peak.to_numpy()
+    max_amplitude = amplitudes.max() if len(amplitudes) else -np.inf
 
-        if amplitude > max_amplitude:
-            max_amplitude = amplitude
-
-    plt.figure(figsize=(10, 6))
-    plt.plot(times, amplitudes, 'b-', label='System amplitude')
+    fig = plt.figure(figsize=(10, 6))
+    plt.plot(*downsample_for_plot(times, amplitudes, figure_pixels(fig)), 'b-', label='System amplitude')
     plt.xlabel('Time [s]')
     plt.ylabel('Amplitude [m]')
     plt.grid(True)
@@ -44,6 +38,13 @@ def plot_amplitudes(df: pd.DataFrame):
 
     print(f"Max amplitude registry: {max_amplitude:.6f}")
 
+def main(output_file: str):
+    # Only one batch of snapshots is in memory at a time
+    extrema = stream_snapshot_extrema(f"./output/{output_file}", 'r')
+
+    # Plot the amplitudes
+    plot_peak_to_peak(extrema.peak_to_peak_series())
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Parse Kotlin output file and generate animations and plots."
@@ -52,20 +53,9 @@ if __name__ == "__main__":
         "-f", "--output_file", type=str, required=True, help="Output file to animate"
     )
 
-    args = parser.parse_args()
-
-    output_file = args.output_file
-
+    add_profile_arguments(parser)
 
-    df = pd.read_csv(
-        f"./output/{output_file}",
-        sep=",",
-        header=0,  # use first row as header
-        index_col=None,  # don't use any column as index
-        skiprows=2,
-    )  # number of rows to skip
-
-    print(df)
+    args = parser.parse_args()
+    enable_from_args(args)
 
-    # Plot the amplitudes
-    plot_amplitudes(df)
\ No newline at end of file
+    main(args.output_file)
\ No newline at end of file
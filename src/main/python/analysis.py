@@ -0,0 +1,153 @@
+"""
+Single entry point for the analysis scripts:
+
+    python analysis.py mse --beeman A.csv B.csv --no-plot
+    python analysis.py algorithms --verlet A.csv --beeman B.csv
+    python analysis.py amplitude -f A.csv
+    python analysis.py resonance --plot w-and-k
+    python analysis.py animate -f A.csv -j 4
+    python analysis.py precision --reference-dir bigdecimal --candidate-dir double
+
+Scripts are imported by the subcommand that runs them, and the functions
+below can be called directly to run several commands in one process.
+"""
+import argparse
+import sys
+from typing import Optional
+
+from profiling import add_profile_arguments, enable_from_args
+
+OUTPUT_DIR = "./output"
+RESONANCE_PLOTS = ("w-and-k", "w", "w0", "comparison")
+# Same defaults as mse_analysis.DEFAULT_CHUNK_SIZE and
+# precision_comparison.DEFAULT_TOLERANCE, without importing them
+DEFAULT_CHUNK_SIZE = 1_000_000
+DEFAULT_TOLERANCE = 1e-6
+
+
+def mse(
+    euler: Optional[list[str]] = None,
+    verlet: Optional[list[str]] = None,
+    beeman: Optional[list[str]] = None,
+    gpc: Optional[list[str]] = None,
+    streaming: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    plot: bool = True,
+):
+    """MSE against the analytic solution per method and dT, as a DataFrame."""
+    import mse_analysis
+
+    return mse_analysis.main(euler, verlet, beeman, gpc, streaming, chunk_size, plot)
+
+
+def algorithms(
+    euler: Optional[str] = None,
+    verlet: Optional[str] = None,
+    beeman: Optional[str] = None,
+    gpc: Optional[str] = None,
+):
+    """Trajectories of the damped oscillator against the analytic solution."""
+    import graphics
+
+    graphics.main(euler, verlet, beeman, gpc)
+
+
+def amplitude(output_file: str):
+    """Peak-to-peak amplitude over time of one coupled output."""
+    import amplitude_per_time
+
+    amplitude_per_time.main(output_file)
+
+
+def resonance(plot: str = "w-and-k", folder: str = OUTPUT_DIR, workers: Optional[int] = None):
+    """Steady-state amplitude plots over the w- outputs of folder."""
+    import graphics_2
+
+    if plot == "w-and-k":
+        graphics_2.plot_steady_amplitude_vs_w_and_k(folder, workers)
+    elif plot == "w":
+        graphics_2.plot_steady_amplitude_vs_w(folder, workers)
+    elif plot == "w0":
+        graphics_2.plot_w0_vs_k(folder, workers)
+    elif plot == "comparison":
+        graphics_2.plot_amplitudes_comparison(workers)
+    else:
+        raise ValueError(f"Unknown resonance plot {plot}, expected one of {RESONANCE_PLOTS}")
+
+
+def animate(output_file: str, workers: int = 1):
+    """MP4 of a coupled output, written to ./animations."""
+    import animation_2
+
+    animation_2.main(output_file, workers)
+
+
+def precision(reference_dir: str, candidate_dir: str, tolerance: float = DEFAULT_TOLERANCE) -> bool:
+    """Differences between --precision double outputs and BigDecimal ones, True if within tolerance."""
+    import precision_comparison
+
+    return precision_comparison.main(reference_dir, candidate_dir, tolerance)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Analysis of the Kotlin simulation outputs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    # --profile is accepted by every subcommand
+    common = argparse.ArgumentParser(add_help=False)
+    add_profile_arguments(common)
+
+    def add_parser(name: str, help_text: str) -> argparse.ArgumentParser:
+        return commands.add_parser(name, help=help_text, parents=[common])
+
+    mse_command = add_parser("mse", "MSE vs dT of damped oscillator outputs")
+    for method in ("euler", "verlet", "beeman", "gpc"):
+        mse_command.add_argument(f"--{method}", nargs="+", help=f"{method} outputs, relative to ./output")
+    mse_command.add_argument("--streaming", action="store_true", help="Read the outputs in blocks")
+    mse_command.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per block with --streaming")
+    mse_command.add_argument("--no-plot", action="store_true", help="Only print the MSE table")
+
+    algorithms_command = add_parser("algorithms", "Damped oscillator trajectories vs the analytic solution")
+    for method in ("euler", "verlet", "beeman", "gpc"):
+        algorithms_command.add_argument(f"--{method}", help=f"{method} output, relative to ./output")
+
+    amplitude_command = add_parser("amplitude", "Amplitude over time of a coupled output")
+    amplitude_command.add_argument("-f", "--output_file", required=True, help="Output file, relative to ./output")
+
+    resonance_command = add_parser("resonance", "Steady-state amplitude vs w and k")
+    resonance_command.add_argument("--plot", choices=RESONANCE_PLOTS, default="w-and-k")
+    resonance_command.add_argument("--folder", default=OUTPUT_DIR)
+    resonance_command.add_argument("--workers", type=int, default=None)
+
+    animate_command = add_parser("animate", "Animation of a coupled output")
+    animate_command.add_argument("-f", "--output_file", required=True, help="Output file, relative to ./output")
+    animate_command.add_argument("-j", "--workers", type=int, default=1)
+
+    precision_command = add_parser("precision", "Double precision outputs vs BigDecimal ones")
+    precision_command.add_argument("--reference-dir", required=True, help="Outputs of --precision bigdecimal")
+    precision_command.add_argument("--candidate-dir", required=True, help="Outputs of --precision double")
+    precision_command.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None):
+    args = build_parser().parse_args(argv)
+    enable_from_args(args)
+
+    if args.command == "mse":
+        mse(args.euler, args.verlet, args.beeman, args.gpc, args.streaming, args.chunk_size, not args.no_plot)
+    elif args.command == "algorithms":
+        algorithms(args.euler, args.verlet, args.beeman, args.gpc)
+    elif args.command == "amplitude":
+        amplitude(args.output_file)
+    elif args.command == "resonance":
+        resonance(args.plot, args.folder, args.workers)
+    elif args.command == "animate":
+        animate(args.output_file, args.workers)
+    elif args.command == "precision":
+        if not precision(args.reference_dir, args.candidate_dir, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
 import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -8,6 +12,10 @@ import argparse
 from typing import Union
 import logging
 
+from loader import block_starts
+from snapshot_index import load_index, read_snapshots
+from profiling import add_profile_arguments, enable_from_args, profiled
+
 plt.rcParams.update({
     'font.size': 20,
     'axes.titlesize': 22,
@@ -17,110 +25,202 @@ plt.rcParams.update({
     'legend.fontsize': 20
 })
 
-parser = argparse.ArgumentParser(
-    description="Parse Kotlin output file and generate animations and plots."
-)
-parser.add_argument(
-    "-f", "--output_file", type=str, required=True, help="Output file to animate"
-)
-
-args = parser.parse_args()
-
 MAX_DESIRED_FPS = 60
 
 PARTICLE_RADIUS = 0.00005
 BOARD_LEN = 1
 L0 = 0.001
-output_file = args.output_file
-
-df = pd.read_csv(
-    f"./output/{output_file}",
-    sep=",",  # separator (default is comma)
-    header=0,  # use first row as header
-    index_col=None,  # don't use any column as index
-    skiprows=2,
-)  # number of rows to skip
-
-# Set Time as index
-df.set_index("time", inplace=True)
-
-print(df)
-
 
-# Get unique times
-times = df.index.unique()
-
-# Calculate interval to make animation last exactly 15 seconds
+# Calculate interval to make animation last exactly TOTAL_DURATION seconds
 TOTAL_DURATION = 12  # seconds
-interval = (TOTAL_DURATION * 1000) / len(times)  # convert to milliseconds
-
-# Create figure and axis
-fig, ax = plt.subplots(figsize=(12, 10))
-fig.subplots_adjust(left=0.15)
-ax.set_xlim(-0.1, BOARD_LEN + 0.1)
-ax.set_ylim(-1.1e-2, 1.1e-2)
-ax.set_xlabel("X Position [m]")
-ax.set_ylabel("Y Position [m]")
-
-
-# Initialize list to store circle patches
-circles = []
-board_circle = None
-obstacle_circle = None
-
-
-def init():
-    # Clear any existing circles
-    for circle in circles:
-        circle.remove()
-    circles.clear()
-    return
-
-
-def update(frame):
-    # Get data for current time
-    current_time = times[frame]
-    time_data = df.loc[current_time]
-
-    # Clear existing particle circles
-    for circle in circles:
-        circle.remove()
-    circles.clear()
-
-    # Create new circles for each particle
-    for _, particle in time_data.iterrows():
-        circle = patches.Circle(
-            (particle["id"]*L0, particle["r"]),
+DPI = 100
+# smaller file, faster encode
+FFMPEG_ARGS = ["-crf", "26", "-preset", "veryfast"]
+
+
+@profiled("compute")
+def build_frames(df: pd.DataFrame):
+    """
+    Dense frame data: (times, particle x positions, (T, N) array of r).
+    Every snapshot must hold the same particles, as the simulation writes them.
+    """
+    order = np.lexsort((df["id"].to_numpy(), df["time"].to_numpy()))
+    time = df["time"].to_numpy()[order]
+    ids = df["id"].to_numpy()[order]
+    r = df["r"].to_numpy(dtype=np.float64)[order]
+
+    starts = block_starts(time)
+    counts = np.diff(np.append(starts, len(time)))
+    if len(starts) and np.any(counts != counts[0]):
+        raise ValueError("Every snapshot must have the same number of particles")
+
+    n = counts[0] if len(starts) else 0
+    frames = r.reshape(len(starts), n)
+    return time[starts], ids[:n] * L0, frames
+
+
+def animate(times: np.ndarray, x_positions: np.ndarray, frames: np.ndarray, interval: float):
+    # Create figure and axis
+    fig, ax = plt.subplots(figsize=(12, 10))
+    fig.subplots_adjust(left=0.15)
+    ax.set_xlim(-0.1, BOARD_LEN + 0.1)
+    ax.set_ylim(-1.1e-2, 1.1e-2)
+    ax.set_xlabel("X Position [m]")
+    ax.set_ylabel("Y Position [m]")
+
+    # One circle per particle, created once and moved every frame instead of
+    # being removed and re-added. Same patches in the same (id) order, so every
+    # frame is drawn exactly as before
+    circles = [
+        patches.Circle(
+            (x, 0),
             radius=PARTICLE_RADIUS,
             fill=True,
             color="blue",
             alpha=0.6,
+            visible=False,
         )
+        for x in x_positions
+    ]
+    for circle in circles:
         ax.add_patch(circle)
-        circles.append(circle)
-
-    # Update title with current time
-    ax.set_title(f"Time: {current_time:.2f}")
-
-    return circles
-
-
-# Create animation
-ani = FuncAnimation(
-    fig, update, frames=len(times), init_func=init, blit=False, interval=interval
-)
-
-# Save the animation
-print("Saving animation...")
-os.makedirs("./animations", exist_ok=True)
-ani.save(
-    f"./animations/{output_file}-simulation.mp4",
-    writer="ffmpeg",
-    fps=len(times) / TOTAL_DURATION,
-    dpi=100,
-    extra_args=["-crf", "26", "-preset", "veryfast"],
-)  # smaller file, faster encode
-print("Animation saved successfully!")
-
-# Close the figure to free memory
-plt.close(fig)
+    title = ax.set_title("")
+
+    def init():
+        for circle in circles:
+            circle.set_visible(False)
+        return circles + [title]
+
+    def update(frame):
+        for circle, x, r in zip(circles, x_positions, frames[frame]):
+            circle.set_center((x, r))
+            circle.set_visible(True)
+
+        # Update title with current time
+        title.set_text(f"Time: {times[frame]:.2f}")
+
+        return circles + [title]
+
+    # Create animation
+    ani = FuncAnimation(
+        fig, update, frames=len(times), init_func=init, blit=True, interval=interval
+    )
+    return fig, ani
+
+
+@profiled("save", file="path")
+def render(path: str, times: np.ndarray, x_positions: np.ndarray, frames: np.ndarray, fps: float):
+    """Encode frames into one video at path, at the given frame rate."""
+    fig, ani = animate(times, x_positions, frames, interval=1000 / fps)
+    try:
+        ani.save(path, writer="ffmpeg", fps=fps, dpi=DPI, extra_args=FFMPEG_ARGS)
+    finally:
+        # Close the figure to free memory
+        plt.close(fig)
+    return path
+
+
+def concat_segments(segments: list[str], path: str):
+    """Join videos encoded with the same settings without re-encoding them."""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as listing:
+        for segment in segments:
+            listing.write(f"file '{os.path.abspath(segment)}'\n")
+    try:
+        subprocess.run(
+            [
+                plt.rcParams["animation.ffmpeg_path"],
+                "-y", "-loglevel", "error",
+                "-f", "concat", "-safe", "0",
+                "-i", listing.name,
+                "-c", "copy",
+                path,
+            ],
+            check=True,
+        )
+    finally:
+        os.remove(listing.name)
+
+
+@profiled("save", file="path")
+def render_parallel(
+    path: str,
+    times: np.ndarray,
+    x_positions: np.ndarray,
+    frames: np.ndarray,
+    fps: float,
+    workers: int,
+):
+    """
+    render() split over workers processes: the time axis is cut into
+    contiguous frame ranges, each encoded to its own segment, and the
+    segments are concatenated losslessly into path.
+    """
+    ranges = [r for r in np.array_split(np.arange(len(times)), workers) if len(r)]
+    if len(ranges) <= 1:
+        return render(path, times, x_positions, frames, fps)
+
+    segments_dir = tempfile.mkdtemp(prefix="segments-", dir=os.path.dirname(path) or ".")
+    try:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [
+                executor.submit(
+                    render,
+                    os.path.join(segments_dir, f"{i:04d}.mp4"),
+                    times[r[0]:r[-1] + 1],
+                    x_positions,
+                    frames[r[0]:r[-1] + 1],
+                    fps,
+                )
+                for i, r in enumerate(ranges)
+            ]
+            segments = [future.result() for future in futures]
+        concat_segments(segments, path)
+    finally:
+        shutil.rmtree(segments_dir, ignore_errors=True)
+    return path
+
+
+def main(output_file: str, workers: int = 1):
+    filepath = f"./output/{output_file}"
+
+    # Only every k-th snapshot is needed to stay under MAX_DESIRED_FPS; the
+    # index lets the rest of the file go unread
+    index = load_index(filepath)
+    max_frames = TOTAL_DURATION * MAX_DESIRED_FPS
+    every = max(1, -(-len(index) // max_frames))
+    df = read_snapshots(filepath, np.arange(0, len(index), every), index)
+
+    print(df)
+
+    times, x_positions, frames = build_frames(df)
+    del df
+
+    # Save the animation
+    print("Saving animation...")
+    os.makedirs("./animations", exist_ok=True)
+    path = f"./animations/{output_file}-simulation.mp4"
+    fps = len(times) / TOTAL_DURATION
+    if workers > 1:
+        render_parallel(path, times, x_positions, frames, fps, workers)
+    else:
+        render(path, times, x_positions, frames, fps)
+    print("Animation saved successfully!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Parse Kotlin output file and generate animations and plots."
+    )
+    parser.add_argument(
+        "-f", "--output_file", type=str, required=True, help="Output file to animate"
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=1,
+        help="Render contiguous frame ranges in this many processes and concatenate them",
+    )
+
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+    enable_from_args(args)
+    main(args.output_file, args.workers)
@@ -0,0 +1,315 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from integrators import (
+    COUPLED_NAMES,
+    DAMPED_NAMES,
+    SAVE_STRIDE,
+    coupled_file_name,
+    coupled_settings,
+    damped_file_name,
+    damped_settings,
+)
+from synthetic import rows_per_snapshot, saved_steps, write_output
+
+DATA_DIR = "./benchmarks/data"
+RESULTS_DIR = "./benchmarks"
+SEED = 1
+# Inputs are shortened (final time cut) to stay under this many rows
+MAX_ROWS = 2_000_000
+NOISE = 1e-12
+
+SIZES = {
+    "quick": {"particles": [1, 100], "delta_t": [1e-2, 1e-3]},
+    "full": {"particles": [1, 100, 1000], "delta_t": [1e-2, 1e-3, 1e-4, 1e-5, 1e-6]},
+}
+
+# Damped oscillator of the TP, a single particle
+DAMPED = dict(mass=70.0, k=10000.0, gamma=100.0, amplitude=1.0, r0=1.0, final_time=5.0)
+# Coupled chain of run_system2.sh
+COUPLED = dict(mass=0.00021, k=102.3, gamma=0.0003, amplitude=0.01, w=1.737, spring_length=0.001, final_time=15.0)
+
+
+@dataclass(frozen=True)
+class BenchmarkInput:
+    kind: str  # "damped" for one particle, "coupled" otherwise
+    particles: int
+    delta_t: float
+    path: str
+    rows: int
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    kind: str
+    particles: int
+    delta_t: float
+    rows: int
+    repeat: int
+    wall_time: float  # median [s]
+    best_time: float  # [s]
+    rows_per_second: float
+    peak_memory: int  # [bytes], Python and NumPy allocations
+
+
+def _input_settings(particles: int, delta_t: float):
+    if particles == 1:
+        p = DAMPED
+        settings = damped_settings(
+            mass=p["mass"], k=p["k"], gamma=p["gamma"], final_time=p["final_time"],
+            delta_t=delta_t, amplitude=p["amplitude"], seed=SEED, r0=p["r0"],
+        )
+        return settings, damped_file_name(DAMPED_NAMES["beeman"], settings)
+    p = COUPLED
+    settings = coupled_settings(
+        p["w"], number_of_particles=particles, spring_length=p["spring_length"],
+        mass=p["mass"], k=p["k"], gamma=p["gamma"], final_time=p["final_time"],
+        delta_t=delta_t, amplitude=p["amplitude"], seed=SEED,
+    )
+    # Same name pattern as the simulation outputs, so w- and k- can be extracted
+    return settings, coupled_file_name(COUPLED_NAMES["beeman"], settings)
+
+
+def benchmark_input(particles: int, delta_t: float, data_dir: str = DATA_DIR) -> BenchmarkInput:
+    """Synthetic Kotlin-format output, generated once and reused by later runs."""
+    settings, name = _input_settings(particles, delta_t)
+    snapshots = min(len(saved_steps(settings)), max(1, MAX_ROWS // rows_per_snapshot(settings)))
+    # Shortened so that it has at most MAX_ROWS rows
+    settings.simulation_time = min(settings.simulation_time, snapshots * SAVE_STRIDE * delta_t)
+
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, name)
+    rows = len(saved_steps(settings)) * rows_per_snapshot(settings)
+    if not os.path.exists(path):
+        # Noise stands for the integration error, the MSE would be 0 otherwise
+        write_output(settings, path, noise=NOISE)
+    kind = "damped" if particles == 1 else "coupled"
+    return BenchmarkInput(kind=kind, particles=particles, delta_t=delta_t, path=path, rows=rows)
+
+
+# Benchmarks: prepare(input) does the untimed setup and returns the timed call.
+# A call that only touches part of the input sets run.rows to what it processes
+
+
+def _read_csv(extended: bool):
+    def prepare(data: BenchmarkInput):
+        from loader import read_csv
+
+        return lambda: read_csv(data.path, extended=extended)
+
+    return prepare
+
+
+def _calculate_oscilator(data: BenchmarkInput):
+    from loader import read_csv
+    from mse_analysis import calculate_oscilator
+
+    output = read_csv(data.path, extended=True)
+    return lambda: calculate_oscilator(output)
+
+
+def _calculate_mse(data: BenchmarkInput):
+    from loader import read_csv
+    from mse_analysis import ANALYTIC_REFERENCES, calculate_mse
+
+    output = read_csv(data.path, extended=True)
+
+    def run():
+        # Measure the full computation, not a cache hit
+        ANALYTIC_REFERENCES.clear()
+        return calculate_mse(output)
+
+    return run
+
+
+def _compute_amplitudes(data: BenchmarkInput):
+    from graphics_2 import compute_amplitudes
+    from loader import read_trajectory
+
+    # compute_amplitudes reduces the y column
+    df = read_trajectory(data.path).rename(columns={"r": "y"})
+    return lambda: compute_amplitudes(df)
+
+
+def _summarize_run(data: BenchmarkInput):
+    from sweep import summarize_run
+
+    folder, file = os.path.split(data.path)
+    return lambda: summarize_run(folder, file)
+
+
+def _animation_frame(data: BenchmarkInput):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from animation_2 import animate, build_frames
+    from loader import read_trajectory
+
+    times, x_positions, frames = build_frames(read_trajectory(data.path))
+    fig, _ = animate(times, x_positions, frames, interval=1000 / 60)
+
+    def run():
+        fig.canvas.draw()
+
+    # One frame draws one snapshot, not the whole file
+    run.rows = frames.shape[1]
+    run.close = lambda: plt.close(fig)
+    return run
+
+
+# name -> (input kind, prepare)
+BENCHMARKS: dict[str, tuple[str, Callable]] = {
+    "read_csv": ("damped", _read_csv(extended=False)),
+    "read_csv_extended": ("damped", _read_csv(extended=True)),
+    "calculate_oscilator": ("damped", _calculate_oscilator),
+    "calculate_mse": ("damped", _calculate_mse),
+    "compute_amplitudes": ("coupled", _compute_amplitudes),
+    "summarize_run": ("coupled", _summarize_run),
+    "animation_frame": ("coupled", _animation_frame),
+}
+
+
+def measure(name: str, data: BenchmarkInput, repeat: int) -> BenchmarkResult:
+    """Median and best wall time over repeat calls, then peak memory of one more."""
+    run = BENCHMARKS[name][1](data)
+    times = []
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - start)
+
+            # Traced separately: tracemalloc slows the timed calls down
+            tracemalloc.start()
+            try:
+                run()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    finally:
+        getattr(run, "close", lambda: None)()
+
+    wall_time = statistics.median(times)
+    rows = getattr(run, "rows", data.rows)
+    return BenchmarkResult(
+        name=name,
+        kind=data.kind,
+        particles=data.particles,
+        delta_t=data.delta_t,
+        rows=rows,
+        repeat=repeat,
+        wall_time=wall_time,
+        best_time=min(times),
+        rows_per_second=rows / wall_time if wall_time > 0 else float("inf"),
+        peak_memory=peak,
+    )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    size: str = "quick",
+    names: Optional[list[str]] = None,
+    repeat: int = 3,
+    data_dir: str = DATA_DIR,
+) -> dict:
+    names = names or list(BENCHMARKS)
+    results = []
+    for particles in SIZES[size]["particles"]:
+        for delta_t in SIZES[size]["delta_t"]:
+            kind = "damped" if particles == 1 else "coupled"
+            selected = [name for name in names if BENCHMARKS[name][0] == kind]
+            if not selected:
+                continue
+            data = benchmark_input(particles, delta_t, data_dir)
+            for name in selected:
+                result = measure(name, data, repeat)
+                print(
+                    f"{name:<22} N={particles:<5} dT={delta_t:<7.0e} rows={result.rows:<9} "
+                    f"{result.wall_time * 1e3:10.2f} ms {result.rows_per_second:14.0f} rows/s "
+                    f"{result.peak_memory / 2**20:9.1f} MiB"
+                )
+                results.append(result)
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "size": size,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": [asdict(result) for result in results],
+    }
+
+
+def compare(baseline_path: str, current_path: str):
+    """Wall time and peak memory of current relative to baseline, per benchmark."""
+    def load(path):
+        with open(path) as file:
+            report = json.load(file)
+        return {
+            (r["name"], r["particles"], r["delta_t"]): r for r in report["results"]
+        }
+
+    baseline, current = load(baseline_path), load(current_path)
+    print(f"{'benchmark':<22} {'N':>5} {'dT':>7} {'time':>8} {'memory':>8}")
+    for key in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[key], current[key]
+        name, particles, delta_t = key
+        print(
+            f"{name:<22} {particles:>5} {delta_t:>7.0e} "
+            f"{after['wall_time'] / before['wall_time']:>7.2f}x "
+            f"{after['peak_memory'] / max(before['peak_memory'], 1):>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the analysis hot paths over synthetic outputs and save the results as JSON."
+    )
+    parser.add_argument("--size", choices=SIZES, default="quick", help="quick: N<=100, dT>=1e-3; full: every N and dT")
+    parser.add_argument("--benchmark", action="append", choices=BENCHMARKS, help="Run only these benchmarks (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Where the synthetic inputs are kept between runs")
+    parser.add_argument("--output", help="JSON file for the results (default: ./benchmarks/<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two saved result files")
+
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        report = run_benchmarks(args.size, args.benchmark, args.repeat, args.data_dir)
+        output = args.output or os.path.join(
+            RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+        )
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results saved to {output}")
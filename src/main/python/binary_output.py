@@ -0,0 +1,145 @@
+"""
+Reader of the binary outputs of the Kotlin simulation (--output-format
+float64 or double-double). After a text header, every saved snapshot is one
+fixed-size little-endian record:
+
+    step (int64), r of every particle, v of every particle
+
+with particles in id order and each value a float64 or a double-double
+(hi, lo) pair of float64. Ids are as in the CSV outputs: 0 (the driven
+particle) to N - 1 for the coupled chain, and 1 for the damped oscillator.
+The file is memory-mapped, so r and v are (T, N) views of it and nothing is
+read until it is used.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from double_double import DoubleDouble
+from loader import BINARY_MAGIC, time_from_steps
+from profiling import profiled
+
+# Values per dtype: a float64, or the hi and lo parts of a double-double
+VALUE_PARTS = {"float64": 1, "double-double": 2}
+
+
+@dataclass
+class BinaryOutput:
+    # Parameters header, {name: value} strings as in read_header
+    header: dict[str, str]
+    dtype: str
+    step: np.ndarray  # (T,)
+    r: np.ndarray  # (T, N), the hi parts for double-double
+    v: np.ndarray
+    # Low-order parts, only present for double-double outputs
+    r_lo: Optional[np.ndarray] = None
+    v_lo: Optional[np.ndarray] = None
+    path: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.step)
+
+    @property
+    def particles(self) -> int:
+        return self.r.shape[1]
+
+    @property
+    def delta_t(self) -> Decimal:
+        return Decimal(self.header["dT"])
+
+    @property
+    def time(self) -> np.ndarray:
+        return time_from_steps(self.step, self.delta_t).hi
+
+    @property
+    def r_extended(self) -> DoubleDouble:
+        if self.r_lo is None:
+            return DoubleDouble.from_float(self.r)
+        return DoubleDouble(hi=self.r, lo=self.r_lo)
+
+    @property
+    def v_extended(self) -> DoubleDouble:
+        if self.v_lo is None:
+            return DoubleDouble.from_float(self.v)
+        return DoubleDouble(hi=self.v, lo=self.v_lo)
+
+    @property
+    def ids(self) -> np.ndarray:
+        # Only the coupled chain has a driven particle, id 0
+        if "N" in self.header:
+            return np.arange(self.particles)
+        return np.arange(1, self.particles + 1)
+
+    def trajectory(self, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+        """
+        The time,step,id,r,v table read_trajectory returns for a CSV output (a
+        copy), of the snapshots start to stop.
+        """
+        step, r, v = self.step[start:stop], self.r[start:stop], self.v[start:stop]
+        snapshots, particles = r.shape
+        return pd.DataFrame(
+            {
+                "time": np.repeat(time_from_steps(step, self.delta_t).hi, particles),
+                "step": np.repeat(step, particles),
+                "id": np.tile(self.ids, snapshots),
+                "r": r.ravel(),
+                "v": v.ravel(),
+            }
+        )
+
+
+def is_binary_output(filepath: str) -> bool:
+    with open(filepath, "rb") as file:
+        return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def record_dtype(dtype: str, particles: int) -> np.dtype:
+    if dtype not in VALUE_PARTS:
+        raise ValueError(f"Unknown binary dtype {dtype}, expected one of {tuple(VALUE_PARTS)}")
+    shape = (particles,) if VALUE_PARTS[dtype] == 1 else (particles, VALUE_PARTS[dtype])
+    return np.dtype([("step", "<i8"), ("r", "<f8", shape), ("v", "<f8", shape)])
+
+
+@profiled("load", file="filepath")
+def read_binary(filepath: str) -> BinaryOutput:
+    """
+    Memory-map a binary output. A last record cut short, as left by an
+    interrupted run, is ignored.
+    """
+    with open(filepath, "rb") as file:
+        if file.readline() != BINARY_MAGIC:
+            raise ValueError(f"{filepath} is not a binary output")
+        lines = [file.readline().decode("ascii") for _ in range(4)]
+        data_offset = file.tell()
+        file.seek(0, 2)
+        size = file.tell()
+
+    names, values, layout_names, layout_values = (line.split(",") for line in lines)
+    # Fields patched after the run (steady_t, steady_A) are space padded
+    header = dict(zip((name.strip() for name in names), (value.strip() for value in values)))
+    layout = dict(zip((name.strip() for name in layout_names), (value.strip() for value in layout_values)))
+
+    dtype = layout["dtype"]
+    record = record_dtype(dtype, int(layout["particles"]))
+    snapshots = (size - data_offset) // record.itemsize
+    if snapshots == 0:
+        records = np.zeros(0, dtype=record)
+    else:
+        records = np.memmap(filepath, dtype=record, mode="r", offset=data_offset, shape=(snapshots,))
+
+    r, v = records["r"], records["v"]
+    if VALUE_PARTS[dtype] == 1:
+        return BinaryOutput(header=header, dtype=dtype, step=records["step"], r=r, v=v, path=filepath)
+    return BinaryOutput(
+        header=header,
+        dtype=dtype,
+        step=records["step"],
+        r=r[..., 0],
+        v=v[..., 0],
+        r_lo=r[..., 1],
+        v_lo=v[..., 1],
+        path=filepath,
+    )
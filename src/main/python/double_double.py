@@ -0,0 +1,202 @@
+"""
+Vectorized double-double arithmetic over NumPy arrays.
+
+A value is stored as the unevaluated sum hi + lo of two float64 arrays, which
+gives ~32 significant digits while keeping every operation a handful of
+element-wise NumPy kernels. Algorithms follow the QD library (Hida, Li, Bailey).
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal, localcontext
+from math import factorial
+
+import numpy as np
+import pandas as pd
+
+_SPLITTER = 134217729.0  # 2^27 + 1
+
+
+def _two_sum(a, b):
+    s = a + b
+    bb = s - a
+    e = (a - (s - bb)) + (b - bb)
+    return s, e
+
+
+def _quick_two_sum(a, b):
+    s = a + b
+    e = b - (s - a)
+    return s, e
+
+
+def _split(a):
+    t = _SPLITTER * a
+    hi = t - (t - a)
+    lo = a - hi
+    return hi, lo
+
+
+def _two_prod(a, b):
+    p = a * b
+    a_hi, a_lo = _split(a)
+    b_hi, b_lo = _split(b)
+    e = ((a_hi * b_hi - p) + a_hi * b_lo + a_lo * b_hi) + a_lo * b_lo
+    return p, e
+
+
+@dataclass(frozen=True)
+class DoubleDouble:
+    hi: np.ndarray
+    lo: np.ndarray
+
+    @classmethod
+    def from_float(cls, x) -> "DoubleDouble":
+        x = np.asarray(x, dtype=np.float64)
+        return cls(hi=x, lo=np.zeros_like(x))
+
+    @classmethod
+    def from_decimal(cls, x: Decimal) -> "DoubleDouble":
+        with localcontext() as ctx:
+            ctx.prec = 50
+            hi = float(x)
+            lo = float(x - Decimal(hi))
+        return cls(hi=np.float64(hi), lo=np.float64(lo))
+
+    def __len__(self) -> int:
+        return len(self.hi)
+
+    def __getitem__(self, item) -> "DoubleDouble":
+        return DoubleDouble(hi=self.hi[item], lo=self.lo[item])
+
+    def __neg__(self) -> "DoubleDouble":
+        return DoubleDouble(hi=-self.hi, lo=-self.lo)
+
+    def __add__(self, other) -> "DoubleDouble":
+        other = _as_double_double(other)
+        s1, s2 = _two_sum(self.hi, other.hi)
+        t1, t2 = _two_sum(self.lo, other.lo)
+        s2 = s2 + t1
+        s1, s2 = _quick_two_sum(s1, s2)
+        s2 = s2 + t2
+        s1, s2 = _quick_two_sum(s1, s2)
+        return DoubleDouble(hi=s1, lo=s2)
+
+    __radd__ = __add__
+
+    def __sub__(self, other) -> "DoubleDouble":
+        return self + (-_as_double_double(other))
+
+    def __rsub__(self, other) -> "DoubleDouble":
+        return _as_double_double(other) + (-self)
+
+    def __mul__(self, other) -> "DoubleDouble":
+        other = _as_double_double(other)
+        p1, p2 = _two_prod(self.hi, other.hi)
+        p2 = p2 + (self.hi * other.lo + self.lo * other.hi)
+        p1, p2 = _quick_two_sum(p1, p2)
+        return DoubleDouble(hi=p1, lo=p2)
+
+    __rmul__ = __mul__
+
+    def ldexp(self, exponent) -> "DoubleDouble":
+        """Multiply by 2**exponent, which is exact for both components."""
+        return DoubleDouble(
+            hi=np.ldexp(self.hi, exponent), lo=np.ldexp(self.lo, exponent)
+        )
+
+    def to_float(self) -> np.ndarray:
+        return self.hi + self.lo
+
+
+def _as_double_double(x) -> DoubleDouble:
+    if isinstance(x, DoubleDouble):
+        return x
+    return DoubleDouble.from_float(x)
+
+
+_TAYLOR_TERMS = 28
+_FRACTION_CHUNK = 12
+_FRACTION_DIGITS = 3 * _FRACTION_CHUNK
+
+# Constants are rounded from Decimal values with more digits than a
+# double-double can hold
+with localcontext() as _ctx:
+    _ctx.prec = 50
+    _PI = Decimal("3.14159265358979323846264338327950288419716939937510582")
+    _LN2 = Decimal("0.69314718055994530941723212145817656807550013436025525")
+
+    PI_OVER_2 = DoubleDouble.from_decimal(_PI / 2)
+    LN2 = DoubleDouble.from_decimal(_LN2)
+
+    _INV_FACTORIAL = [
+        DoubleDouble.from_decimal(Decimal(1) / factorial(n))
+        for n in range(_TAYLOR_TERMS + 1)
+    ]
+    _FRACTION_SCALES = [
+        DoubleDouble.from_decimal(Decimal(10) ** -(_FRACTION_CHUNK * (i + 1)))
+        for i in range(3)
+    ]
+
+
+def _horner(x: DoubleDouble, coefficients: list[DoubleDouble]) -> DoubleDouble:
+    result = coefficients[-1] + x * 0.0
+    for c in reversed(coefficients[:-1]):
+        result = result * x + c
+    return result
+
+
+def exp(x: DoubleDouble) -> DoubleDouble:
+    # exp(x) = 2^k * exp(r), |r| <= ln2 / 2
+    k = np.rint(x.hi / LN2.hi)
+    r = x - LN2 * k
+    result = _horner(r, _INV_FACTORIAL[: _TAYLOR_TERMS - 3])
+    return result.ldexp(k.astype(np.int64))
+
+
+def _sin_cos_reduced(r: DoubleDouble) -> tuple[DoubleDouble, DoubleDouble]:
+    # Taylor series in r^2, valid for |r| <= pi/4
+    r2 = r * r
+    cos_coefficients = [
+        _INV_FACTORIAL[n] if (n // 2) % 2 == 0 else -_INV_FACTORIAL[n]
+        for n in range(0, _TAYLOR_TERMS + 1, 2)
+    ]
+    sin_coefficients = [
+        _INV_FACTORIAL[n] if (n // 2) % 2 == 0 else -_INV_FACTORIAL[n]
+        for n in range(1, _TAYLOR_TERMS, 2)
+    ]
+    return r * _horner(r2, sin_coefficients), _horner(r2, cos_coefficients)
+
+
+def cos(x: DoubleDouble) -> DoubleDouble:
+    # cos(x) = cos(k * pi/2 + r), |r| <= pi/4
+    k = np.rint(x.hi / PI_OVER_2.hi)
+    r = x - PI_OVER_2 * k
+    sin_r, cos_r = _sin_cos_reduced(r)
+
+    quadrant = np.mod(k, 4).astype(np.int64)
+    hi = np.choose(quadrant, [cos_r.hi, -sin_r.hi, -cos_r.hi, sin_r.hi])
+    lo = np.choose(quadrant, [cos_r.lo, -sin_r.lo, -cos_r.lo, sin_r.lo])
+    return DoubleDouble(hi=hi, lo=lo)
+
+
+def parse_decimal_strings(values: pd.Series) -> DoubleDouble:
+    """
+    Parse plain decimal strings (as written by BigDecimal.toPlainString or
+    "%.36f") keeping up to 36 fractional digits.
+    """
+    parts = values.str.strip().str.partition(".")
+    integer_part = parts[0]
+    negative = integer_part.str.startswith("-").to_numpy()
+    integer = integer_part.str.lstrip("+-").replace("", "0").astype(np.float64)
+
+    fraction = parts[2].str.slice(0, _FRACTION_DIGITS).str.ljust(_FRACTION_DIGITS, "0")
+    result = DoubleDouble.from_float(integer.to_numpy())
+    for i, scale in enumerate(_FRACTION_SCALES):
+        start = i * _FRACTION_CHUNK
+        chunk = fraction.str.slice(start, start + _FRACTION_CHUNK).astype(np.int64)
+        result = result + scale * chunk.to_numpy(dtype=np.float64)
+
+    return DoubleDouble(
+        hi=np.where(negative, -result.hi, result.hi),
+        lo=np.where(negative, -result.lo, result.lo),
+    )
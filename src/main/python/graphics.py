@@ -1,96 +1,20 @@
 import argparse
 import os
-from dataclasses import dataclass
 
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 import seaborn as sns
 
-DT_FIXED = 0.1
-
-# ------------------------------
-
-CUSTOM_PALETTE = [
-    "#508fbe",  # blue
-    "#f37120",  # orange
-    "#4baf4e",  # green
-    "#f2cb31",  # yellow
-    "#c178ce",  # purple
-    "#cd4745",  # red
-    "#9ef231",  # light green
-    "#50beaa",  # green + blue
-    "#8050be",  # violet
-    "#cf1f51",  # magenta
-]
-BLACK = "#1a1a1a"
-GREY = "#6f6f6f"
-LIGHT_GREY = "#bfbfbf"
-
-PLT_THEME = {
-    "axes.prop_cycle": plt.cycler(color=CUSTOM_PALETTE),  # Set palette
-    "axes.spines.top": False,  # Remove spine (frame)
-    "axes.spines.right": False,
-    "axes.spines.left": True,
-    "axes.spines.bottom": True,
-    "axes.edgecolor": BLACK,
-    "axes.titleweight": "normal",  # Optional: ensure title weight is normal (not bold)
-    "axes.titlelocation": "center",  # Center the title by default
-    "axes.titlecolor": GREY,  # Set title color
-    "axes.labelcolor": BLACK,  # Set labels color
-    "axes.labelpad": 12,
-    "xtick.bottom": False,  # Remove ticks on the X axis
-    "xtick.labelcolor": BLACK,  # Set Y ticks color
-    "xtick.color": GREY,  # Set Y label color
-    "ytick.labelcolor": BLACK,  # Set Y ticks color
-    "ytick.color": GREY,  # Set Y label color
-    "savefig.dpi": 128,
-    "legend.frameon": False,
-    "legend.labelcolor": BLACK,
-    "figure.titlesize": 16,  # Set suptitle size
-    "font.size": 22,
-    "axes.titlesize": 24,
-    "axes.labelsize": 24,
-    "xtick.labelsize": 22,
-    "ytick.labelsize": 22,
-    "legend.fontsize": 22,
-}
-plt.style.use(PLT_THEME)
-sns.set_palette(CUSTOM_PALETTE)
-sns.set_style(PLT_THEME)
-
-DPI = 100
-FIGSIZE = (1920 / DPI, 1080 / DPI)
+from loader import Output, read_csv
+from profiling import add_profile_arguments, enable_from_args, profiled
+from reductions import downsample_for_plot
+from theme import DPI, FIGSIZE, apply_theme, figure_pixels
 
+DT_FIXED = 0.1
 
 # ------------------------------
 
 
-@dataclass(frozen=True, eq=True)
-class SimulationParameters:
-    mass: float
-    k: int
-    gamma: int
-    r0: float
-    v0: float
-    amplitude: int
-    seed: int
-
-
-@dataclass(frozen=True, eq=True)
-class Instant:
-    t: float
-    r: float
-    v: float
-    a: float
-
-
-@dataclass
-class Output:
-    params: SimulationParameters
-    values: list[Instant]
-
-
 def format_power_of_10(x):
     if x == 0:
         return "0"
@@ -124,17 +48,13 @@ def calculate_oscilator(simulation_output: Output):
     )
     cos_constant = np.sqrt(k_over_m - gamma_square_over_4m2)
 
-    def r_t(t: float):
-        return (
-            params.amplitude * np.exp(t * gamma_over_2m * -1) * np.cos(t * cos_constant)
-        )
-
-    return [
-        Instant(t=out.t, r=r_t(out.t), v=0.0, a=0.0) for out in simulation_output.values
-    ]
+    t = simulation_output.t
+    return params.amplitude * np.exp(t * gamma_over_2m * -1) * np.cos(t * cos_constant)
 
 
+@profiled("plot")
 def plot_algorithms(outputs: dict[str, Output], output_dir: str, zoom: bool = False):
+    apply_theme()
     # df_plot = pd.DataFrame(simulation_output.values)
 
     # oscilator = calculate_oscilator(simulation_output)
@@ -156,19 +76,30 @@ def plot_algorithms(outputs: dict[str, Output], output_dir: str, zoom: bool = Fa
     # plt.clf()
     # plt.close()
 
-    plt.figure(figsize=FIGSIZE)
+    fig = plt.figure(figsize=FIGSIZE)
+    pixels = figure_pixels(fig)
+
+    # analytic curve – extracted from the first dataset (all share params)
+    reference = next(iter(outputs.values()))
+    t_analytic = reference.t
+    r_analytic = calculate_oscilator(reference)
 
+    x_range = None
+    if zoom:
+        # Zoom into the last 10 % of the simulated time to highlight divergence
+        t_min, t_max = t_analytic.min() + 1, t_analytic.max() - 1
+        span = t_max - t_min
+        x_range = (t_max - 0.0000001 * span, t_max)
+
+    # Every series is reduced to what FIGSIZE at DPI can show before plotting
     for label, out in outputs.items():
-        df = pd.DataFrame(out.values)
-        sns.lineplot(data=df, x="t", y="r", label=label)
+        t, r = downsample_for_plot(out.t, out.r, pixels, x_range)
+        sns.lineplot(x=t, y=r, label=label)
 
-    # analytic curve – extracted from the first dataset (all share params)
-    analytic_vals = calculate_oscilator(next(iter(outputs.values())))
-    df_analytic = pd.DataFrame(analytic_vals)
+    t, r = downsample_for_plot(t_analytic, r_analytic, pixels, x_range)
     sns.lineplot(
-        data=df_analytic,
-        x="t",
-        y="r",
+        x=t,
+        y=r,
         label="Solución Analítica",
         color="black",
         linestyle="--",
@@ -179,16 +110,13 @@ def plot_algorithms(outputs: dict[str, Output], output_dir: str, zoom: bool = Fa
     plt.grid(True)
 
     if zoom:
-        # Zoom into the last 10 % of the simulated time to highlight divergence
-        t_min, t_max = df_analytic["t"].min() + 1, df_analytic["t"].max() - 1
-        span = t_max - t_min
-        left, right = t_max - 0.0000001 * span, t_max
+        left, right = x_range
         plt.xlim(left, right)
 
-        mask = (df_analytic["t"] >= left) & (df_analytic["t"] <= right)
+        mask = (t_analytic >= left) & (t_analytic <= right)
         y_min, y_max = (
-            df_analytic.loc[mask, "r"].min() - 0.005,
-            df_analytic.loc[mask, "r"].max() + 0.005,
+            r_analytic[mask].min() - 0.005,
+            r_analytic[mask].max() + 0.005,
         )
         padding = 0.05 * abs(y_max - y_min)
         plt.ylim(y_min - padding, y_max + padding)
@@ -204,44 +132,12 @@ def plot_algorithms(outputs: dict[str, Output], output_dir: str, zoom: bool = Fa
     plt.close()
 
 
-def read_csv(filepath: str):
-    config_df = pd.read_csv(filepath, nrows=1, header=0, keep_default_na=False)
-    config = SimulationParameters(
-        mass=float(config_df["m"][0]),
-        k=int(config_df["k"][0]),
-        gamma=int(config_df["y"][0]),
-        r0=float(config_df["r0"][0]),
-        v0=float(config_df["v0"][0]),
-        amplitude=float(config_df["A"][0]),
-        seed=int(config_df["seed"][0]),
-    )
-
-    df = pd.read_csv(
-        filepath,
-        sep=",",  # separator (default is comma)
-        header=0,  # use first row as header
-        index_col=None,  # don't use any column as index
-        skiprows=2,  # number of rows to skip
-    )
-    df = df.sort_values("time")
-    values = [
-        Instant(t=row.time, r=row.r, v=row.v, a=0.0)
-        for row in df.itertuples(index=False)
-    ]
-
-    return Output(params=config, values=values)
-
-
+@profiled("compute")
 def print_mse(outputs: dict[str, Output]):
-    analytic_vals = calculate_oscilator(next(iter(outputs.values())))
-    df_analytic = pd.DataFrame(analytic_vals)
-    df_analytic.set_index("t", inplace=True)
     print("MSE VALUES:")
     for label, output in outputs.items():
-        df = pd.DataFrame(output.values)
-        df.set_index("t", inplace=True)
-        df["r_squared"] = (df["r"] - df_analytic["r"]) ** 2
-        mse = df["r_squared"].mean()
+        r_analytic = calculate_oscilator(output)
+        mse = np.mean((output.r - r_analytic) ** 2)
         print(f"{label}: {mse}")
 
 
@@ -297,5 +193,8 @@ if __name__ == "__main__":
     parser.add_argument("--beeman", type=str, help="CSV de la integración de Beeman")
     parser.add_argument("--gpc", type=str, help="CSV de Gear Predictor-Corrector")
 
+    add_profile_arguments(parser)
+
     args = parser.parse_args()
+    enable_from_args(args)
     main(args.euler, args.verlet, args.beeman, args.gpc)
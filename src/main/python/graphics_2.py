@@ -6,56 +6,39 @@ import re
 import scipy.optimize
 import matplotlib.ticker as mticker
 
+from reductions import downsample_for_plot, peak_to_peak_per_time
+from sweep import (
+    extract_k,
+    extract_w,
+    is_beeman_output,
+    is_w_output,
+    steady_amplitude,
+    summarize_amplitude_over_time,
+    sweep,
+)
+from summary_cache import load_summaries
+from profiling import profiled
+from theme import figure_pixels
+
 PARTICLE_RADIUS = 0.0005
 BOARD_LEN = 1
 NUMBER_OF_PARTICLES = 1000
 PLOTS_DIR = "./graphics"
 OUTPUT_DIR = "./output"
 
-def extract_w(filename: str) -> float:
-    match = re.search(r"w-(\d+_\d+)", filename)
-    if match:
-        return float(match.group(1).replace("_", "."))
-    raise ValueError(f"Could not extract 'w' from filename: {filename}")
-
-def extract_k(filename: str) -> float:
-    match = re.search(r"k-(\d+_\d+)", filename)
-    if match:
-        return float(match.group(1).replace("_", "."))
-    raise ValueError(f"Could not extract 'w' from filename: {filename}")
-
+@profiled("compute")
 def compute_amplitudes(df: pd.DataFrame) -> pd.Series:
-    df.set_index("time", inplace=True)
-    amplitudes = []
-
-    for t in df.index.unique():
-        time_data = df.loc[t]
-        y_max = time_data['y'].max()
-        y_min = time_data['y'].min()
-        amplitude = (y_max - y_min) / 2
-        amplitudes.append((t, amplitude))
-
-    return pd.Series(dict(amplitudes)).sort_index()
+    return peak_to_peak_per_time(df, 'y') / 2
 
+@profiled("plot")
 def plot_amplitudes(df: pd.DataFrame):
-    df.set_index("time", inplace=True)
-
-    times = df.index.unique()
-    amplitudes = []
-    max_amplitude = -np.inf
-
-    for t in times:
-        time_data = df.loc[t]
-        r_max = time_data['r'].max()
-        r_min = time_data['r'].min()
-        amplitude = r_max - r_min
-        amplitudes.append(amplitude)
-
-        if amplitude > max_amplitude:
-            max_amplitude = amplitude
+    peak_to_peak = peak_to_peak_per_time(df, 'r')
+    times = peak_to_peak.index
+    amplitudes = peak_to_peak.to_numpy()
+    max_amplitude = amplitudes.max() if len(amplitudes) else -np.inf
 
-    plt.figure(figsize=(10, 6))
-    plt.plot(times, amplitudes, 'b-', label='System Amplitude')
+    fig = plt.figure(figsize=(10, 6))
+    plt.plot(*downsample_for_plot(times, amplitudes, figure_pixels(fig)), 'b-', label='System Amplitude')
     plt.xlabel('Time')
     plt.ylabel('Amplitude')
     plt.title('System Amplitude Over Time')
@@ -67,30 +50,14 @@ def plot_amplitudes(df: pd.DataFrame):
 
     print(f"Maximum amplitude recorded: {max_amplitude:.6f}")
 
-def plot_amplitudes_comparison():
-    plt.figure(figsize=(12, 7))
-
-    for file in os.listdir(OUTPUT_DIR):
-        if file.endswith(".csv") and "Beeman" in file:
-            try:
-                w_value = extract_w(file)
-                df = pd.read_csv(
-                    os.path.join(OUTPUT_DIR, file),
-                    sep=",",
-                    header=0,
-                    skiprows=2,
-                    low_memory=False
-                )
-
-                # Rename column if needed
-                if 'y' not in df.columns and 'r' in df.columns:
-                    df.rename(columns={'r': 'y'}, inplace=True)
+@profiled("plot")
+def plot_amplitudes_comparison(workers: int | None = None):
+    fig = plt.figure(figsize=(12, 7))
+    pixels = figure_pixels(fig)
 
-                amplitudes = compute_amplitudes(df)
-                plt.plot(amplitudes.index, amplitudes.values, label=f"w = {w_value}")
-
-            except Exception as e:
-                print(f"Error processing {file}: {e}")
+    for run in sweep(OUTPUT_DIR, is_beeman_output, summarize_amplitude_over_time, workers):
+        amplitudes = run.amplitudes
+        plt.plot(*downsample_for_plot(amplitudes.index, amplitudes.values, pixels), label=f"w = {run.w}")
 
     plt.xlabel("Time [s]")
     plt.ylabel("Amplitude [m]")
@@ -100,32 +67,17 @@ def plot_amplitudes_comparison():
     plt.savefig(f"{PLOTS_DIR}/amplitudes_comparison_w.png")
     plt.close()
 
-def plot_steady_amplitude_vs_w(folder: str):
+@profiled("plot")
+def plot_steady_amplitude_vs_w(folder: str, workers: int | None = None):
     amplitudes_by_w = {}
 
-    for file in os.listdir(folder):
-        if file.endswith(".csv") and "w-" in file:
-            try:
-                w = extract_w(file)
-                df = pd.read_csv(
-                    os.path.join(folder, file),
-                    sep=",",
-                    header=0,
-                    skiprows=2,
-                    low_memory=False
-                )
-
-                if 'r' not in df.columns:
-                    continue
-
-                r = df['r']
-                max_r = r.max()
-                min_r = r.min()
-                amplitude = (max_r - min_r) / 2  # Half peak-to-peak
-                amplitudes_by_w[w] = amplitude
-
-            except Exception as e:
-                print(f"Error processing {file}: {e}")
+    for run in load_summaries(folder, is_w_output, workers):
+        if run.w is None:
+            print(f"Error processing {run.file}: Could not extract 'w' from filename")
+            continue
+        if run.amplitude is None:
+            continue
+        amplitudes_by_w[run.w] = run.amplitude
 
     # Sort by w
     ws = sorted(amplitudes_by_w.keys())
@@ -141,41 +93,26 @@ def plot_steady_amplitude_vs_w(folder: str):
     plt.savefig(f'{PLOTS_DIR}/steady_amplitude_vs_w.png')
     plt.show()
 
-def plot_steady_amplitude_vs_w_and_k(folder: str):
+@profiled("plot")
+def plot_steady_amplitude_vs_w_and_k(folder: str, workers: int | None = None):
     amplitudes_by_w_and_k = {}
     max_amplitudes = {}  # Store max amplitude and corresponding w for each k
 
-    for file in os.listdir(folder):
-        if file.endswith(".csv") and "w-" in file:
-            try:
-                w = extract_w(file)
-                k = extract_k(file)
-                df = pd.read_csv(
-                    os.path.join(folder, file),
-                    sep=",",
-                    header=0,
-                    skiprows=2,
-                    low_memory=False
-                )
-
-                if 'r' not in df.columns:
-                    continue
-
-                r = df['r']
-                max_r = r.max()
-                min_r = r.min()
-                amplitude = (max_r - min_r) / 2  # Half peak-to-peak
-                
-                if k not in amplitudes_by_w_and_k:
-                    amplitudes_by_w_and_k[k] = {}
-                amplitudes_by_w_and_k[k][w] = amplitude
-
-                # Update max amplitude for this k if needed
-                if k not in max_amplitudes or amplitude > max_amplitudes[k][1]:
-                    max_amplitudes[k] = (w, amplitude)
-
-            except Exception as e:
-                print(f"Error processing {file}: {e}")
+    for run in load_summaries(folder, is_w_output, workers):
+        w, k, amplitude = run.w, run.k, run.amplitude
+        if w is None or k is None:
+            print(f"Error processing {run.file}: Could not extract 'w' and 'k' from filename")
+            continue
+        if amplitude is None:
+            continue
+
+        if k not in amplitudes_by_w_and_k:
+            amplitudes_by_w_and_k[k] = {}
+        amplitudes_by_w_and_k[k][w] = amplitude
+
+        # Update max amplitude for this k if needed
+        if k not in max_amplitudes or amplitude > max_amplitudes[k][1]:
+            max_amplitudes[k] = (w, amplitude)
 
     # Sort by k and w
     ks = sorted(amplitudes_by_w_and_k.keys())
@@ -245,41 +182,26 @@ def plot_steady_amplitude_vs_w_and_k(folder: str):
     plt.savefig(f'{PLOTS_DIR}/steady_amplitude_vs_w_and_k.png', bbox_inches='tight', dpi=300)
     plt.show()
 
-def plot_w0_vs_k(folder: str):
+@profiled("plot")
+def plot_w0_vs_k(folder: str, workers: int | None = None):
     amplitudes_by_w_and_k = {}
     max_amplitudes = {}  # Store max amplitude and corresponding w for each k
 
-    for file in os.listdir(folder):
-        if file.endswith(".csv") and "w-" in file:
-            try:
-                w = extract_w(file)
-                k = extract_k(file)
-                df = pd.read_csv(
-                    os.path.join(folder, file),
-                    sep=",",
-                    header=0,
-                    skiprows=2,
-                    low_memory=False
-                )
-
-                if 'r' not in df.columns:
-                    continue
-
-                r = df['r']
-                max_r = r.max()
-                min_r = r.min()
-                amplitude = (max_r - min_r) / 2  # Half peak-to-peak
-                
-                if k not in amplitudes_by_w_and_k:
-                    amplitudes_by_w_and_k[k] = {}
-                amplitudes_by_w_and_k[k][w] = amplitude
-
-                # Update max amplitude for this k if needed
-                if k not in max_amplitudes or amplitude > max_amplitudes[k][1]:
-                    max_amplitudes[k] = (w, amplitude)
-
-            except Exception as e:
-                print(f"Error processing {file}: {e}")
+    for run in load_summaries(folder, is_w_output, workers):
+        w, k, amplitude = run.w, run.k, run.amplitude
+        if w is None or k is None:
+            print(f"Error processing {run.file}: Could not extract 'w' and 'k' from filename")
+            continue
+        if amplitude is None:
+            continue
+
+        if k not in amplitudes_by_w_and_k:
+            amplitudes_by_w_and_k[k] = {}
+        amplitudes_by_w_and_k[k][w] = amplitude
+
+        # Update max amplitude for this k if needed
+        if k not in max_amplitudes or amplitude > max_amplitudes[k][1]:
+            max_amplitudes[k] = (w, amplitude)
 
     # Sort by k
     ks = np.array(sorted(max_amplitudes.keys()))
@@ -0,0 +1,722 @@
+import argparse
+import os
+import time as timer
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+from typing import Callable, Iterator, Optional, TextIO
+
+import numpy as np
+
+from run_summary import RunSummary
+
+# Same layout as the Kotlin Simulation: only steps that are multiples of
+# SAVE_STRIDE are written, with their step number (time == step * dT)
+SAVE_STRIDE = 30
+# Saved snapshots buffered before writing them to the output file
+WRITE_BATCH = 256
+
+
+@dataclass
+class Settings:
+    delta_t: float
+    mass: float
+    k: float
+    gamma: float
+    simulation_time: float
+    initial_positions: np.ndarray
+    initial_velocities: np.ndarray
+    amplitude: float
+    seed: int
+
+
+@dataclass
+class CoupledSettings(Settings):
+    # Integrated particles, the driven particle 0 is not counted
+    number_of_particles: int
+    angular_frequency: float
+    spring_length: float
+    # Position of the driven particle and its first five derivatives
+    driven_derivatives: np.ndarray = field(init=False)
+
+    def __post_init__(self):
+        # One set per configuration when angular_frequency is an array
+        self.driven_derivatives = np.zeros((6,) + np.shape(self.angular_frequency))
+
+    def update_driven_particle(self, time: float):
+        A = self.amplitude
+        w = self.angular_frequency
+        wt = w * time
+
+        sin_wt = np.sin(wt)
+        cos_wt = np.cos(wt)
+
+        self.driven_derivatives[:] = (
+            A * sin_wt,  # position
+            A * w * cos_wt,  # velocity
+            -A * w**2 * sin_wt,  # acceleration
+            -A * w**3 * cos_wt,  # jerk
+            A * w**4 * sin_wt,  # snap
+            A * w**5 * cos_wt,  # crackle
+        )
+
+
+def damped_acceleration(settings: Settings, x: np.ndarray, v: np.ndarray) -> np.ndarray:
+    return -(settings.k * x + settings.gamma * v) / settings.mass
+
+
+def _chain_neighbours(x: np.ndarray, left_wall):
+    """Left and right neighbour of every particle of a chain along the last axis."""
+    left = np.empty_like(x)
+    left[..., :1] = left_wall
+    left[..., 1:] = x[..., :-1]
+    # The last particle is attached to an infinite mass that stays at zero
+    right = np.zeros_like(x)
+    right[..., :-1] = x[..., 1:]
+    return left, right
+
+
+def coupled_acceleration(settings: CoupledSettings, x: np.ndarray, v: np.ndarray) -> np.ndarray:
+    # The first integrated particle is connected to the driven one
+    left, right = _chain_neighbours(x, settings.driven_derivatives[0])
+    force = -settings.k * (x - left) - settings.k * (x - right) - settings.gamma * v
+    return force / settings.mass
+
+
+def calculate_acceleration(settings: Settings, x: np.ndarray, v: np.ndarray) -> np.ndarray:
+    if isinstance(settings, CoupledSettings):
+        return coupled_acceleration(settings, x, v)
+    return damped_acceleration(settings, x, v)
+
+
+Acceleration = Callable[[Settings, np.ndarray, np.ndarray], np.ndarray]
+
+
+class Euler:
+    PRETTY_NAME = "Euler"
+
+    def __init__(self, settings: Settings, acceleration: Acceleration, delta_t: Optional[float] = None):
+        self.settings = settings
+        self.acceleration = acceleration
+        self.dT = settings.delta_t if delta_t is None else delta_t
+
+        self.positions = np.array(settings.initial_positions, dtype=np.float64)
+        self.velocities = np.array(settings.initial_velocities, dtype=np.float64)
+        self.accelerations = acceleration(settings, self.positions, self.velocities)
+
+    def advance(self):
+        v1 = self.velocities + self.dT * self.accelerations
+        r1 = self.positions + self.dT * v1
+
+        self.velocities = v1
+        self.positions = r1
+        self.accelerations = self.acceleration(self.settings, r1, v1)
+
+
+class Verlet:
+    PRETTY_NAME = "Verlet"
+
+    def __init__(self, settings: Settings, acceleration: Acceleration):
+        self.settings = settings
+        self.acceleration = acceleration
+        self.dT = settings.delta_t
+
+        self.positions = np.array(settings.initial_positions, dtype=np.float64)
+        self.velocities = np.array(settings.initial_velocities, dtype=np.float64)
+        self.accelerations = acceleration(settings, self.positions, self.velocities)
+
+        euler = Euler(settings, acceleration, -self.dT)
+        euler.advance()
+        self.previous_positions = euler.positions
+
+    def advance(self):
+        a0 = self.acceleration(self.settings, self.positions, self.velocities)
+
+        # r(t + dT) and v(t)
+        next_positions = 2 * self.positions - self.previous_positions + self.dT**2 * a0
+        velocities = (next_positions - self.previous_positions) / (2 * self.dT)
+
+        self.previous_positions = self.positions
+        self.positions = next_positions
+        self.velocities = velocities
+        self.accelerations = a0
+
+
+class Beeman:
+    PRETTY_NAME = "Beeman"
+
+    def __init__(self, settings: Settings, acceleration: Acceleration):
+        self.settings = settings
+        self.acceleration = acceleration
+        self.dT = settings.delta_t
+
+        self.positions = np.array(settings.initial_positions, dtype=np.float64)
+        self.velocities = np.array(settings.initial_velocities, dtype=np.float64)
+        self.accelerations = acceleration(settings, self.positions, self.velocities)
+
+        euler = Euler(settings, acceleration, -self.dT)
+        euler.advance()
+        self.previous_accelerations = acceleration(settings, euler.positions, euler.velocities)
+
+    def advance(self):
+        dT = self.dT
+        r, v, a, a_prev = (
+            self.positions,
+            self.velocities,
+            self.accelerations,
+            self.previous_accelerations,
+        )
+        # Predict
+        r_next = r + v * dT + (2 / 3) * a * dT**2 - (1 / 6) * a_prev * dT**2
+        v_predicted = v + (3 / 2) * a * dT - (1 / 2) * a_prev * dT
+        # Real acceleration
+        a_next = self.acceleration(self.settings, r_next, v_predicted)
+        # Correct
+        v_next = v + (1 / 3) * a_next * dT + (5 / 6) * a * dT - (1 / 6) * a_prev * dT
+
+        self.positions = r_next
+        self.previous_accelerations = a
+        self.accelerations = a_next
+        self.velocities = v_next
+
+
+class GearPredictorCorrector:
+    PRETTY_NAME = "Gear Predictor-Corrector"
+
+    ALPHAS = (3 / 16, 251 / 360, 1.0, 11 / 18, 1 / 6, 1 / 60)
+    FACTORIAL = (1, 1, 2, 6, 24, 120)
+
+    def __init__(self, settings: Settings, acceleration: Acceleration):
+        self.settings = settings
+        self.acceleration = acceleration
+        self.dT = settings.delta_t
+
+        k_over_m = settings.k / settings.mass
+        g_over_m = settings.gamma / settings.mass
+        r0 = np.array(settings.initial_positions, dtype=np.float64)
+        r1 = np.array(settings.initial_velocities, dtype=np.float64)
+
+        # r[n] is the n-th derivative of the positions
+        self.r = [r0, r1]
+        for order in range(2, 6):
+            positions, velocities = self.r[order - 2], self.r[order - 1]
+            if isinstance(settings, CoupledSettings):
+                left, right = _chain_neighbours(positions, settings.driven_derivatives[order])
+                spring = -k_over_m * (2 * positions - left - right)
+            else:
+                spring = -k_over_m * positions
+            self.r.append(spring - g_over_m * velocities)
+
+        # (dT^n / n!) for every order, and the matching corrector scales
+        self.taylor = [self.dT**n / self.FACTORIAL[n] for n in range(6)]
+        self.corrections = [
+            self.ALPHAS[n] * self.FACTORIAL[n] / self.dT**n for n in range(6)
+        ]
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.r[0]
+
+    @property
+    def velocities(self) -> np.ndarray:
+        return self.r[1]
+
+    @property
+    def accelerations(self) -> np.ndarray:
+        return self.r[2]
+
+    def advance(self):
+        # Step 1: Taylor prediction of every derivative
+        predicted = [
+            sum(self.r[n + j] * self.taylor[j] for j in range(6 - n)) for n in range(6)
+        ]
+
+        # Step 2
+        a2 = self.acceleration(self.settings, predicted[0], predicted[1])
+        delta_r2 = (a2 - predicted[2]) * self.taylor[2]
+
+        # Step 3
+        self.r = [predicted[n] + self.corrections[n] * delta_r2 for n in range(6)]
+
+
+ALGORITHMS = {
+    "beeman": Beeman,
+    "verlet": Verlet,
+    "euler": lambda settings, acceleration: Euler(settings, acceleration),
+    "gear": GearPredictorCorrector,
+}
+# Names used by the coupled command in its file names
+COUPLED_NAMES = {"beeman": "Beeman", "verlet": "Verlet", "euler": "Euler", "gear": "Gear"}
+# and by the damped command
+DAMPED_NAMES = {
+    "beeman": Beeman.PRETTY_NAME,
+    "verlet": Verlet.PRETTY_NAME,
+    "euler": Euler.PRETTY_NAME,
+    "gear": GearPredictorCorrector.PRETTY_NAME,
+}
+
+
+def kotlin_double(x: float) -> str:
+    """x as Kotlin's Double.toString writes it, e.g. 1.0, 102.3 or 1.0E-4."""
+    x = float(x)
+    if x == 0 or 1e-3 <= abs(x) < 1e7:
+        text = repr(x)
+        return text if "." in text else text + ".0"
+    sign, digits, exponent = Decimal(repr(x)).normalize().as_tuple()
+    mantissa = f"{digits[0]}." + ("".join(map(str, digits[1:])) or "0")
+    return ("-" if sign else "") + f"{mantissa}E{len(digits) - 1 + exponent}"
+
+
+def _plain(x: float) -> str:
+    """BigDecimal.valueOf(x).toPlainString()"""
+    return format(Decimal(kotlin_double(x)), "f")
+
+
+def number_of_steps(settings: Settings) -> int:
+    """Iterations of the Kotlin loop: while (currentTime <= simulationTime)."""
+    return int(Decimal(kotlin_double(settings.simulation_time)) // Decimal(kotlin_double(settings.delta_t))) + 1
+
+
+def output_header(settings: Settings) -> str:
+    if isinstance(settings, CoupledSettings):
+        return "dT,m,k,y,A,N,w,l,seed,stride\n"
+    return "dT,m,k,y,r0,v0,A,seed,stride\n"
+
+
+def parameters_line(settings: Settings, stride: int = SAVE_STRIDE) -> str:
+    if isinstance(settings, CoupledSettings):
+        values = [
+            _plain(settings.delta_t),
+            f"{settings.mass:.8f}",
+            kotlin_double(settings.k),
+            kotlin_double(settings.gamma),
+            kotlin_double(settings.amplitude),
+            settings.number_of_particles,
+            kotlin_double(settings.angular_frequency),
+            kotlin_double(settings.spring_length),
+            settings.seed,
+            stride,
+        ]
+    else:
+        values = [
+            _plain(settings.delta_t),
+            f"{settings.mass:.8f}",
+            kotlin_double(settings.k),
+            kotlin_double(settings.gamma),
+            f"{settings.initial_positions[0]:.8f}",
+            f"{settings.initial_velocities[0]:.8f}",
+            kotlin_double(settings.amplitude),
+            settings.seed,
+            stride,
+        ]
+    return ",".join(map(str, values)) + "\n"
+
+
+def format_state(
+    step: int,
+    positions: np.ndarray,
+    velocities: np.ndarray,
+    driven: Optional[np.ndarray] = None,
+) -> str:
+    rows = []
+    # Save driven particle state (position, velocity) if coupled system
+    if driven is not None:
+        rows.append(f"{step},0,{float(driven[0]):.36f},{float(driven[1]):.36f}\n")
+    rows.extend(
+        f"{step},{i},{r:.36f},{v:.36f}\n"
+        for i, (r, v) in enumerate(zip(positions.tolist(), velocities.tolist()), start=1)
+    )
+    return "".join(rows)
+
+
+def saved_steps(settings: Settings, algorithm) -> Iterator[int]:
+    """
+    Advance algorithm through the whole run, yielding the step number of
+    every iteration the Kotlin Simulation would save.
+    """
+    coupled = isinstance(settings, CoupledSettings)
+    for iteration in range(number_of_steps(settings)):
+        if coupled:
+            settings.update_driven_particle(iteration * settings.delta_t)
+        algorithm.advance()
+
+        if (iteration + 1) % SAVE_STRIDE == 0:
+            yield iteration + 1
+
+
+def write_preamble(settings: Settings, output: TextIO, stride: int = SAVE_STRIDE):
+    output.write(output_header(settings))
+    output.write(parameters_line(settings, stride))
+
+    # Header
+    output.write("step,id,r,v\n")
+
+
+def simulate(settings: Settings, algorithm, output: TextIO):
+    """Run algorithm over settings, writing the same CSV as the Kotlin Simulation."""
+    write_preamble(settings, output)
+
+    coupled = isinstance(settings, CoupledSettings)
+    pending = []
+    for step in saved_steps(settings, algorithm):
+        driven = settings.driven_derivatives if coupled else None
+        pending.append(format_state(step, algorithm.positions, algorithm.velocities, driven))
+        if len(pending) >= WRITE_BATCH:
+            output.write("".join(pending))
+            pending.clear()
+
+    output.write("".join(pending))
+
+
+def _file_name(parts: list[tuple[str, object]]) -> str:
+    name = "_".join(
+        f"{key}={kotlin_double(value) if isinstance(value, float) else value}" if key else str(value)
+        for key, value in parts
+    )
+    return name.replace(".", "_").replace("=", "-").replace(" ", "-") + ".csv"
+
+
+def damped_file_name(algorithm_name: str, settings: Settings) -> str:
+    return _file_name(
+        [
+            ("", algorithm_name),
+            ("dT", settings.delta_t),
+            ("mass", settings.mass),
+            ("k", settings.k),
+            ("y", settings.gamma),
+            ("t", settings.simulation_time),
+            ("r0", float(settings.initial_positions[0])),
+            ("v0", float(settings.initial_velocities[0])),
+            ("A", settings.amplitude),
+            ("seed", settings.seed),
+        ]
+    )
+
+
+def coupled_file_name(algorithm_name: str, settings: CoupledSettings) -> str:
+    return _file_name(
+        [
+            ("", algorithm_name),
+            # Particles including the driven one, as given on the command line
+            ("N", settings.number_of_particles + 1),
+            ("w", settings.angular_frequency),
+            ("l", settings.spring_length),
+            ("dT", settings.delta_t),
+            ("mass", settings.mass),
+            ("k", settings.k),
+            ("y", settings.gamma),
+            ("A", settings.amplitude),
+            ("t", settings.simulation_time),
+            ("seed", settings.seed),
+        ]
+    )
+
+
+def damped_settings(
+    mass: float = 70.0,
+    k: float = 10000.0,
+    gamma: float = 100.0,
+    final_time: float = 5.0,
+    delta_t: float = 1.0,
+    amplitude: float = 1.0,
+    seed: int = 1,
+    r0: float = 1.0,
+    v0: Optional[float] = None,
+) -> Settings:
+    if v0 is None:
+        v0 = -amplitude * gamma / (2 * mass)
+    return Settings(
+        delta_t=delta_t,
+        mass=mass,
+        k=k,
+        gamma=gamma,
+        simulation_time=final_time,
+        initial_positions=np.array([r0]),
+        initial_velocities=np.array([v0]),
+        amplitude=amplitude,
+        seed=seed,
+    )
+
+
+def coupled_settings(
+    omega: float,
+    number_of_particles: int = 1000,
+    spring_length: float = 0.001,
+    mass: float = 70.0,
+    k: float = 10000.0,
+    gamma: float = 100.0,
+    final_time: float = 5.0,
+    delta_t: float = 1.0,
+    amplitude: float = 1.0,
+    seed: int = 1,
+) -> CoupledSettings:
+    """number_of_particles counts the driven particle, as the Kotlin -N option."""
+    return CoupledSettings(
+        delta_t=delta_t,
+        mass=mass,
+        k=k,
+        gamma=gamma,
+        simulation_time=final_time,
+        initial_positions=np.zeros(number_of_particles - 1),
+        initial_velocities=np.zeros(number_of_particles - 1),
+        amplitude=amplitude,
+        seed=seed,
+        number_of_particles=number_of_particles - 1,
+        angular_frequency=omega,
+        spring_length=spring_length,
+    )
+
+
+def run(settings: Settings, algorithm_type: type, filepath: str) -> str:
+    algorithm = algorithm_type(settings, calculate_acceleration)
+    with open(filepath, "w", buffering=1 << 20) as output:
+        simulate(settings, algorithm, output)
+    return filepath
+
+
+def run_damped(output_directory: str, **kwargs) -> list[str]:
+    """Every scheme over the same damped oscillator, as the damped command does."""
+    outputs = []
+    for algorithm_type in (Euler, Verlet, Beeman, GearPredictorCorrector):
+        settings = damped_settings(**kwargs)
+        filepath = os.path.join(output_directory, damped_file_name(algorithm_type.PRETTY_NAME, settings))
+        outputs.append(run(settings, algorithm_type, filepath))
+    return outputs
+
+
+def run_coupled(
+    output_directory: str, omega: float, algorithm: str = "beeman", **kwargs
+) -> str:
+    """One driven chain, written under the same file name as the coupled command."""
+    settings = coupled_settings(omega, **kwargs)
+    filepath = os.path.join(output_directory, coupled_file_name(COUPLED_NAMES[algorithm], settings))
+    return run(settings, ALGORITHMS[algorithm], filepath)
+
+
+def ensemble_settings(
+    omegas: list[float],
+    ks: list[float],
+    number_of_particles: int = 1000,
+    spring_length: float = 0.001,
+    mass: float = 70.0,
+    gamma: float = 100.0,
+    final_time: float = 5.0,
+    delta_t: float = 1.0,
+    amplitude: float = 1.0,
+    seed: int = 1,
+) -> CoupledSettings:
+    """
+    Every (k, w) pair of the grid, k-major like the --sweep-k loop, as one
+    CoupledSettings: k and w are (configurations, 1) columns and the state
+    is a (configurations, particles) array, so a single time loop advances
+    them all.
+    """
+    k_grid, w_grid = np.meshgrid(
+        np.asarray(ks, dtype=np.float64), np.asarray(omegas, dtype=np.float64), indexing="ij"
+    )
+    configurations = k_grid.size
+    return CoupledSettings(
+        delta_t=float(delta_t),
+        mass=float(mass),
+        k=k_grid.reshape(-1, 1),
+        gamma=float(gamma),
+        simulation_time=float(final_time),
+        initial_positions=np.zeros((configurations, number_of_particles - 1)),
+        initial_velocities=np.zeros((configurations, number_of_particles - 1)),
+        amplitude=float(amplitude),
+        seed=seed,
+        number_of_particles=number_of_particles - 1,
+        angular_frequency=w_grid.reshape(-1, 1),
+        spring_length=float(spring_length),
+    )
+
+
+def _pick(value, c: int):
+    return float(np.ravel(value)[c]) if np.ndim(value) else value
+
+
+def configuration(settings: CoupledSettings, c: int) -> CoupledSettings:
+    """Scalar settings of the c-th configuration of an ensemble."""
+    return replace(
+        settings,
+        mass=_pick(settings.mass, c),
+        k=_pick(settings.k, c),
+        gamma=_pick(settings.gamma, c),
+        amplitude=_pick(settings.amplitude, c),
+        angular_frequency=_pick(settings.angular_frequency, c),
+        initial_positions=settings.initial_positions[c],
+        initial_velocities=settings.initial_velocities[c],
+    )
+
+
+class EnsembleFiles:
+    """Writes every configuration of an ensemble to its own output file."""
+
+    def __init__(self, output_directory: str, settings: CoupledSettings, algorithm_name: str):
+        configurations = [
+            configuration(settings, c) for c in range(len(settings.initial_positions))
+        ]
+        self.paths = [
+            os.path.join(output_directory, coupled_file_name(algorithm_name, config))
+            for config in configurations
+        ]
+        self.files = [open(path, "w", buffering=1 << 20) for path in self.paths]
+        for config, file in zip(configurations, self.files):
+            write_preamble(config, file)
+        self.pending = [[] for _ in self.files]
+
+    def save(self, step: int, positions: np.ndarray, velocities: np.ndarray, driven: np.ndarray):
+        for c, pending in enumerate(self.pending):
+            pending.append(format_state(step, positions[c], velocities[c], driven[:2, c].ravel()))
+            if len(pending) >= WRITE_BATCH:
+                self.files[c].write("".join(pending))
+                pending.clear()
+
+    def close(self) -> list[str]:
+        for pending, file in zip(self.pending, self.files):
+            file.write("".join(pending))
+            file.close()
+        return self.paths
+
+
+class EnsembleSummary:
+    """
+    Running min/max of r of every configuration, the RunSummary that
+    summarize_run would compute from its file, without writing any.
+    """
+
+    def __init__(self, settings: CoupledSettings, algorithm_name: str):
+        configurations = len(settings.initial_positions)
+        self.settings = settings
+        self.files = [
+            coupled_file_name(algorithm_name, configuration(settings, c))
+            for c in range(configurations)
+        ]
+        self.min_r = np.full(configurations, np.inf)
+        self.max_r = np.full(configurations, -np.inf)
+        self.rows = 0
+
+    def save(self, step: int, positions: np.ndarray, velocities: np.ndarray, driven: np.ndarray):
+        # The driven particle is a row of the output as well
+        driven_r = np.ravel(driven[0])
+        np.minimum(self.min_r, np.minimum(positions.min(axis=1), driven_r), out=self.min_r)
+        np.maximum(self.max_r, np.maximum(positions.max(axis=1), driven_r), out=self.max_r)
+        self.rows += positions.shape[1] + 1
+
+    def close(self) -> list[RunSummary]:
+        return [
+            RunSummary(
+                file=file,
+                w=_pick(self.settings.angular_frequency, c),
+                k=_pick(self.settings.k, c),
+                min_r=float(self.min_r[c]),
+                max_r=float(self.max_r[c]),
+                rows=self.rows,
+            )
+            for c, file in enumerate(self.files)
+        ]
+
+
+def simulate_ensemble(settings: CoupledSettings, algorithm, sink):
+    """Advance an ensemble once, handing every saved snapshot to sink."""
+    for step in saved_steps(settings, algorithm):
+        sink.save(step, algorithm.positions, algorithm.velocities, settings.driven_derivatives)
+    return sink.close()
+
+
+def run_ensemble(
+    output_directory: Optional[str],
+    omegas: list[float],
+    ks: list[float],
+    algorithm: str = "beeman",
+    **kwargs,
+):
+    """
+    Every (k, w) pair in one vectorized run. Writes one output per pair,
+    named like run_coupled, and returns their paths; with no
+    output_directory only their RunSummary records are returned.
+    """
+    settings = ensemble_settings(omegas, ks, **kwargs)
+    name = COUPLED_NAMES[algorithm]
+    if output_directory is None:
+        sink = EnsembleSummary(settings, name)
+    else:
+        sink = EnsembleFiles(output_directory, settings, name)
+    return simulate_ensemble(settings, ALGORITHMS[algorithm](settings, calculate_acceleration), sink)
+
+
+def add_oscillator_options(parser: argparse.ArgumentParser):
+    parser.add_argument("-m", "--mass", type=float, default=70.0, help="Mass [kg]")
+    parser.add_argument("-k", "--spring-constant", type=float, default=10000.0, help="Spring constant k [N/m]")
+    parser.add_argument("-y", "--gamma", type=float, default=100.0, help="Gamma kg/s")
+    parser.add_argument("-t", "--tf", "--simulation-time", dest="final_time", type=float, default=5.0, help="Total simulation time [s]")
+    parser.add_argument("-dt", "--deltaT", dest="delta_t", type=float, default=1.0, help="dT [s]")
+    parser.add_argument("-A", "--amplitude", type=float, default=1.0, help="A")
+    parser.add_argument("-s", "--seed", type=int, default=int(timer.time() * 1000), help="[Optional] Seed for the RND")
+    parser.add_argument("--output-directory", required=True, help="Path to the output directory.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="float64 NumPy version of the Kotlin simulations, same output format."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    damped = commands.add_parser("damped-oscillator")
+    add_oscillator_options(damped)
+    damped.add_argument("-r", "--r0", "--initial-position", dest="r0", type=float, default=1.0, help="r(t=0) [m]")
+    damped.add_argument("-v", "--v0", "--initial-velocity", dest="v0", type=float, help="Initial velocity of the particles [m/s]")
+
+    coupled = commands.add_parser("coupled-oscillator")
+    add_oscillator_options(coupled)
+    coupled.add_argument("-N", "--number-of-particles", type=int, default=1000, help="N - Number of particles")
+    coupled.add_argument(
+        "-w", "--angular-frequency", type=lambda text: [float(w) for w in text.split(",")],
+        default=[1.0], help="w [rad/s] (Could be a list, ej: 1.0,1.5,2.0)",
+    )
+    coupled.add_argument("-l", "--spring-length", type=float, default=0.001, help="l [m]")
+    coupled.add_argument("-a", "--algorithm", choices=ALGORITHMS, default="beeman")
+    coupled.add_argument("--sweep-k", action="store_true", help="If set, vary spring constant k in log-scale from 1e2 to 1e4")
+    coupled.add_argument("--ensemble", action="store_true", help="Advance every (k, w) pair at once in one vectorized loop")
+    coupled.add_argument("--summary", action="store_true", help="With --ensemble, print each pair's amplitude instead of writing outputs")
+
+    args = parser.parse_args()
+    common = dict(
+        mass=args.mass,
+        gamma=args.gamma,
+        final_time=args.final_time,
+        delta_t=args.delta_t,
+        amplitude=args.amplitude,
+        seed=args.seed,
+    )
+
+    if args.command == "damped-oscillator":
+        for path in run_damped(args.output_directory, k=args.spring_constant, r0=args.r0, v0=args.v0, **common):
+            print(path)
+    else:
+        k_values = [1e2, 1e3, 1.8e3, 3.2e3, 1e4] if args.sweep_k else [args.spring_constant]
+        if args.ensemble:
+            results = run_ensemble(
+                None if args.summary else args.output_directory,
+                args.angular_frequency,
+                k_values,
+                args.algorithm,
+                number_of_particles=args.number_of_particles,
+                spring_length=args.spring_length,
+                **common,
+            )
+            for result in results:
+                print(f"k={result.k} w={result.w} amplitude={result.amplitude}" if args.summary else result)
+        else:
+            for k in k_values:
+                for omega in args.angular_frequency:
+                    print(
+                        run_coupled(
+                            args.output_directory,
+                            omega,
+                            args.algorithm,
+                            number_of_particles=args.number_of_particles,
+                            spring_length=args.spring_length,
+                            k=k,
+                            **common,
+                        )
+                    )
@@ -0,0 +1,337 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from double_double import DoubleDouble, parse_decimal_strings
+from profiling import profiled
+
+# Kotlin output layout: parameters header, parameters values, then the
+# trajectory table "step,id,r,v" (older outputs use "time,id,r,v")
+HEADER_ROWS = 2
+
+# First line of binary outputs, which binary_output reads
+BINARY_MAGIC = b"TP4BIN,1\n"
+
+# Rows parsed per read when streaming an output
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+@dataclass(frozen=True, eq=True)
+class SimulationParameters:
+    mass: float
+    k: int
+    gamma: int
+    r0: float
+    v0: float
+    amplitude: int
+    seed: int
+
+
+@dataclass
+class Output:
+    params: SimulationParameters
+    t: np.ndarray
+    r: np.ndarray
+    v: np.ndarray
+    dt: float
+    # Low-order parts of t and r, only present when read with extended=True
+    t_lo: Optional[np.ndarray] = None
+    r_lo: Optional[np.ndarray] = None
+    # Integration step of every sample (t == step * delta_t), absent in
+    # outputs written before the step column existed
+    step: Optional[np.ndarray] = None
+    delta_t: Optional[Decimal] = None
+    # File it was read from
+    path: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    @property
+    def t_extended(self) -> DoubleDouble:
+        if self.t_lo is None:
+            return DoubleDouble.from_float(self.t)
+        return DoubleDouble(hi=self.t, lo=self.t_lo)
+
+    @property
+    def r_extended(self) -> DoubleDouble:
+        if self.r_lo is None:
+            return DoubleDouble.from_float(self.r)
+        return DoubleDouble(hi=self.r, lo=self.r_lo)
+
+
+def read_header(filepath: str) -> dict[str, str]:
+    """Return the raw parameters header as {name: value} strings."""
+    with open(filepath, "rb") as file:
+        first = file.readline()
+        names = (file.readline() if first == BINARY_MAGIC else first).decode("ascii").strip().split(",")
+        # Fields patched after the run (steady_t, steady_A) are space padded
+        values = [value.strip() for value in file.readline().decode("ascii").split(",")]
+    return dict(zip(names, values))
+
+
+def time_from_steps(step: np.ndarray, delta_t: Decimal) -> DoubleDouble:
+    """Time of each step, step * dT, with dT taken from its exact decimal text."""
+    return DoubleDouble.from_decimal(delta_t) * step.astype(np.float64)
+
+
+def block_starts(keys: np.ndarray) -> np.ndarray:
+    """Start position of every run of equal values in an ordered key array."""
+    if len(keys) == 0:
+        return np.empty(0, dtype=np.intp)
+    return np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+
+
+def _with_time(df: pd.DataFrame, delta_t: Optional[Decimal]) -> pd.DataFrame:
+    if "step" in df.columns and "time" not in df.columns:
+        df = df.copy()
+        df.insert(0, "time", time_from_steps(df["step"].to_numpy(), delta_t).hi)
+    return df
+
+
+def _snapshot_key(df: pd.DataFrame) -> np.ndarray:
+    return df["step" if "step" in df.columns else "time"].to_numpy()
+
+
+@profiled("load", file="filepath")
+def read_trajectory(filepath: str, **kwargs) -> pd.DataFrame:
+    """
+    Read the trajectory table of any output into a DataFrame. A time column
+    is derived from the step column when the file has one.
+    """
+    from binary_output import is_binary_output, read_binary
+
+    if is_binary_output(filepath):
+        return read_binary(filepath).trajectory()
+
+    df = pd.read_csv(
+        filepath, sep=",", header=0, index_col=None, skiprows=HEADER_ROWS, **kwargs
+    )
+    if "step" in df.columns and "time" not in df.columns:
+        df = _with_time(df, Decimal(read_header(filepath)["dT"]))
+    return df
+
+
+def iter_snapshots(
+    filepath: str,
+    snapshots_per_batch: int = 1,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    **kwargs,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the trajectory table of an output in pieces holding only whole
+    snapshots, at most snapshots_per_batch saved times each. At most one
+    chunk of chunk_rows rows plus one unfinished snapshot are in memory, so
+    outputs larger than RAM can be processed. Relies on the simulation
+    writing every snapshot contiguously, in time order. Binary outputs are
+    memory-mapped instead, and of the read_csv options only usecols applies.
+    """
+    from binary_output import is_binary_output, read_binary
+
+    if snapshots_per_batch < 1:
+        raise ValueError("snapshots_per_batch must be at least 1")
+
+    if is_binary_output(filepath):
+        usecols = kwargs.pop("usecols", None)
+        if kwargs:
+            raise ValueError(f"{filepath} is a binary output, options {sorted(kwargs)} do not apply")
+        yield from _iter_binary_snapshots(read_binary(filepath), snapshots_per_batch, chunk_rows, usecols)
+        return
+
+    header = read_header(filepath)
+    delta_t = Decimal(header["dT"]) if "stride" in header else None
+
+    def batches(df: pd.DataFrame, starts: np.ndarray, end: int):
+        for i in range(0, len(starts), snapshots_per_batch):
+            stop = starts[i + snapshots_per_batch] if i + snapshots_per_batch < len(starts) else end
+            yield _with_time(df.iloc[starts[i]:stop], delta_t)
+
+    pending: Optional[pd.DataFrame] = None
+    with pd.read_csv(
+        filepath,
+        sep=",",
+        header=0,
+        index_col=None,
+        skiprows=HEADER_ROWS,
+        chunksize=chunk_rows,
+        **kwargs,
+    ) as reader:
+        for chunk in reader:
+            if pending is not None:
+                chunk = pd.concat([pending, chunk], ignore_index=True)
+            starts = block_starts(_snapshot_key(chunk))
+            if len(starts) == 0:
+                continue
+
+            # The last snapshot may continue in the next chunk
+            yield from batches(chunk, starts[:-1], starts[-1])
+            pending = chunk.iloc[starts[-1]:]
+
+    if pending is not None and len(pending):
+        yield _with_time(pending, delta_t)
+
+
+def _iter_binary_snapshots(output, snapshots_per_batch: int, chunk_rows: int, usecols) -> Iterator[pd.DataFrame]:
+    # Same bound as the CSV path: at most chunk_rows rows per batch
+    step = max(1, min(snapshots_per_batch, chunk_rows // max(output.particles, 1)))
+    for start in range(0, len(output), step):
+        df = output.trajectory(start, start + step)
+        if usecols is not None:
+            df = df[[name for name in df.columns if (usecols(name) if callable(usecols) else name in usecols)]]
+        yield df
+
+
+def read_parameters(filepath: str) -> SimulationParameters:
+    header = read_header(filepath)
+    return SimulationParameters(
+        mass=float(header["m"]),
+        k=int(float(header["k"])),
+        gamma=int(float(header["y"])),
+        r0=float(header["r0"]),
+        v0=float(header["v0"]),
+        amplitude=float(header["A"]),
+        seed=int(header["seed"]),
+    )
+
+
+def _read_column_frames(filepath: str, extended: bool, **kwargs):
+    extended_dtype = str if extended else np.float64
+    return pd.read_csv(
+        filepath,
+        sep=",",
+        header=0,
+        index_col=None,
+        skiprows=HEADER_ROWS,
+        usecols=lambda name: name in ("step", "time", "r", "v"),
+        dtype={
+            "step": np.int64,
+            "time": extended_dtype,
+            "r": extended_dtype,
+            "v": np.float64,
+        },
+        engine="c",
+        **kwargs,
+    )
+
+
+def _frame_to_columns(
+    df: pd.DataFrame, delta_t: Optional[Decimal], extended: bool
+) -> dict[str, np.ndarray]:
+    columns = {"v": df["v"].to_numpy()}
+
+    if "step" in df.columns:
+        columns["step"] = df["step"].to_numpy()
+        t = time_from_steps(columns["step"], delta_t)
+    elif extended:
+        t = parse_decimal_strings(df["time"])
+    else:
+        t = DoubleDouble.from_float(df["time"].to_numpy())
+    columns["t"] = t.hi
+
+    if extended:
+        r = parse_decimal_strings(df["r"])
+        columns["r"] = r.hi
+        columns["r_lo"] = r.lo
+        columns["t_lo"] = t.lo
+    else:
+        columns["r"] = df["r"].to_numpy()
+
+    return columns
+
+
+def _binary_columns(output, extended: bool, start: int = 0, stop: Optional[int] = None) -> dict[str, np.ndarray]:
+    if output.particles != 1:
+        raise ValueError(f"{output.path} has {output.particles} particles, expected a damped oscillator output")
+    step = np.asarray(output.step[start:stop])
+    t = time_from_steps(step, output.delta_t)
+    columns = {
+        "v": np.asarray(output.v[start:stop, 0]),
+        "step": step,
+        "t": t.hi,
+        "r": np.asarray(output.r[start:stop, 0]),
+    }
+    if extended:
+        # float64 outputs have no low-order parts to read
+        columns["r_lo"] = np.zeros_like(columns["r"]) if output.r_lo is None else np.asarray(output.r_lo[start:stop, 0])
+        columns["t_lo"] = t.lo
+    return columns
+
+
+def _header_delta_t(filepath: str) -> Optional[Decimal]:
+    header = read_header(filepath)
+    return Decimal(header["dT"]) if "stride" in header else None
+
+
+def read_columns(filepath: str, extended: bool = False) -> dict[str, np.ndarray]:
+    """
+    Return the t, r and v columns of a damped oscillator output, sorted by t.
+    With extended=True t and r are parsed from their decimal text into
+    double-double values and their low-order parts are returned as t_lo, r_lo.
+    Outputs with a step column also return it, and t is derived from it.
+    Binary outputs have their values read as written, and always a step column.
+    """
+    from binary_output import is_binary_output, read_binary
+
+    if is_binary_output(filepath):
+        columns = _binary_columns(read_binary(filepath), extended)
+    else:
+        df = _read_column_frames(filepath, extended)
+        columns = _frame_to_columns(df, _header_delta_t(filepath), extended)
+
+    key = "step" if "step" in columns else "t"
+    if len(columns[key]) > 1 and np.any(np.diff(columns[key]) < 0):
+        order = np.argsort(columns[key], kind="stable")
+        columns = {key: values[order] for key, values in columns.items()}
+
+    return {key: np.ascontiguousarray(values) for key, values in columns.items()}
+
+
+def iter_columns(
+    filepath: str, chunk_size: int, extended: bool = False
+) -> Iterator[dict[str, np.ndarray]]:
+    """
+    Same columns as read_columns, yielded in blocks of at most chunk_size rows
+    in file order, so memory does not grow with the length of the output.
+    """
+    from binary_output import is_binary_output, read_binary
+
+    if is_binary_output(filepath):
+        output = read_binary(filepath)
+        for start in range(0, len(output), chunk_size):
+            yield _binary_columns(output, extended, start, start + chunk_size)
+        return
+
+    delta_t = _header_delta_t(filepath)
+    with _read_column_frames(filepath, extended, chunksize=chunk_size) as reader:
+        for df in reader:
+            yield _frame_to_columns(df, delta_t, extended)
+
+
+@profiled("load", file="filepath")
+def read_csv(filepath: str, extended: bool = False) -> Output:
+    params = read_parameters(filepath)
+    columns = read_columns(filepath, extended=extended)
+    t = columns["t"]
+
+    # Calcular dt como la diferencia promedio entre tiempos
+    if len(t) > 1:
+        dt = round(float(np.mean(np.diff(t))), 8)
+    else:
+        dt = 0.0
+
+    step = columns.get("step")
+    return Output(
+        params=params,
+        t=t,
+        r=columns["r"],
+        v=columns["v"],
+        dt=dt,
+        t_lo=columns.get("t_lo"),
+        r_lo=columns.get("r_lo"),
+        step=step,
+        delta_t=_header_delta_t(filepath) if step is not None else None,
+        path=filepath,
+    )
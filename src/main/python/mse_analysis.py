@@ -1,96 +1,32 @@
 import os
 import argparse
+import hashlib
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter, LogLocator
 from decimal import Decimal, getcontext, localcontext
-from math import factorial
-import seaborn as sns
 import numpy as np
 
+import double_double as dd
+from double_double import DoubleDouble
+from loader import (
+    Output,
+    SimulationParameters,
+    iter_columns,
+    read_csv,
+    read_parameters,
+)
+from profiling import add_profile_arguments, enable_from_args, profiled
+from theme import DPI, FIGSIZE, apply_theme
+
 DT_FIXED = 0.1
 
 # ------------------------------
 
-CUSTOM_PALETTE = [
-    "#508fbe",  # blue
-    "#f37120",  # orange
-    "#4baf4e",  # green
-    "#f2cb31",  # yellow
-    "#c178ce",  # purple
-    "#cd4745",  # red
-    "#9ef231",  # light green
-    "#50beaa",  # green + blue
-    "#8050be",  # violet
-    "#cf1f51",  # magenta
-]
-BLACK = "#1a1a1a"
-GREY = "#6f6f6f"
-LIGHT_GREY = "#bfbfbf"
-
-PLT_THEME = {
-    "axes.prop_cycle": plt.cycler(color=CUSTOM_PALETTE),  # Set palette
-    "axes.spines.top": False,  # Remove spine (frame)
-    "axes.spines.right": False,
-    "axes.spines.left": True,
-    "axes.spines.bottom": True,
-    "axes.edgecolor": BLACK,
-    "axes.titleweight": "normal",  # Optional: ensure title weight is normal (not bold)
-    "axes.titlelocation": "center",  # Center the title by default
-    "axes.titlecolor": GREY,  # Set title color
-    "axes.labelcolor": BLACK,  # Set labels color
-    "axes.labelpad": 12,
-    "xtick.bottom": False,  # Remove ticks on the X axis
-    "xtick.labelcolor": BLACK,  # Set Y ticks color
-    "xtick.color": GREY,  # Set Y label color
-    "ytick.labelcolor": BLACK,  # Set Y ticks color
-    "ytick.color": GREY,  # Set Y label color
-    "savefig.dpi": 128,
-    "legend.frameon": False,
-    "legend.labelcolor": BLACK,
-    "figure.titlesize": 16,  # Set suptitle size
-    "font.size": 22,
-    "axes.titlesize": 24,
-    "axes.labelsize": 24,
-    "xtick.labelsize": 22,
-    "ytick.labelsize": 22,
-    "legend.fontsize": 22,
-}
-plt.style.use(PLT_THEME)
-sns.set_palette(CUSTOM_PALETTE)
-sns.set_style(PLT_THEME)
-
 getcontext().prec = 40
 
-DPI = 100
-FIGSIZE = (1920 / DPI, 1080 / DPI)
-
-
-@dataclass(frozen=True, eq=True)
-class SimulationParameters:
-    mass: float
-    k: int
-    gamma: int
-    r0: float
-    v0: float
-    amplitude: int
-    seed: int
-
-
-@dataclass(frozen=True, eq=True)
-class Instant:
-    t: float
-    r: float
-    v: float
-
-
-@dataclass
-class Output:
-    params: SimulationParameters
-    values: List[Instant]
-    dt: float
+# Rows per block when reading outputs with --streaming
+DEFAULT_CHUNK_SIZE = 1_000_000
 
 
 def _pow10_fmt(y, _):
@@ -124,21 +60,6 @@ def y_fmt(x, pos):
     return format_power_of_10(x)
 
 
-# Coseno con Decimal usando serie de Taylor
-def cos_decimal(x: Decimal, terms: int = 30) -> Decimal:
-    x = x % (2 * Decimal("3.141592653589793238462643383279"))
-    result = Decimal(1)
-    num = Decimal(1)
-    denom = Decimal(1)
-    sign = -1
-    for n in range(1, terms):
-        num *= x * x
-        denom *= Decimal((2 * n - 1) * (2 * n))
-        result += sign * (num / denom)
-        sign *= -1
-    return result
-
-
 # Raíz cuadrada para Decimal
 def sqrt_decimal(x: Decimal) -> Decimal:
     with localcontext() as ctx:
@@ -146,38 +67,7 @@ def sqrt_decimal(x: Decimal) -> Decimal:
         return x.sqrt()
 
 
-def read_csv(filepath: str) -> Output:
-    config_df = pd.read_csv(filepath, nrows=1, header=0, keep_default_na=False)
-    config = SimulationParameters(
-        mass=float(config_df["m"][0]),
-        k=int(config_df["k"][0]),
-        gamma=int(config_df["y"][0]),
-        r0=float(config_df["r0"][0]),
-        v0=float(config_df["v0"][0]),
-        amplitude=float(config_df["A"][0]),
-        seed=int(config_df["seed"][0]),
-    )
-
-    print(filepath)
-
-    df = pd.read_csv(filepath, sep=",", header=0, index_col=None, skiprows=2)
-    df = df.sort_values("time")
-
-    # Calcular dt como la diferencia promedio entre tiempos
-    times = df["time"].values
-    if len(times) > 1:
-        dt = round(np.mean(np.diff(times)), 8)
-    else:
-        dt = 0.0
-
-    values = [
-        Instant(t=row.time, r=row.r, v=row.v) for row in df.itertuples(index=False)
-    ]
-
-    return Output(params=config, values=values, dt=dt)
-
-
-def calculate_oscilator(simulation_output: Output):
+def calculate_oscilator(simulation_output: Output) -> DoubleDouble:
     params = simulation_output.params
 
     gamma_over_2m = Decimal(str(params.gamma)) / (2 * Decimal(str(params.mass)))
@@ -188,50 +78,282 @@ def calculate_oscilator(simulation_output: Output):
     cos_constant = sqrt_decimal(k_over_m - gamma_square_over_4m2)
     amplitude = Decimal(str(params.amplitude))
 
-    def r_t(t: float):
-        t_dec = Decimal(str(t))
-        exp_part = (-gamma_over_2m * t_dec).exp()
-        cos_arg = cos_constant * t_dec
-        cos_part = cos_decimal(cos_arg)
-        return amplitude * exp_part * cos_part
+    # r(t) = A exp(-y/2m t) cos(sqrt(k/m - y^2/4m^2) t) for the whole grid at once
+    t = simulation_output.t_extended
+    exp_part = dd.exp(-DoubleDouble.from_decimal(gamma_over_2m) * t)
+    cos_part = dd.cos(DoubleDouble.from_decimal(cos_constant) * t)
+    return DoubleDouble.from_decimal(amplitude) * exp_part * cos_part
+
+
+def _grid_fingerprint(t: DoubleDouble) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(t.hi).tobytes())
+    digest.update(np.ascontiguousarray(t.lo).tobytes())
+    return digest.hexdigest()
+
+
+def _step_grid(output: Output) -> Optional[Tuple[Decimal, int, int, int]]:
+    """(dT, first step, stride, count) when the output steps are evenly strided."""
+    step = output.step
+    if step is None or output.delta_t is None or len(step) < 2:
+        return None
+    stride = int(step[1] - step[0])
+    if stride <= 0 or not np.all(np.diff(step) == stride):
+        return None
+    return output.delta_t, int(step[0]), stride, len(step)
+
+
+def _step_subgrid_index(grid, query) -> Optional[slice]:
+    """
+    Slice of the step grid that holds every sample of query, or None.
+    Both are (dT, first, stride, count) so this is pure index arithmetic.
+    """
+    grid_dt, grid_first, grid_stride, grid_count = grid
+    query_dt, query_first, query_stride, query_count = query
+
+    ratio = query_dt / grid_dt
+    if ratio != ratio.to_integral_value():
+        return None
+    # Query steps expressed in grid dT units
+    first = query_first * int(ratio)
+    stride = query_stride * int(ratio)
+    last = first + stride * (query_count - 1)
+
+    if first < grid_first or (first - grid_first) % grid_stride or stride % grid_stride:
+        return None
+    if last > grid_first + grid_stride * (grid_count - 1):
+        return None
+
+    start = (first - grid_first) // grid_stride
+    step = stride // grid_stride
+    return slice(start, start + step * (query_count - 1) + 1, step)
+
+
+def _subgrid_index(grid: DoubleDouble, t: DoubleDouble):
+    """
+    Return the positions of every t inside grid (as a slice when they are
+    evenly spaced), or None if t is not a subset of grid.
+    """
+    if len(t) == 0 or len(t) > len(grid):
+        return None
+
+    index = np.searchsorted(grid.hi, t.hi)
+    if index[-1] >= len(grid):
+        return None
+    if not (np.array_equal(grid.hi[index], t.hi) and np.array_equal(grid.lo[index], t.lo)):
+        return None
+
+    if len(index) == 1:
+        return slice(index[0], index[0] + 1)
+    stride = index[1] - index[0]
+    if stride > 0 and np.all(np.diff(index) == stride):
+        return slice(index[0], index[-1] + 1, stride)
+    return index
 
-    return [
-        Instant(t=out.t, r=float(r_t(out.t)), v=0.0) for out in simulation_output.values
-    ]
 
+@dataclass
+class _AnalyticReference:
+    step_grid: Optional[Tuple[Decimal, int, int, int]]
+    t: DoubleDouble
+    r: DoubleDouble
 
-def calculate_mse(output: Output) -> float:
-    analytic_vals = calculate_oscilator(output)
-    df_analytic = pd.DataFrame(analytic_vals)
-    df = pd.DataFrame(output.values)
 
-    df_merged = pd.merge(df, df_analytic, on="t", suffixes=("", "_analytic"))
-    mse = ((df_merged["r"] - df_merged["r_analytic"]) ** 2).mean()
+class AnalyticReferenceCache:
+    """
+    Memoizes calculate_oscilator per SimulationParameters and time grid, so
+    methods sharing dT and parameters evaluate the analytic solution once.
+    Grids contained in an already computed one are served by slicing it.
+    """
+
+    def __init__(self):
+        self._references: Dict[SimulationParameters, Dict[object, _AnalyticReference]] = {}
+
+    def get(self, output: Output) -> DoubleDouble:
+        references = self._references.setdefault(output.params, {})
+        step_grid = _step_grid(output)
+
+        # Step grids are identified by (dT, first, stride, count), no need
+        # to look at the samples at all
+        if step_grid is not None:
+            if step_grid in references:
+                return references[step_grid].r
+            for reference in references.values():
+                if reference.step_grid is None:
+                    continue
+                index = _step_subgrid_index(reference.step_grid, step_grid)
+                if index is not None:
+                    return reference.r[index]
+
+        t = output.t_extended
+        key = step_grid if step_grid is not None else _grid_fingerprint(t)
+        if key in references:
+            return references[key].r
+
+        for reference in references.values():
+            index = _subgrid_index(reference.t, t)
+            if index is not None:
+                return reference.r[index]
+
+        r_analytic = calculate_oscilator(output)
+        references[key] = _AnalyticReference(step_grid=step_grid, t=t, r=r_analytic)
+        return r_analytic
+
+    def clear(self):
+        self._references.clear()
+
+
+ANALYTIC_REFERENCES = AnalyticReferenceCache()
+
+
+@profiled("compute", file="output")
+def calculate_mse(output: Output) -> float:
+    r_analytic = ANALYTIC_REFERENCES.get(output)
+    # Residual in double-double, so it keeps its digits even when
+    # r and r_analytic agree beyond float64 precision
+    residual = (output.r_extended - r_analytic).to_float()
+    mse = float(np.mean(residual**2))
     print(f"MSE of {output.dt} is {mse:.30e}")
     return mse
 
 
-def plot_mse_by_dt(outputs_by_method: Dict[str, List[Output]], output_dir: str):
-    Y_MIN_EXP = -35  # lower exponent
-    Y_MAX_EXP = -2  # upper exponent
-    Y_MIN = 10**Y_MIN_EXP
-    Y_MAX = 10**Y_MAX_EXP
-    plt.figure(figsize=FIGSIZE)
+@dataclass
+class ErrorSummary:
+    count: int
+    mse: float
+    max_abs_error: float
+    final_time: float
+    final_error: float
+    dt: float
+
+
+@profiled("compute", file="filepath")
+def streaming_mse(filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ErrorSummary:
+    """
+    Error of an output against the analytic solution, reading the file in
+    chunks of chunk_size rows and evaluating the solution per chunk. Only
+    running sums are kept, so memory does not depend on dT.
+    """
+    params = read_parameters(filepath)
+    count = 0
+    squared_sum = 0.0
+    max_abs_error = 0.0
+    first_time = final_time = final_error = float("nan")
+
+    for columns in iter_columns(filepath, chunk_size, extended=True):
+        if len(columns["t"]) == 0:
+            continue
+        chunk = Output(
+            params=params,
+            t=columns["t"],
+            r=columns["r"],
+            v=columns["v"],
+            dt=0.0,
+            t_lo=columns["t_lo"],
+            r_lo=columns["r_lo"],
+        )
+        residual = (chunk.r_extended - calculate_oscilator(chunk)).to_float()
+
+        if count == 0:
+            first_time = float(chunk.t[0])
+        count += len(residual)
+        squared_sum += float(np.sum(residual**2))
+        max_abs_error = max(max_abs_error, float(np.max(np.abs(residual))))
+        final_time, final_error = float(chunk.t[-1]), float(residual[-1])
+
+    if count == 0:
+        raise ValueError(f"{filepath} has no samples")
+
+    dt = round((final_time - first_time) / (count - 1), 8) if count > 1 else 0.0
+    summary = ErrorSummary(
+        count=count,
+        mse=squared_sum / count,
+        max_abs_error=max_abs_error,
+        final_time=final_time,
+        final_error=final_error,
+        dt=dt,
+    )
+    print(
+        f"MSE of {summary.dt} is {summary.mse:.30e} "
+        f"(max |error| {summary.max_abs_error:.6e}, "
+        f"error at t={summary.final_time} {summary.final_error:.6e})"
+    )
+    return summary
+
+
+def _finest_grid_first(outputs_by_method: Dict[str, List[Output]]):
+    """
+    Yield (method, output) pairs by ascending dt, so coarser grids can reuse
+    the analytic reference of finer ones.
+    """
+    pairs = [
+        (method, output)
+        for method, outputs in outputs_by_method.items()
+        for output in outputs
+    ]
+    return sorted(pairs, key=lambda pair: pair[1].dt)
+
 
+def mse_by_dt(outputs_by_method: Dict[str, List[Output]]) -> pd.DataFrame:
     # ── reshape data ────────────────────────────────────────────────
     mse_data = []
-    for method, outputs in outputs_by_method.items():
-        for output in outputs:
+    for method, output in _finest_grid_first(outputs_by_method):
+        print(f"Calculate MSE of {method}")
+        mse_data.append(
+            {
+                "Method": method,
+                "dt": output.dt,
+                "MSE": calculate_mse(output),
+            }
+        )
+    return pd.DataFrame(mse_data)
+
+
+def plot_mse_by_dt(outputs_by_method: Dict[str, List[Output]], output_dir: str):
+    plot_mse_table(mse_by_dt(outputs_by_method), output_dir)
+
+
+def streaming_mse_by_dt(
+    paths_by_method: Dict[str, List[str]], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> pd.DataFrame:
+    mse_data = []
+    for method, paths in paths_by_method.items():
+        for path in paths:
             print(f"Calculate MSE of {method}")
+            summary = streaming_mse(path, chunk_size=chunk_size)
             mse_data.append(
                 {
                     "Method": method,
-                    "dt": output.dt,
-                    "MSE": calculate_mse(output),
+                    "dt": summary.dt,
+                    "MSE": summary.mse,
+                    "Max error": summary.max_abs_error,
+                    "Final error": summary.final_error,
                 }
             )
+    return pd.DataFrame(mse_data)
+
+
+def plot_streaming_mse_by_dt(
+    paths_by_method: Dict[str, List[str]],
+    output_dir: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+):
+    plot_mse_table(streaming_mse_by_dt(paths_by_method, chunk_size), output_dir)
+
 
-    df = pd.DataFrame(mse_data).sort_values("dt")
+@profiled("plot")
+def plot_mse_table(df: pd.DataFrame, output_dir: str):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from matplotlib.ticker import FuncFormatter, LogLocator
+
+    apply_theme()
+    Y_MIN_EXP = -35  # lower exponent
+    Y_MAX_EXP = -2  # upper exponent
+    Y_MIN = 10**Y_MIN_EXP
+    Y_MAX = 10**Y_MAX_EXP
+    plt.figure(figsize=FIGSIZE)
+
+    df = df.sort_values("dt")
     print(df)
 
     # ── main line plot ──────────────────────────────────────────────
@@ -275,14 +397,18 @@ def plot_mse_by_dt(outputs_by_method: Dict[str, List[Output]], output_dir: str):
     print(f"Gráfico de MSE vs dt guardado en: {output_path}")
 
 
+@profiled("plot")
 def plot_mse_by_dt_2(outputs_by_method: Dict[str, List[Output]], output_dir: str):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    apply_theme()
     plt.figure(figsize=FIGSIZE)
 
     mse_data = []
-    for method, outputs in outputs_by_method.items():
-        for output in outputs:
-            mse = calculate_mse(output)
-            mse_data.append({"Method": method, "dt": output.dt, "MSE": mse})
+    for method, output in _finest_grid_first(outputs_by_method):
+        mse = calculate_mse(output)
+        mse_data.append({"Method": method, "dt": output.dt, "MSE": mse})
 
     df = pd.DataFrame(mse_data)
     df = df.sort_values("dt")
@@ -322,17 +448,20 @@ def main(
     verlet_paths: Optional[List[str]],
     beeman_paths: Optional[List[str]],
     gpc_paths: Optional[List[str]],
-):
+    streaming: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    plot: bool = True,
+) -> pd.DataFrame:
     input_dir = "./output"
     output_base_dir = "./graphics"
     os.makedirs(output_base_dir, exist_ok=True)
 
-    outputs_by_method: Dict[str, List[Output]] = {}
+    paths_by_method: Dict[str, List[str]] = {}
 
     def process_paths(method: str, paths: Optional[List[str]]):
         if paths:
-            outputs_by_method[method] = [
-                read_csv(path if os.path.isabs(path) else os.path.join(input_dir, path))
+            paths_by_method[method] = [
+                path if os.path.isabs(path) else os.path.join(input_dir, path)
                 for path in paths
             ]
 
@@ -341,10 +470,23 @@ def main(
     process_paths("Beeman", beeman_paths)
     process_paths("GPC", gpc_paths)
 
-    if not outputs_by_method:
+    if not paths_by_method:
         raise ValueError("Debes proporcionar al menos un archivo de algoritmo.")
 
-    plot_mse_by_dt(outputs_by_method, output_base_dir)
+    if streaming:
+        df = streaming_mse_by_dt(paths_by_method, chunk_size)
+    else:
+        outputs_by_method = {
+            method: [read_csv(path, extended=True) for path in paths]
+            for method, paths in paths_by_method.items()
+        }
+        df = mse_by_dt(outputs_by_method)
+
+    if plot:
+        plot_mse_table(df, output_base_dir)
+    else:
+        print(df.sort_values("dt"))
+    return df
 
 
 if __name__ == "__main__":
@@ -357,6 +499,33 @@ if __name__ == "__main__":
     parser.add_argument(
         "--gpc", type=str, nargs="+", help="CSVs de Gear Predictor-Corrector"
     )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Leer los CSVs por bloques sin cargarlos completos en memoria",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Filas por bloque en modo --streaming",
+    )
+    parser.add_argument(
+        "--no-plot",
+        action="store_true",
+        help="Solo imprimir la tabla de MSE, sin graficar",
+    )
+
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
-    main(args.euler, args.verlet, args.beeman, args.gpc)
+    enable_from_args(args)
+    main(
+        args.euler,
+        args.verlet,
+        args.beeman,
+        args.gpc,
+        streaming=args.streaming,
+        chunk_size=args.chunk_size,
+        plot=not args.no_plot,
+    )
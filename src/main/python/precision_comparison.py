@@ -0,0 +1,103 @@
+"""
+Compare the outputs of the same runs integrated with --precision bigdecimal
+(the reference) and --precision double, matched by file name:
+
+    python precision_comparison.py --reference-dir ./output/bigdecimal --candidate-dir ./output/double
+
+Differences are measured on the snapshots both outputs saved, and reported
+relative to the largest |r| of the reference.
+"""
+import argparse
+import os
+import sys
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+from loader import read_trajectory
+from profiling import add_profile_arguments, enable_from_args, profiled
+
+# Largest relative difference in r accepted between the two precisions
+DEFAULT_TOLERANCE = 1e-6
+
+
+@dataclass
+class PrecisionDifference:
+    file: str
+    snapshots: int
+    max_abs_r: float
+    max_abs_v: float
+    rms_r: float
+    rms_v: float
+    relative_r: float  # max_abs_r / max |r| of the reference
+
+
+def _states(filepath: str) -> pd.DataFrame:
+    df = read_trajectory(filepath)
+    key = "step" if "step" in df.columns else "time"
+    return df[[key, "id", "r", "v"]]
+
+
+@profiled("compute", file="reference")
+def compare_outputs(reference: str, candidate: str) -> PrecisionDifference:
+    expected = _states(reference)
+    merged = expected.merge(_states(candidate), on=list(expected.columns[:2]), suffixes=("_ref", "_cand"))
+    if merged.empty:
+        raise ValueError(f"{reference} and {candidate} have no snapshot in common")
+
+    r_diff = np.abs(merged["r_cand"].to_numpy() - merged["r_ref"].to_numpy())
+    v_diff = np.abs(merged["v_cand"].to_numpy() - merged["v_ref"].to_numpy())
+    scale = np.abs(merged["r_ref"].to_numpy()).max()
+    return PrecisionDifference(
+        file=os.path.basename(reference),
+        snapshots=merged[expected.columns[0]].nunique(),
+        max_abs_r=float(r_diff.max()),
+        max_abs_v=float(v_diff.max()),
+        rms_r=float(np.sqrt(np.mean(r_diff**2))),
+        rms_v=float(np.sqrt(np.mean(v_diff**2))),
+        relative_r=float(r_diff.max() / scale) if scale > 0 else float(r_diff.max()),
+    )
+
+
+def compare_folders(reference_dir: str, candidate_dir: str) -> pd.DataFrame:
+    """One row per output present in both folders."""
+    differences = []
+    for file in sorted(set(os.listdir(reference_dir)) & set(os.listdir(candidate_dir))):
+        if not file.endswith((".csv", ".bin")):
+            continue
+        try:
+            differences.append(
+                compare_outputs(os.path.join(reference_dir, file), os.path.join(candidate_dir, file))
+            )
+        except Exception as e:
+            print(f"Error processing {file}: {e}")
+    return pd.DataFrame([asdict(difference) for difference in differences])
+
+
+def main(reference_dir: str, candidate_dir: str, tolerance: float = DEFAULT_TOLERANCE) -> bool:
+    """Print the differences, and whether every output is within tolerance."""
+    df = compare_folders(reference_dir, candidate_dir)
+    if df.empty:
+        print(f"No outputs in common between {reference_dir} and {candidate_dir}")
+        return False
+
+    with pd.option_context("display.max_colwidth", 60, "display.width", 200):
+        print(df.to_string(index=False, float_format=lambda x: f"{x:.3e}"))
+
+    within = bool((df["relative_r"] <= tolerance).all())
+    print(f"Largest relative difference {df['relative_r'].max():.3e} ({'within' if within else 'above'} {tolerance:g})")
+    return within
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare double precision outputs against BigDecimal ones.")
+    parser.add_argument("--reference-dir", required=True, help="Outputs of --precision bigdecimal")
+    parser.add_argument("--candidate-dir", required=True, help="Outputs of --precision double")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Largest relative difference in r accepted")
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+    enable_from_args(args)
+
+    sys.exit(0 if main(args.reference_dir, args.candidate_dir, args.tolerance) else 1)
@@ -0,0 +1,271 @@
+import atexit
+import contextlib
+import cProfile
+import csv
+import functools
+import inspect
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+
+# TP4_PROFILE=1 records every stage, TP4_PROFILE=cprofile also keeps a
+# cProfile dump of the slowest top-level stage
+PROFILE_ENV = "TP4_PROFILE"
+PROFILE_DIR_ENV = "TP4_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = "./profiles"
+
+
+@dataclass
+class StageRecord:
+    stage: str
+    name: str
+    file: Optional[str]
+    depth: int
+    wall_time: float  # [s]
+    cpu_time: float  # [s], this process only
+    # Same, without the time spent in nested stages
+    self_wall_time: float
+    self_cpu_time: float
+    peak_memory: int  # [bytes] traced by tracemalloc while the stage ran
+    max_rss: int  # [bytes] of the process when the stage ended
+    # False when it ran inside another stage of the same kind
+    outermost: bool
+
+
+@dataclass
+class _Running:
+    kind: str
+    started_wall: float
+    started_cpu: float
+    # Largest peak of the stages nested in this one: they reset the tracemalloc peak
+    nested_peak: int = 0
+    nested_wall: float = 0.0
+    nested_cpu: float = 0.0
+    profile: Optional[cProfile.Profile] = None
+
+
+@dataclass
+class _Profiler:
+    cprofile: bool
+    records: list[StageRecord] = field(default_factory=list)
+    running: list[_Running] = field(default_factory=list)
+    slowest: Optional[tuple[float, str, cProfile.Profile]] = None
+
+
+_profiler: Optional[_Profiler] = None
+
+
+def enabled() -> bool:
+    return _profiler is not None
+
+
+def _max_rss() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+@contextlib.contextmanager
+def stage(kind: str, name: Optional[str] = None, file: Optional[str] = None):
+    """Record wall time, CPU time and peak memory of the block when profiling is on."""
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+
+    if profiler.running:
+        profiler.running[-1].nested_peak = max(
+            profiler.running[-1].nested_peak, tracemalloc.get_traced_memory()[1]
+        )
+    tracemalloc.reset_peak()
+    outermost = all(other.kind != kind for other in profiler.running)
+    running = _Running(kind=kind, started_wall=time.perf_counter(), started_cpu=time.process_time())
+    # cProfile cannot be nested: only the outermost stages are profiled
+    if profiler.cprofile and not profiler.running:
+        running.profile = cProfile.Profile()
+        running.profile.enable()
+    profiler.running.append(running)
+
+    try:
+        yield
+    finally:
+        if running.profile is not None:
+            running.profile.disable()
+        wall_time = time.perf_counter() - running.started_wall
+        cpu_time = time.process_time() - running.started_cpu
+        peak = max(tracemalloc.get_traced_memory()[1], running.nested_peak)
+        profiler.running.pop()
+        if profiler.running:
+            parent = profiler.running[-1]
+            parent.nested_peak = max(parent.nested_peak, peak)
+            parent.nested_wall += wall_time
+            parent.nested_cpu += cpu_time
+
+        name = name or kind
+        profiler.records.append(
+            StageRecord(
+                stage=kind,
+                name=name,
+                file=os.path.basename(file) if file else None,
+                depth=len(profiler.running),
+                wall_time=wall_time,
+                cpu_time=cpu_time,
+                self_wall_time=wall_time - running.nested_wall,
+                self_cpu_time=cpu_time - running.nested_cpu,
+                peak_memory=peak,
+                max_rss=_max_rss(),
+                outermost=outermost,
+            )
+        )
+        if running.profile is not None and (
+            profiler.slowest is None or wall_time > profiler.slowest[0]
+        ):
+            profiler.slowest = (wall_time, name, running.profile)
+
+
+def _file_argument(signature: inspect.Signature, argument: str, args, kwargs) -> Optional[str]:
+    try:
+        value = signature.bind_partial(*args, **kwargs).arguments.get(argument)
+    except TypeError:
+        return None
+    # Outputs remember the file they were read from
+    value = getattr(value, "path", value)
+    return value if isinstance(value, str) else None
+
+
+def profiled(kind: str, file: Optional[str] = None) -> Callable:
+    """
+    Run the decorated function as a stage of the given kind. file names the
+    argument holding the input file (a path, or an Output read from one), to
+    break the report down per file.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return function(*args, **kwargs)
+            path = _file_argument(signature, file, args, kwargs) if file else None
+            with stage(kind, function.__qualname__, path):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _patch_savefig():
+    """Every savefig, whichever script calls it, is a save stage."""
+    from matplotlib.figure import Figure
+
+    savefig = Figure.savefig
+    if getattr(savefig, "__wrapped__", None) is not None:
+        return
+
+    @functools.wraps(savefig)
+    def wrapper(self, fname, *args, **kwargs):
+        with stage("save", "savefig", fname if isinstance(fname, (str, os.PathLike)) else None):
+            return savefig(self, fname, *args, **kwargs)
+
+    Figure.savefig = wrapper
+
+
+def enable(cprofile: bool = False, output_dir: Optional[str] = None):
+    """
+    Start recording stages and write the report when the script exits. Worker
+    processes (sweep, parallel renders) are not recorded: set SWEEP_WORKERS=1
+    to get per-file records of the summaries.
+    """
+    global _profiler
+    if _profiler is not None or multiprocessing.parent_process() is not None:
+        return
+    _profiler = _Profiler(cprofile=cprofile)
+    tracemalloc.start()
+    os.register_at_fork(after_in_child=_disable)
+    _patch_savefig()
+    output_dir = output_dir or os.environ.get(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR)
+    atexit.register(write_report, output_dir)
+
+
+def _disable():
+    global _profiler
+    if _profiler is not None:
+        _profiler = None
+        tracemalloc.stop()
+
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profile", action="store_true", help=f"Record time and memory per stage (same as {PROFILE_ENV}=1)")
+    parser.add_argument("--cprofile", action="store_true", help="With --profile, also dump a cProfile of the slowest stage")
+
+
+def enable_from_args(args):
+    if args.profile or args.cprofile:
+        enable(cprofile=args.cprofile)
+
+
+def summary(records: list[StageRecord]) -> dict[str, dict[str, float]]:
+    """
+    Totals per stage kind. The self times of all kinds add up to the profiled
+    time: a plot stage that loads its data does not count the load again.
+    """
+    totals = {}
+    for record in records:
+        total = totals.setdefault(
+            record.stage,
+            {"self_wall_time": 0.0, "self_cpu_time": 0.0, "wall_time": 0.0, "peak_memory": 0, "count": 0},
+        )
+        total["self_wall_time"] += record.self_wall_time
+        total["self_cpu_time"] += record.self_cpu_time
+        total["peak_memory"] = max(total["peak_memory"], record.peak_memory)
+        if record.outermost:
+            total["wall_time"] += record.wall_time
+            total["count"] += 1
+    return totals
+
+
+def write_report(output_dir: str = DEFAULT_PROFILE_DIR) -> Optional[str]:
+    """JSON and CSV of every recorded stage, plus the cProfile dump if any."""
+    if _profiler is None or not _profiler.records:
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+    script = sys.argv[0] if sys.argv[0] not in ("", "-c") else "python"
+    script = os.path.splitext(os.path.basename(script))[0]
+    base = os.path.join(output_dir, f"{script}_{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+
+    records = [asdict(record) for record in _profiler.records]
+    totals = summary(_profiler.records)
+    report = {"script": script, "argv": sys.argv, "stages": totals, "records": records}
+    if _profiler.slowest is not None:
+        wall_time, name, profile = _profiler.slowest
+        report["cprofile"] = {"stage": name, "wall_time": wall_time, "file": base + ".prof"}
+        profile.dump_stats(base + ".prof")
+
+    with open(base + ".json", "w") as file:
+        json.dump(report, file, indent=2)
+    with open(base + ".csv", "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+
+    for kind in sorted(totals, key=lambda kind: -totals[kind]["self_wall_time"]):
+        total = totals[kind]
+        print(
+            f"[profile] {kind:<8} {total['self_wall_time']:10.3f} s wall {total['self_cpu_time']:10.3f} s cpu "
+            f"{total['peak_memory'] / 2**20:9.1f} MiB peak ({total['count']} calls)"
+        )
+    print(f"[profile] Report saved to {base}.json")
+    return base + ".json"
+
+
+if os.environ.get(PROFILE_ENV, "0") not in ("", "0"):
+    enable(cprofile=os.environ[PROFILE_ENV].lower() == "cprofile")
@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from loader import DEFAULT_CHUNK_ROWS, block_starts, iter_snapshots
+from profiling import profiled
+
+
+@dataclass
+class SnapshotExtrema:
+    """min/max of a column for every saved time of a coupled-chain output."""
+
+    time: np.ndarray
+    r_min: np.ndarray
+    r_max: np.ndarray
+
+    @property
+    def peak_to_peak(self) -> np.ndarray:
+        return self.r_max - self.r_min
+
+    def peak_to_peak_series(self) -> pd.Series:
+        return pd.Series(self.peak_to_peak, index=pd.Index(self.time, name="time"))
+
+
+@dataclass
+class ParticleEnvelopes:
+    """min/max of a column for every particle over the whole run."""
+
+    id: np.ndarray
+    r_min: np.ndarray
+    r_max: np.ndarray
+
+
+def _sorted(keys: np.ndarray, values: np.ndarray):
+    if len(keys) > 1 and np.any(keys[1:] < keys[:-1]):
+        order = np.argsort(keys, kind="stable")
+        return keys[order], values[order]
+    return keys, values
+
+
+def reduce_extrema(keys: np.ndarray, values: np.ndarray):
+    """
+    Group values by key with one sort (skipped when keys are already ordered,
+    as in the simulation outputs) and a min/max reduceat over each block.
+    """
+    keys, values = _sorted(np.asarray(keys), np.asarray(values, dtype=np.float64))
+    starts = block_starts(keys)
+    if len(starts) == 0:
+        empty = np.empty(0, dtype=np.float64)
+        return keys[:0], empty, empty
+    return (
+        keys[starts],
+        np.minimum.reduceat(values, starts),
+        np.maximum.reduceat(values, starts),
+    )
+
+
+# Buckets per pixel of downsample_for_plot: with half-pixel buckets the
+# antialiased line differs from the full-resolution one by a few levels at most
+BUCKETS_PER_PIXEL = 2
+
+
+def downsample_for_plot(
+    x: np.ndarray, y: np.ndarray, pixels: int, x_range: Optional[tuple[float, float]] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The samples of a line that can still change how it is drawn pixels wide:
+    the first, last, min and max of every bucket of x, in x order, so peaks
+    are kept exactly. x must be ascending. With x_range only the visible
+    samples are reduced, plus one on each side for the line to reach the edges.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    if x_range is not None:
+        start = max(int(np.searchsorted(x, x_range[0], side="left")) - 1, 0)
+        stop = min(int(np.searchsorted(x, x_range[1], side="right")) + 1, len(x))
+        x, y = x[start:stop], y[start:stop]
+    buckets = BUCKETS_PER_PIXEL * pixels
+    if len(x) <= 4 * buckets:
+        return x, y
+
+    left, right = (x[0], x[-1]) if x_range is None else x_range
+    if not right > left:
+        return x, y
+    # Samples outside x_range fall in the -1 and buckets columns
+    columns = np.clip(np.floor((x - left) / (right - left) * buckets), -1, buckets).astype(np.int64)
+    starts = block_starts(columns)
+    lengths = np.diff(np.append(starts, len(x)))
+    block = np.repeat(np.arange(len(starts)), lengths)
+
+    keep = [starts, starts + lengths - 1]
+    for reduce in (np.minimum, np.maximum):
+        extreme = np.flatnonzero(y == np.repeat(reduce.reduceat(y, starts), lengths))
+        # First sample of each column equal to its min (max)
+        keep.append(extreme[block_starts(block[extreme])])
+    keep = np.unique(np.concatenate(keep))
+    return x[keep], y[keep]
+
+
+def _time_column(df: pd.DataFrame) -> np.ndarray:
+    if "time" in df.columns:
+        return df["time"].to_numpy()
+    return df.index.to_numpy()
+
+
+def snapshot_extrema(df: pd.DataFrame, column: str = "r") -> SnapshotExtrema:
+    """
+    Per-snapshot min/max of column. df is a long-format output with a time
+    column (or index) and one row per particle.
+    """
+    time, r_min, r_max = reduce_extrema(_time_column(df), df[column].to_numpy())
+    return SnapshotExtrema(time=time, r_min=r_min, r_max=r_max)
+
+
+def peak_to_peak_per_time(df: pd.DataFrame, column: str = "r") -> pd.Series:
+    """max - min of column for every saved time, indexed by time."""
+    return snapshot_extrema(df, column).peak_to_peak_series()
+
+
+def particle_envelopes(df: pd.DataFrame, column: str = "r") -> ParticleEnvelopes:
+    ids, r_min, r_max = reduce_extrema(df["id"].to_numpy(), df[column].to_numpy())
+    return ParticleEnvelopes(id=ids, r_min=r_min, r_max=r_max)
+
+
+def _trajectory_columns(column: str):
+    return lambda name: name in ("step", "time", "id", column)
+
+
+@profiled("compute", file="filepath")
+def stream_snapshot_extrema(
+    filepath: str,
+    column: str = "r",
+    snapshots_per_batch: int = 1000,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> SnapshotExtrema:
+    """snapshot_extrema of an output file, reading it in bounded batches."""
+    parts = [
+        snapshot_extrema(batch, column)
+        for batch in iter_snapshots(
+            filepath,
+            snapshots_per_batch=snapshots_per_batch,
+            chunk_rows=chunk_rows,
+            usecols=_trajectory_columns(column),
+        )
+    ]
+    if not parts:
+        empty = np.empty(0, dtype=np.float64)
+        return SnapshotExtrema(time=empty, r_min=empty, r_max=empty)
+    return SnapshotExtrema(
+        time=np.concatenate([part.time for part in parts]),
+        r_min=np.concatenate([part.r_min for part in parts]),
+        r_max=np.concatenate([part.r_max for part in parts]),
+    )
+
+
+@dataclass(frozen=True)
+class ColumnSummary:
+    min: float
+    max: float
+    rows: int
+
+
+def stream_column_summary(
+    filepath: str, column: str = "r", chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> ColumnSummary:
+    """min, max and row count of column over a whole output, in bounded chunks."""
+    low, high, rows = np.inf, -np.inf, 0
+    for batch in iter_snapshots(
+        filepath,
+        snapshots_per_batch=chunk_rows,
+        chunk_rows=chunk_rows,
+        usecols=_trajectory_columns(column),
+    ):
+        if column not in batch.columns:
+            raise KeyError(column)
+        values = batch[column].to_numpy()
+        if len(values):
+            low = min(low, float(values.min()))
+            high = max(high, float(values.max()))
+            rows += len(values)
+    return ColumnSummary(min=low, max=high, rows=rows)
+
+
+def stream_column_range(
+    filepath: str, column: str = "r", chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> tuple[float, float]:
+    """(min, max) of column over a whole output, reading it in bounded chunks."""
+    summary = stream_column_summary(filepath, column, chunk_rows)
+    return summary.min, summary.max
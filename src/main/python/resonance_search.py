@@ -0,0 +1,298 @@
+import argparse
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import scipy.optimize
+
+from integrators import COUPLED_NAMES, coupled_file_name, coupled_settings, run_coupled
+from sweep import DEFAULT_WORKERS, summarize_run
+from profiling import add_profile_arguments, enable_from_args, profiled
+
+PLOTS_DIR = "./graphics"
+OUTPUT_DIR = "./output"
+# Same values as run_system2.sh and CoupledOscillatorCommand.generateKValues
+DEFAULT_WS = [1.737, 1.842, 1.947, 2.053, 2.158, 2.263]
+DEFAULT_KS = [1e2, 1e3, 1.8e3, 3.2e3, 1e4]
+# Frequencies are rounded to this many decimals: it is the resolution of the
+# search and keeps the w- part of the file names short
+W_DECIMALS = 4
+# Coarse spacings added past the edge of the grid when the peak is on it
+MAX_EXPANSIONS = 5
+# Gradle project root, and the launcher its installDist task writes
+# (named after rootProject.name)
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+KOTLIN_CLI = os.path.join(PROJECT_DIR, "build", "install", "Time-Step-Molecular-Dynamics", "bin", "Time-Step-Molecular-Dynamics")
+
+
+@dataclass(frozen=True)
+class ChainParameters:
+    """Everything but k and w, as given to the coupled-oscillator command."""
+
+    number_of_particles: int = 1000
+    spring_length: float = 0.001
+    mass: float = 0.00021
+    gamma: float = 0.0003
+    final_time: float = 15.0
+    delta_t: float = 0.001
+    amplitude: float = 0.01
+    seed: int = 1743645648280
+    algorithm: str = "beeman"
+
+    def settings_kwargs(self) -> dict:
+        return dict(
+            number_of_particles=self.number_of_particles,
+            spring_length=self.spring_length,
+            mass=self.mass,
+            gamma=self.gamma,
+            final_time=self.final_time,
+            delta_t=self.delta_t,
+            amplitude=self.amplitude,
+            seed=self.seed,
+        )
+
+
+def output_file(params: ChainParameters, k: float, w: float) -> str:
+    settings = coupled_settings(w, k=k, **params.settings_kwargs())
+    return coupled_file_name(COUPLED_NAMES[params.algorithm], settings)
+
+
+@lru_cache(maxsize=1)
+def install_kotlin_cli() -> str:
+    """
+    Build the Kotlin CLI once with installDist, so every run afterwards is a
+    plain process instead of a gradle invocation.
+    """
+    subprocess.run([os.path.join(PROJECT_DIR, "gradlew"), "installDist", "--quiet"], cwd=PROJECT_DIR, check=True)
+    return KOTLIN_CLI
+
+
+def _run_kotlin(folder: str, params: ChainParameters, k: float, w: float):
+    if not os.path.exists(KOTLIN_CLI):
+        raise FileNotFoundError(f"{KOTLIN_CLI} not found, build it with install_kotlin_cli()")
+    subprocess.run(
+        [
+            KOTLIN_CLI,
+            "coupled-oscillator",
+            "-m", str(params.mass),
+            "-k", str(k),
+            "-y", str(params.gamma),
+            "-A", str(params.amplitude),
+            "-t", str(params.final_time),
+            "-dt", str(params.delta_t),
+            "-N", str(params.number_of_particles),
+            "-l", str(params.spring_length),
+            "-w", str(w),
+            "-a", params.algorithm,
+            "-s", str(params.seed),
+            "--output-directory", os.path.abspath(folder),
+        ],
+        check=True,
+    )
+
+
+def evaluate(folder: str, params: ChainParameters, k: float, w: float, backend: str) -> tuple[str, Optional[float]]:
+    """
+    Amplitude of the (k, w) run, as the steady-state plots measure it.
+    The simulation is only launched when its output is not in folder yet.
+    """
+    file = output_file(params, k, w)
+    if not os.path.exists(os.path.join(folder, file)):
+        if backend == "kotlin":
+            _run_kotlin(folder, params, k, w)
+        else:
+            run_coupled(folder, w, params.algorithm, k=k, **params.settings_kwargs())
+    return file, summarize_run(folder, file).amplitude
+
+
+@dataclass
+class ResonanceSearch:
+    k: float
+    # Every evaluated (w, amplitude, file), in evaluation order
+    points: list[tuple[float, float, str]] = field(default_factory=list)
+
+    @property
+    def w0(self) -> float:
+        return max(self.points, key=lambda point: point[1])[0]
+
+    @property
+    def max_amplitude(self) -> float:
+        return max(point[1] for point in self.points)
+
+
+class _Evaluator:
+    """Memoized amplitude(w) for one k, recording every new evaluation."""
+
+    def __init__(self, search: ResonanceSearch, folder: str, params: ChainParameters, backend: str):
+        self.search = search
+        self.folder = folder
+        self.params = params
+        self.backend = backend
+        self.cache = {point[0]: point[1] for point in search.points}
+
+    def record(self, w: float, file: str, amplitude: Optional[float]):
+        if amplitude is None:
+            raise ValueError(f"{file} has no r column")
+        self.cache[w] = amplitude
+        self.search.points.append((w, amplitude, file))
+
+    def __call__(self, w: float) -> float:
+        w = round(float(w), W_DECIMALS)
+        if w not in self.cache:
+            file, amplitude = evaluate(self.folder, self.params, self.search.k, w, self.backend)
+            self.record(w, file, amplitude)
+        return self.cache[w]
+
+    def evaluate_all(self, ws: list[float], workers: int):
+        """Coarse pass: the missing frequencies are simulated in parallel."""
+        missing = sorted({round(float(w), W_DECIMALS) for w in ws} - set(self.cache))
+        if workers <= 1 or len(missing) <= 1:
+            for w in missing:
+                self(w)
+            return
+        with ProcessPoolExecutor(max_workers=min(workers, len(missing))) as executor:
+            futures = [
+                (w, executor.submit(evaluate, self.folder, self.params, self.search.k, w, self.backend))
+                for w in missing
+            ]
+            for w, future in futures:
+                self.record(w, *future.result())
+
+
+@profiled("compute")
+def search_resonance(
+    k: float,
+    ws: list[float],
+    folder: str = OUTPUT_DIR,
+    params: ChainParameters = ChainParameters(),
+    backend: str = "python",
+    tolerance: float = 10 ** -W_DECIMALS,
+    workers: Optional[int] = None,
+) -> ResonanceSearch:
+    """
+    Locate the w of largest amplitude for k: a coarse pass over ws brackets
+    the peak (the grid is extended while the peak sits on one of its
+    edges) and Brent's method refines it down to tolerance.
+    """
+    workers = DEFAULT_WORKERS if workers is None else workers
+    if backend == "kotlin":
+        install_kotlin_cli()
+    search = ResonanceSearch(k=k)
+    amplitude = _Evaluator(search, folder, params, backend)
+
+    grid = sorted(round(float(w), W_DECIMALS) for w in ws)
+    if len(grid) < 2:
+        raise ValueError("The coarse pass needs at least two frequencies")
+    amplitude.evaluate_all(grid, workers)
+
+    spacing = (grid[-1] - grid[0]) / (len(grid) - 1)
+    for _ in range(MAX_EXPANSIONS):
+        best = int(np.argmax([amplitude(w) for w in grid]))
+        if best == 0 and grid[0] - spacing > 0:
+            grid.insert(0, round(grid[0] - spacing, W_DECIMALS))
+        elif best == len(grid) - 1:
+            grid.append(round(grid[-1] + spacing, W_DECIMALS))
+        else:
+            break
+        amplitude.evaluate_all(grid, workers)
+
+    best = int(np.argmax([amplitude(w) for w in grid]))
+    if 0 < best < len(grid) - 1:
+        scipy.optimize.minimize_scalar(
+            lambda w: -amplitude(w),
+            bracket=(grid[best - 1], grid[best], grid[best + 1]),
+            method="brent",
+            tol=tolerance / max(grid[best], 1.0),
+        )
+    else:
+        print(f"k={k}: peak not bracketed after {MAX_EXPANSIONS} expansions, keeping w={grid[best]}")
+
+    return search
+
+
+def points_frame(searches: list[ResonanceSearch]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {"k": search.k, "evaluation": i, "w": w, "amplitude": amplitude, "file": file}
+            for search in searches
+            for i, (w, amplitude, file) in enumerate(search.points)
+        ]
+    )
+
+
+@profiled("plot")
+def plot_searches(searches: list[ResonanceSearch]):
+    plt.figure(figsize=(12, 7))
+    colors = plt.cm.viridis(np.linspace(0, 1, len(searches)))
+    for search, color in zip(searches, colors):
+        ws, amplitudes = zip(*sorted((w, a) for w, a, _ in search.points))
+        plt.plot(ws, amplitudes, linestyle="-", marker="o", color=color, label=f"k = {search.k}")
+        plt.scatter([search.w0], [search.max_amplitude], color="red", s=120, marker="*", zorder=10)
+    plt.xlabel(r"$\omega$ [rad/s]")
+    plt.ylabel(r"$A_{max}$ [m]")
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    os.makedirs(PLOTS_DIR, exist_ok=True)
+    plt.savefig(f"{PLOTS_DIR}/resonance_search.png", bbox_inches="tight", dpi=300)
+    plt.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find w0 for every k with a coarse pass and a Brent refinement."
+    )
+
+    def to_floats(text: str) -> list[float]:
+        return [float(value) for value in text.split(",")]
+
+    parser.add_argument("-k", type=to_floats, default=DEFAULT_KS, help="Spring constants (Could be a list, ej: 100,1000)")
+    parser.add_argument("-w", type=to_floats, default=DEFAULT_WS, help="Coarse angular frequencies")
+    parser.add_argument("-m", "--mass", type=float, default=ChainParameters.mass)
+    parser.add_argument("-y", "--gamma", type=float, default=ChainParameters.gamma)
+    parser.add_argument("-A", "--amplitude", type=float, default=ChainParameters.amplitude)
+    parser.add_argument("-t", "--simulation-time", type=float, default=ChainParameters.final_time)
+    parser.add_argument("-dt", "--deltaT", type=float, default=ChainParameters.delta_t)
+    parser.add_argument("-N", "--number-of-particles", type=int, default=ChainParameters.number_of_particles)
+    parser.add_argument("-l", "--spring-length", type=float, default=ChainParameters.spring_length)
+    parser.add_argument("-s", "--seed", type=int, default=ChainParameters.seed)
+    parser.add_argument("-a", "--algorithm", choices=COUPLED_NAMES, default=ChainParameters.algorithm)
+    parser.add_argument("--backend", choices=("python", "kotlin"), default="python", help="integrators.py or the Kotlin CLI, built once with gradlew installDist")
+    parser.add_argument("--tolerance", type=float, default=10 ** -W_DECIMALS, help="Resolution of w0 [rad/s]")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output-directory", default=OUTPUT_DIR)
+
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+    enable_from_args(args)
+    params = ChainParameters(
+        number_of_particles=args.number_of_particles,
+        spring_length=args.spring_length,
+        mass=args.mass,
+        gamma=args.gamma,
+        final_time=args.simulation_time,
+        delta_t=args.deltaT,
+        amplitude=args.amplitude,
+        seed=args.seed,
+        algorithm=args.algorithm,
+    )
+    os.makedirs(args.output_directory, exist_ok=True)
+
+    searches = []
+    for k in args.k:
+        search = search_resonance(
+            k, args.w, args.output_directory, params, args.backend, args.tolerance, args.workers
+        )
+        print(f"k={k}: w0={search.w0} A_max={search.max_amplitude:.6e} ({len(search.points)} evaluations)")
+        searches.append(search)
+
+    os.makedirs(PLOTS_DIR, exist_ok=True)
+    points_frame(searches).to_csv(f"{PLOTS_DIR}/resonance_search_points.csv", index=False)
+    plot_searches(searches)
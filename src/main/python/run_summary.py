@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class RunSummary:
+    """Per-output statistics of a coupled run, as summarize_run computes them."""
+
+    file: str
+    w: Optional[float]
+    k: Optional[float]
+    # None when the output has no r column
+    min_r: Optional[float]
+    max_r: Optional[float]
+    rows: int
+
+    @property
+    def amplitude(self) -> Optional[float]:
+        if self.min_r is None or self.max_r is None:
+            return None
+        return (self.max_r - self.min_r) / 2  # Half peak-to-peak
@@ -0,0 +1,259 @@
+import io
+import os
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from loader import DEFAULT_CHUNK_ROWS, HEADER_ROWS, block_starts, read_header, time_from_steps
+from profiling import profiled
+
+# Stored next to the output: "<output>.csv" -> "<output>.csv.idx.npz"
+INDEX_SUFFIX = ".idx.npz"
+# Bump when the index layout changes, to rebuild stale sidecars
+INDEX_VERSION = 1
+# Bytes read per block while looking for line starts
+BLOCK_BYTES = 1 << 24
+
+
+@dataclass
+class SnapshotIndex:
+    """
+    Byte offset and row count of every saved snapshot of an output. key holds
+    the step (or, in older outputs, the time) of each snapshot and offset has
+    one extra entry, the end of the table, so snapshot i spans the bytes
+    offset[i]:offset[i + 1].
+    """
+
+    key_name: str
+    key: np.ndarray
+    offset: np.ndarray
+    rows: np.ndarray
+    table_header: bytes
+    delta_t: Optional[Decimal] = None
+
+    def __len__(self) -> int:
+        return len(self.key)
+
+    @property
+    def time(self) -> np.ndarray:
+        if self.key_name == "step":
+            return time_from_steps(self.key, self.delta_t).hi
+        return self.key
+
+    def window(self, t_start: float = -np.inf, t_end: float = np.inf) -> np.ndarray:
+        """Positions of the snapshots with t_start <= time <= t_end."""
+        time = self.time
+        return np.arange(
+            np.searchsorted(time, t_start, side="left"),
+            np.searchsorted(time, t_end, side="right"),
+        )
+
+
+def index_path(filepath: str) -> str:
+    return filepath + INDEX_SUFFIX
+
+
+def _identity(filepath: str) -> tuple[int, int]:
+    stat = os.stat(filepath)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _line_starts(filepath: str, first_line: int) -> Iterator[np.ndarray]:
+    """Byte offset of every line from line number first_line (>= 1) on, in blocks."""
+    with open(filepath, "rb") as file:
+        position = 0
+        # Newline i is followed by the start of line i + 1
+        pending = first_line - 1
+        for block in iter(lambda: file.read(BLOCK_BYTES), b""):
+            # A line starts right after every newline
+            starts = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10) + position + 1
+            position += len(block)
+            if pending:
+                skipped = min(pending, len(starts))
+                starts = starts[skipped:]
+                pending -= skipped
+            yield starts
+
+
+def build_index(filepath: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> SnapshotIndex:
+    """
+    Scan an output once: the snapshot keys are parsed by pandas and the line
+    offsets by a newline search over raw blocks, both in bounded chunks.
+    Relies on the simulation writing every snapshot contiguously.
+    """
+    from binary_output import is_binary_output
+
+    if is_binary_output(filepath):
+        # Fixed-size records are addressed directly: binary_output.read_binary
+        raise ValueError(f"{filepath} is a binary output, only CSV outputs are indexed")
+
+    header = read_header(filepath)
+    with open(filepath, "rb") as file:
+        for _ in range(HEADER_ROWS):
+            file.readline()
+        table_header = file.readline()
+    key_name = "step" if b"step" in table_header.strip().split(b",") else "time"
+
+    keys, offsets, rows = [], [], []
+    last_key, last_rows = None, None
+    # Parameters header and values, then the table header
+    line_starts = _line_starts(filepath, HEADER_ROWS + 1)
+    buffered = []
+    available = 0
+    with pd.read_csv(
+        filepath,
+        sep=",",
+        header=0,
+        index_col=None,
+        skiprows=HEADER_ROWS,
+        usecols=[key_name],
+        chunksize=chunk_rows,
+    ) as reader:
+        for chunk in reader:
+            chunk_keys = chunk[key_name].to_numpy()
+            while available < len(chunk_keys):
+                starts = next(line_starts)
+                buffered.append(starts)
+                available += len(starts)
+            chunk_starts = np.concatenate(buffered)
+            buffered = [chunk_starts[len(chunk_keys):]]
+            available -= len(chunk_keys)
+            chunk_starts = chunk_starts[: len(chunk_keys)]
+
+            starts = block_starts(chunk_keys)
+            counts = np.diff(np.append(starts, len(chunk_keys)))
+            # The first snapshot of a chunk may continue the previous one
+            if len(starts) and last_key == chunk_keys[0]:
+                last_rows[-1] += counts[0]
+                starts, counts = starts[1:], counts[1:]
+            if len(starts):
+                keys.append(chunk_keys[starts])
+                offsets.append(chunk_starts[starts])
+                rows.append(counts)
+                last_key, last_rows = keys[-1][-1], rows[-1]
+
+    # The table ends where the line after its last row starts
+    leftover = np.concatenate(buffered) if buffered else np.empty(0, dtype=np.int64)
+    while len(leftover) == 0:
+        leftover = next(line_starts, None)
+        if leftover is None:
+            # Last row without a trailing newline
+            leftover = np.array([os.path.getsize(filepath)])
+    end = int(leftover[0])
+
+    empty = np.empty(0, dtype=np.int64)
+    return SnapshotIndex(
+        key_name=key_name,
+        key=np.concatenate(keys) if keys else empty,
+        offset=np.append(np.concatenate(offsets) if offsets else empty, end).astype(np.int64),
+        rows=np.concatenate(rows).astype(np.int64) if rows else empty,
+        table_header=table_header,
+        delta_t=Decimal(header["dT"]) if key_name == "step" else None,
+    )
+
+
+def _save(index: SnapshotIndex, filepath: str):
+    size, mtime_ns = _identity(filepath)
+    tmp = index_path(filepath) + ".tmp"
+    with open(tmp, "wb") as file:
+        np.savez(
+            file,
+            version=INDEX_VERSION,
+            size=size,
+            mtime_ns=mtime_ns,
+            key_name=index.key_name,
+            key=index.key,
+            offset=index.offset,
+            rows=index.rows,
+            table_header=np.frombuffer(index.table_header, dtype=np.uint8),
+            delta_t=str(index.delta_t) if index.delta_t is not None else "",
+        )
+    os.replace(tmp, index_path(filepath))
+
+
+def _load(filepath: str) -> Optional[SnapshotIndex]:
+    try:
+        stored = np.load(index_path(filepath))
+    except (OSError, ValueError):
+        return None
+    with stored:
+        if (
+            int(stored["version"]) != INDEX_VERSION
+            or (int(stored["size"]), int(stored["mtime_ns"])) != _identity(filepath)
+        ):
+            return None
+        delta_t = str(stored["delta_t"])
+        return SnapshotIndex(
+            key_name=str(stored["key_name"]),
+            key=stored["key"],
+            offset=stored["offset"],
+            rows=stored["rows"],
+            table_header=stored["table_header"].tobytes(),
+            delta_t=Decimal(delta_t) if delta_t else None,
+        )
+
+
+@profiled("load", file="filepath")
+def load_index(filepath: str, use_cache: bool = True) -> SnapshotIndex:
+    """
+    SnapshotIndex of an output, read from its sidecar file. The sidecar is
+    (re)built when missing or when the output changed size or mtime.
+    """
+    index = _load(filepath) if use_cache else None
+    if index is None:
+        index = build_index(filepath)
+        if use_cache:
+            _save(index, filepath)
+    return index
+
+
+@profiled("load", file="filepath")
+def read_snapshots(
+    filepath: str,
+    positions: np.ndarray,
+    index: Optional[SnapshotIndex] = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Trajectory table rows of the snapshots at the given positions of the
+    index, like read_trajectory, reading only their bytes from disk.
+    """
+    index = load_index(filepath) if index is None else index
+    positions = np.unique(np.asarray(positions, dtype=np.intp))
+
+    # Consecutive snapshots are contiguous in the file: one read per run
+    buffer = io.BytesIO()
+    buffer.write(index.table_header)
+    with open(filepath, "rb") as file:
+        for run in np.split(positions, np.flatnonzero(np.diff(positions) != 1) + 1):
+            if len(run) == 0:
+                continue
+            start, end = index.offset[run[0]], index.offset[run[-1] + 1]
+            file.seek(start)
+            chunk = file.read(end - start)
+            buffer.write(chunk)
+            if not chunk.endswith(b"\n"):
+                buffer.write(b"\n")
+    buffer.seek(0)
+
+    df = pd.read_csv(buffer, sep=",", header=0, index_col=None, **kwargs)
+    if "step" in df.columns and "time" not in df.columns:
+        df.insert(0, "time", time_from_steps(df["step"].to_numpy(), index.delta_t).hi)
+    return df
+
+
+def read_window(
+    filepath: str,
+    t_start: float = -np.inf,
+    t_end: float = np.inf,
+    every: int = 1,
+    **kwargs,
+) -> pd.DataFrame:
+    """Every k-th snapshot with t_start <= time <= t_end, without reading the rest."""
+    if every < 1:
+        raise ValueError("every must be at least 1")
+    index = load_index(filepath)
+    return read_snapshots(filepath, index.window(t_start, t_end)[::every], index, **kwargs)
@@ -0,0 +1,170 @@
+import argparse
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from loader import read_header
+from summary_cache import load_summaries
+from sweep import is_w_output
+from profiling import add_profile_arguments, enable_from_args, profiled
+
+PLOTS_DIR = "./graphics"
+# Frequencies solved at once, bounds the (frequencies, particles) response array
+W_BATCH = 1024
+
+
+@lru_cache(maxsize=8)
+def chain_modes(n: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Eigenvalues and orthonormal eigenvectors (as columns) of the n x n
+    stiffness pattern tridiag(-1, 2, -1) of a chain fixed at both ends. They
+    do not depend on k, so one basis serves every (k, w).
+    """
+    j = np.arange(1, n + 1)
+    eigenvalues = 2 - 2 * np.cos(j * np.pi / (n + 1))
+    modes = np.sqrt(2 / (n + 1)) * np.sin(np.outer(j, j) * np.pi / (n + 1))
+    return eigenvalues, modes
+
+
+def steady_response(
+    ws: np.ndarray, k: float, mass: float, gamma: float, amplitude: float, n: int
+) -> np.ndarray:
+    """
+    Complex steady-state amplitude of the n integrated particles of
+    calculateCoupledAcceleration for each driving frequency in ws, as a
+    (frequencies, particles) array. Particle 0 is driven with A sin(wt) and
+    the last one is attached to a fixed wall:
+
+        (k T - m w^2 + i w gamma) X = k A e_0
+
+    solved in the eigenbasis of T.
+    """
+    ws = np.atleast_1d(np.asarray(ws, dtype=np.float64))
+    eigenvalues, modes = chain_modes(n)
+    # Projection of the driving force k A e_0 on every mode
+    forcing = k * amplitude * modes[0]
+
+    response = np.empty((len(ws), n), dtype=np.complex128)
+    for start in range(0, len(ws), W_BATCH):
+        w = ws[start:start + W_BATCH, np.newaxis]
+        modal = forcing / (k * eigenvalues - mass * w**2 + 1j * w * gamma)
+        response[start:start + W_BATCH] = modal @ modes.T
+    return response
+
+
+def steady_amplitudes(
+    ws: np.ndarray, k: float, mass: float, gamma: float, amplitude: float, n: int
+) -> np.ndarray:
+    """
+    Largest steady-state amplitude over the whole chain, driven particle
+    included, for each w: what half max-min of r measures once transients
+    have died out.
+    """
+    response = np.abs(steady_response(ws, k, mass, gamma, amplitude, n))
+    return np.maximum(response.max(axis=1), amplitude)
+
+
+@dataclass
+class ResonanceCurve:
+    k: float
+    w: np.ndarray
+    amplitude: np.ndarray
+
+    @property
+    def w0(self) -> float:
+        """Frequency of the largest amplitude of the curve."""
+        return float(self.w[np.argmax(self.amplitude)])
+
+    @property
+    def max_amplitude(self) -> float:
+        return float(self.amplitude.max())
+
+
+@profiled("compute")
+def resonance_curve(
+    ws: np.ndarray, k: float, mass: float, gamma: float, amplitude: float, n: int
+) -> ResonanceCurve:
+    ws = np.asarray(ws, dtype=np.float64)
+    return ResonanceCurve(k=k, w=ws, amplitude=steady_amplitudes(ws, k, mass, gamma, amplitude, n))
+
+
+def predicted_amplitude(filepath: str) -> float:
+    """Steady-state amplitude for the parameters of a coupled output header."""
+    header = read_header(filepath)
+    return float(
+        steady_amplitudes(
+            [float(header["w"])],
+            k=float(header["k"]),
+            mass=float(header["m"]),
+            gamma=float(header["y"]),
+            amplitude=float(header["A"]),
+            n=int(header["N"]),
+        )[0]
+    )
+
+
+@profiled("compute")
+def compare_with_outputs(folder: str):
+    """Time-domain amplitude of every w- output against the frequency-domain one."""
+    print(f"{'file':<60} {'simulated':>12} {'steady':>12} {'ratio':>8}")
+    for run in load_summaries(folder, is_w_output):
+        if run.amplitude is None:
+            continue
+        try:
+            steady = predicted_amplitude(os.path.join(folder, run.file))
+        except (KeyError, ValueError) as e:
+            print(f"Error processing {run.file}: {e}")
+            continue
+        print(f"{run.file[:60]:<60} {run.amplitude:12.6e} {steady:12.6e} {run.amplitude / steady:8.3f}")
+
+
+@profiled("plot")
+def plot_resonance_curves(curves: list[ResonanceCurve]):
+    plt.figure(figsize=(12, 7))
+    colors = plt.cm.viridis(np.linspace(0, 1, len(curves)))
+    for curve, color in zip(curves, colors):
+        plt.plot(curve.w, curve.amplitude, color=color, label=f"k = {curve.k}")
+        plt.scatter([curve.w0], [curve.max_amplitude], color="red", s=120, marker="*", zorder=10)
+    plt.xlabel(r"$\omega$ [rad/s]")
+    plt.ylabel(r"$A_{max}$ [m]")
+    plt.yscale("log")
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    os.makedirs(PLOTS_DIR, exist_ok=True)
+    plt.savefig(f"{PLOTS_DIR}/steady_state_amplitude_vs_w.png", bbox_inches="tight", dpi=300)
+    plt.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Steady-state response of the driven chain, without integrating it."
+    )
+    parser.add_argument("-k", type=lambda text: [float(k) for k in text.split(",")], default=[102.3], help="Spring constants (Could be a list, ej: 100,1000)")
+    parser.add_argument("-m", "--mass", type=float, default=0.00021)
+    parser.add_argument("-y", "--gamma", type=float, default=0.0003)
+    parser.add_argument("-A", "--amplitude", type=float, default=0.01)
+    parser.add_argument("-N", "--number-of-particles", type=int, default=1000, help="Particles, the driven one included")
+    parser.add_argument("--w-min", type=float, default=0.1)
+    parser.add_argument("--w-max", type=float, default=30.0)
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--compare", metavar="FOLDER", help="Compare with the time-domain outputs of FOLDER")
+
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+    enable_from_args(args)
+    ws = np.linspace(args.w_min, args.w_max, args.points)
+    curves = [
+        resonance_curve(ws, k, args.mass, args.gamma, args.amplitude, args.number_of_particles - 1)
+        for k in args.k
+    ]
+    for curve in curves:
+        print(f"k={curve.k}: w0={curve.w0:.6f} A_max={curve.max_amplitude:.6e}")
+    plot_resonance_curves(curves)
+
+    if args.compare:
+        compare_with_outputs(args.compare)
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+from typing import Callable, Optional
+
+from profiling import profiled
+from run_summary import RunSummary
+from sweep import summarize_run, sweep
+
+# Stored inside the outputs folder, ignored by the *.csv listings
+CACHE_FILENAME = ".run_summaries.sqlite"
+# Bump when RunSummary or summarize_run change meaning, to drop stale rows
+SCHEMA_VERSION = 1
+
+
+class SummaryCache:
+    """
+    On-disk table of RunSummary records for the outputs of one folder, keyed
+    by file name, size and mtime: a file that is rewritten is summarized again.
+    """
+
+    def __init__(self, folder: str, filename: str = CACHE_FILENAME):
+        self.folder = folder
+        self.connection = sqlite3.connect(os.path.join(folder, filename))
+        self._create_schema()
+
+    def _create_schema(self):
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        with self.connection:
+            if version != SCHEMA_VERSION:
+                self.connection.execute("DROP TABLE IF EXISTS run_summaries")
+                self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS run_summaries (
+                    file TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    w REAL,
+                    k REAL,
+                    min_r REAL,
+                    max_r REAL,
+                    rows INTEGER NOT NULL
+                )
+                """
+            )
+
+    def _identity(self, file: str) -> tuple[int, int]:
+        stat = os.stat(os.path.join(self.folder, file))
+        return stat.st_size, stat.st_mtime_ns
+
+    def get(self, file: str) -> Optional[RunSummary]:
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, w, k, min_r, max_r, rows"
+            " FROM run_summaries WHERE file = ?",
+            (file,),
+        ).fetchone()
+        if row is None or tuple(row[:2]) != self._identity(file):
+            return None
+        w, k, min_r, max_r, rows = row[2:]
+        return RunSummary(file=file, w=w, k=k, min_r=min_r, max_r=max_r, rows=rows)
+
+    def put_all(self, summaries: list[RunSummary]):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO run_summaries"
+                " (file, size, mtime_ns, w, k, min_r, max_r, rows)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        summary.file,
+                        *self._identity(summary.file),
+                        summary.w,
+                        summary.k,
+                        summary.min_r,
+                        summary.max_r,
+                        summary.rows,
+                    )
+                    for summary in summaries
+                ],
+            )
+
+    def close(self):
+        self.connection.close()
+
+
+@profiled("compute")
+def load_summaries(
+    folder: str,
+    accept: Callable[[str], bool],
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+) -> list[RunSummary]:
+    """
+    RunSummary of every accepted output of folder, in file-name order. Only
+    outputs missing from the cache (or modified since) are read, in parallel.
+    """
+    if not use_cache:
+        return sweep(folder, accept, summarize_run, workers)
+
+    cache = SummaryCache(folder)
+    try:
+        cached = {}
+        for file in os.listdir(folder):
+            if accept(file):
+                summary = cache.get(file)
+                if summary is not None:
+                    cached[file] = summary
+
+        fresh = sweep(
+            folder, lambda file: accept(file) and file not in cached, summarize_run, workers
+        )
+        cache.put_all(fresh)
+    finally:
+        cache.close()
+
+    summaries = list(cached.values()) + fresh
+    return sorted(summaries, key=lambda summary: summary.file)
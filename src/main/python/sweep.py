@@ -0,0 +1,126 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar
+
+import pandas as pd
+
+from reductions import (
+    stream_column_range,
+    stream_column_summary,
+    stream_snapshot_extrema,
+)
+from profiling import profiled
+from run_summary import RunSummary
+
+# Worker processes used by sweep() unless told otherwise
+DEFAULT_WORKERS = int(os.environ.get("SWEEP_WORKERS", os.cpu_count() or 1))
+
+# Extensions of the Kotlin outputs: CSV text, or --output-format float64/double-double
+OUTPUT_EXTENSIONS = (".csv", ".bin")
+
+T = TypeVar("T")
+
+
+def extract_w(filename: str) -> float:
+    match = re.search(r"w-(\d+_\d+)", filename)
+    if match:
+        return float(match.group(1).replace("_", "."))
+    raise ValueError(f"Could not extract 'w' from filename: {filename}")
+
+
+def extract_k(filename: str) -> float:
+    match = re.search(r"k-(\d+_\d+)", filename)
+    if match:
+        return float(match.group(1).replace("_", "."))
+    raise ValueError(f"Could not extract 'w' from filename: {filename}")
+
+
+def steady_amplitude(filepath: str) -> Optional[float]:
+    """Half peak-to-peak of r over a whole output, read in bounded chunks."""
+    try:
+        min_r, max_r = stream_column_range(filepath, "r")
+    except KeyError:
+        return None
+    return (max_r - min_r) / 2  # Half peak-to-peak
+
+
+def is_w_output(file: str) -> bool:
+    return file.endswith(OUTPUT_EXTENSIONS) and "w-" in file
+
+
+def is_beeman_output(file: str) -> bool:
+    return file.endswith(OUTPUT_EXTENSIONS) and "Beeman" in file
+
+
+@dataclass(frozen=True)
+class AmplitudeSeries:
+    file: str
+    w: float
+    amplitudes: pd.Series
+
+
+def _extract_or_none(extract: Callable[[str], float], file: str) -> Optional[float]:
+    try:
+        return extract(file)
+    except ValueError:
+        return None
+
+
+@profiled("compute", file="file")
+def summarize_run(folder: str, file: str) -> RunSummary:
+    """Every per-file statistic the steady-state plots need, in one pass."""
+    try:
+        column = stream_column_summary(os.path.join(folder, file), "r")
+    except KeyError:
+        column = None
+    return RunSummary(
+        file=file,
+        w=_extract_or_none(extract_w, file),
+        k=_extract_or_none(extract_k, file),
+        min_r=column.min if column else None,
+        max_r=column.max if column else None,
+        rows=column.rows if column else 0,
+    )
+
+
+@profiled("compute", file="file")
+def summarize_amplitude_over_time(folder: str, file: str) -> AmplitudeSeries:
+    w = extract_w(file)
+    extrema = stream_snapshot_extrema(os.path.join(folder, file), "r")
+    return AmplitudeSeries(file=file, w=w, amplitudes=extrema.peak_to_peak_series() / 2)
+
+
+def sweep(
+    folder: str,
+    accept: Callable[[str], bool],
+    summarize: Callable[[str, str], T],
+    workers: Optional[int] = None,
+) -> list[T]:
+    """
+    Run summarize(folder, file) for every accepted file of folder on a pool
+    of worker processes and return the results in file-name order. summarize
+    must be a module-level function and should return a small record: only
+    that is sent back to the parent. Files that fail are reported and skipped.
+    """
+    files = sorted(file for file in os.listdir(folder) if accept(file))
+    workers = DEFAULT_WORKERS if workers is None else workers
+
+    results = []
+    if workers <= 1 or len(files) <= 1:
+        for file in files:
+            try:
+                results.append(summarize(folder, file))
+            except Exception as e:
+                print(f"Error processing {file}: {e}")
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+        futures = [(file, executor.submit(summarize, folder, file)) for file in files]
+        for file, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Error processing {file}: {e}")
+    return results
@@ -0,0 +1,219 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from integrators import (
+    ALGORITHMS,
+    COUPLED_NAMES,
+    DAMPED_NAMES,
+    SAVE_STRIDE,
+    CoupledSettings,
+    Settings,
+    add_oscillator_options,
+    coupled_file_name,
+    coupled_settings,
+    damped_file_name,
+    damped_settings,
+    number_of_steps,
+    write_preamble,
+)
+from steady_state import chain_modes, steady_response
+from sweep import DEFAULT_WORKERS
+
+# Rows formatted per task, bounds the memory of every worker
+CHUNK_ROWS = 1 << 18
+
+
+def free_oscillation(r0, v0, rate: float, omega2, t: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Position and velocity of x'' + 2 rate x' + omega2 x = 0 from (r0, v0).
+    Broadcasts over its arguments; an overdamped omega2 gives an imaginary
+    frequency, whose cos and sin / frequency are still real.
+    """
+    frequency2 = omega2 - rate**2
+    frequency = np.sqrt(np.asarray(frequency2, dtype=np.complex128))
+    c = v0 + rate * r0
+    cos = np.cos(frequency * t)
+    sinc = np.sin(frequency * t) / frequency
+    decay = np.exp(-rate * t)
+    r = decay * (r0 * cos + c * sinc)
+    v = decay * (c * cos - r0 * frequency2 * sinc) - rate * r
+    return r.real, v.real
+
+
+def damped_state(settings: Settings, t: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Closed-form damped oscillator, as mse_analysis compares it."""
+    return free_oscillation(
+        settings.initial_positions[0],
+        settings.initial_velocities[0],
+        settings.gamma / (2 * settings.mass),
+        settings.k / settings.mass,
+        t,
+    )
+
+
+def chain_state(settings: CoupledSettings, t: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Exact (times, particles) positions and velocities of the chain of
+    calculateCoupledAcceleration started at rest: in every mode, the steady
+    response to A sin(wt) plus the free oscillation that cancels it at t=0.
+    """
+    n = settings.number_of_particles
+    w = settings.angular_frequency
+    eigenvalues, modes = chain_modes(n)
+    steady = modes.T @ steady_response(
+        [w], settings.k, settings.mass, settings.gamma, settings.amplitude, n
+    )[0]
+
+    t = t[:, np.newaxis]
+    phasor = steady * np.exp(1j * w * t)
+    free_r, free_v = free_oscillation(
+        -steady.imag,
+        -w * steady.real,
+        settings.gamma / (2 * settings.mass),
+        settings.k * eigenvalues / settings.mass,
+        t,
+    )
+    return (phasor.imag + free_r) @ modes.T, (w * phasor.real + free_v) @ modes.T
+
+
+def saved_steps(settings: Settings, stride: int = SAVE_STRIDE) -> np.ndarray:
+    """Step numbers the Kotlin Simulation writes: every multiple of stride."""
+    return np.arange(stride, number_of_steps(settings) + 1, stride, dtype=np.int64)
+
+
+def rows_per_snapshot(settings: Settings) -> int:
+    # The driven particle is written too
+    return settings.number_of_particles + 1 if isinstance(settings, CoupledSettings) else 1
+
+
+def format_rows(settings: Settings, steps: np.ndarray, noise: float = 0.0) -> str:
+    """step,id,r,v rows of the given saved steps, %.36f like the Kotlin output."""
+    t = steps * settings.delta_t
+    if isinstance(settings, CoupledSettings):
+        r, v = chain_state(settings, t)
+        # The driven particle is saved as updated before the iteration, at (step - 1) * dT
+        driven_t = (steps - 1) * settings.delta_t
+        w, A = settings.angular_frequency, settings.amplitude
+        r = np.column_stack([A * np.sin(w * driven_t), r])
+        v = np.column_stack([A * w * np.cos(w * driven_t), v])
+        ids = np.arange(settings.number_of_particles + 1)
+    else:
+        r, v = damped_state(settings, t)
+        r, v = r[:, np.newaxis], v[:, np.newaxis]
+        ids = np.ones(1)
+
+    if noise:
+        # Seeded by the first step, so the output does not depend on the chunking
+        rng = np.random.default_rng([settings.seed, int(steps[0])])
+        r = r + rng.normal(scale=noise, size=r.shape)
+        v = v + rng.normal(scale=noise, size=v.shape)
+
+    rows = np.column_stack(
+        [np.repeat(steps, len(ids)), np.tile(ids, len(steps)), r.ravel(), v.ravel()]
+    )
+    # One %-format over the whole chunk is several times faster than np.savetxt
+    return ("%d,%d,%.36f,%.36f\n" * len(rows)) % tuple(rows.ravel().tolist())
+
+
+def write_output(
+    settings: Settings,
+    filepath: str,
+    stride: int = SAVE_STRIDE,
+    noise: float = 0.0,
+    workers: Optional[int] = None,
+) -> int:
+    """Write the whole trajectory in the Kotlin layout, returning the number of rows."""
+    workers = DEFAULT_WORKERS if workers is None else workers
+    steps = saved_steps(settings, stride)
+    per_chunk = max(1, CHUNK_ROWS // rows_per_snapshot(settings))
+    chunks = [steps[start:start + per_chunk] for start in range(0, len(steps), per_chunk)]
+
+    with open(filepath, "w", buffering=1 << 20) as output:
+        write_preamble(settings, output, stride)
+        if workers <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                output.write(format_rows(settings, chunk, noise))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                # map keeps the chunk order, formatting runs ahead of the writes
+                for text in executor.map(
+                    format_rows, [settings] * len(chunks), chunks, [noise] * len(chunks)
+                ):
+                    output.write(text)
+
+    return len(steps) * rows_per_snapshot(settings)
+
+
+def generate_damped(output_directory: str, algorithm: str = "beeman", stride: int = SAVE_STRIDE, noise: float = 0.0, workers: Optional[int] = None, **kwargs) -> str:
+    settings = damped_settings(**kwargs)
+    filepath = os.path.join(output_directory, damped_file_name(DAMPED_NAMES[algorithm], settings))
+    write_output(settings, filepath, stride, noise, workers)
+    return filepath
+
+
+def generate_coupled(output_directory: str, omega: float, algorithm: str = "beeman", stride: int = SAVE_STRIDE, noise: float = 0.0, workers: Optional[int] = None, **kwargs) -> str:
+    settings = coupled_settings(float(omega), **kwargs)
+    filepath = os.path.join(output_directory, coupled_file_name(COUPLED_NAMES[algorithm], settings))
+    write_output(settings, filepath, stride, noise, workers)
+    return filepath
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write closed-form trajectories in the Kotlin output format, without simulating."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    damped = commands.add_parser("damped-oscillator")
+    add_oscillator_options(damped)
+    damped.add_argument("-r", "--r0", "--initial-position", dest="r0", type=float, default=1.0, help="r(t=0) [m]")
+    damped.add_argument("-v", "--v0", "--initial-velocity", dest="v0", type=float, help="Initial velocity of the particles [m/s]")
+
+    coupled = commands.add_parser("coupled-oscillator")
+    add_oscillator_options(coupled)
+    coupled.add_argument("-N", "--number-of-particles", type=int, default=1000, help="N - Number of particles")
+    coupled.add_argument(
+        "-w", "--angular-frequency", type=lambda text: [float(w) for w in text.split(",")],
+        default=[1.0], help="w [rad/s] (Could be a list, ej: 1.0,1.5,2.0)",
+    )
+    coupled.add_argument("-l", "--spring-length", type=float, default=0.001, help="l [m]")
+
+    for command in (damped, coupled):
+        command.add_argument("-a", "--algorithm", choices=ALGORITHMS, default="beeman", help="Only names the output file")
+        command.add_argument("--stride", type=int, default=SAVE_STRIDE, help="Iterations between saved states")
+        command.add_argument("--noise", type=float, default=0.0, help="Standard deviation of the Gaussian noise added to r and v")
+        command.add_argument("--workers", type=int, default=None)
+
+    args = parser.parse_args()
+    os.makedirs(args.output_directory, exist_ok=True)
+    common = dict(
+        algorithm=args.algorithm,
+        stride=args.stride,
+        noise=args.noise,
+        workers=args.workers,
+        mass=args.mass,
+        k=args.spring_constant,
+        gamma=args.gamma,
+        final_time=args.final_time,
+        delta_t=args.delta_t,
+        amplitude=args.amplitude,
+        seed=args.seed,
+    )
+
+    if args.command == "damped-oscillator":
+        print(generate_damped(args.output_directory, r0=args.r0, v0=args.v0, **common))
+    else:
+        for omega in args.angular_frequency:
+            print(
+                generate_coupled(
+                    args.output_directory,
+                    omega,
+                    number_of_particles=args.number_of_particles,
+                    spring_length=args.spring_length,
+                    **common,
+                )
+            )
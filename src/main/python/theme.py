@@ -0,0 +1,79 @@
+import math
+
+from cycler import cycler
+
+CUSTOM_PALETTE = [
+    "#508fbe",  # blue
+    "#f37120",  # orange
+    "#4baf4e",  # green
+    "#f2cb31",  # yellow
+    "#c178ce",  # purple
+    "#cd4745",  # red
+    "#9ef231",  # light green
+    "#50beaa",  # green + blue
+    "#8050be",  # violet
+    "#cf1f51",  # magenta
+]
+BLACK = "#1a1a1a"
+GREY = "#6f6f6f"
+LIGHT_GREY = "#bfbfbf"
+
+PLT_THEME = {
+    "axes.prop_cycle": cycler(color=CUSTOM_PALETTE),  # Set palette
+    "axes.spines.top": False,  # Remove spine (frame)
+    "axes.spines.right": False,
+    "axes.spines.left": True,
+    "axes.spines.bottom": True,
+    "axes.edgecolor": BLACK,
+    "axes.titleweight": "normal",  # Optional: ensure title weight is normal (not bold)
+    "axes.titlelocation": "center",  # Center the title by default
+    "axes.titlecolor": GREY,  # Set title color
+    "axes.labelcolor": BLACK,  # Set labels color
+    "axes.labelpad": 12,
+    "xtick.bottom": False,  # Remove ticks on the X axis
+    "xtick.labelcolor": BLACK,  # Set Y ticks color
+    "xtick.color": GREY,  # Set Y label color
+    "ytick.labelcolor": BLACK,  # Set Y ticks color
+    "ytick.color": GREY,  # Set Y label color
+    "savefig.dpi": 128,
+    "legend.frameon": False,
+    "legend.labelcolor": BLACK,
+    "figure.titlesize": 16,  # Set suptitle size
+    "font.size": 22,
+    "axes.titlesize": 24,
+    "axes.labelsize": 24,
+    "xtick.labelsize": 22,
+    "ytick.labelsize": 22,
+    "legend.fontsize": 22,
+}
+
+DPI = 100
+FIGSIZE = (1920 / DPI, 1080 / DPI)
+
+_applied = False
+
+
+def apply_theme():
+    """
+    Set PLT_THEME on matplotlib and seaborn. Called by the plots that use it
+    rather than on import, so computing without plotting never loads them.
+    """
+    global _applied
+    if _applied:
+        return
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.style.use(PLT_THEME)
+    sns.set_palette(CUSTOM_PALETTE)
+    sns.set_style(PLT_THEME)
+    _applied = True
+
+
+def figure_pixels(fig) -> int:
+    """Width of fig once saved, in pixels: what downsample_for_plot reduces lines to."""
+    import matplotlib as mpl
+
+    dpi = mpl.rcParams["savefig.dpi"]
+    dpi = fig.dpi if dpi == "figure" else max(dpi, fig.dpi)
+    return int(math.ceil(fig.get_figwidth() * dpi))